@@ -0,0 +1,55 @@
+# backend/garantir_indices.py
+import argparse
+import os
+import sys
+
+# Adiciona o diretório do backend ao path para importar o pacote 'src' (que usa imports relativos)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.core.database import Database, fechar_cliente
+from src.core.indexes import garantir_indices, verificar_uso_indices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cria os índices das coleções do MongoDB que ainda não existem.")
+    parser.add_argument("--verificar", action="store_true", help="Confere com explain se as consultas frequentes das rotas usam os índices esperados")
+    args = parser.parse_args()
+
+    db = Database()
+    resultado = garantir_indices(db)
+    for nome in resultado["criados"]:
+        print(f"Criado: {nome}")
+    for nome in resultado["existentes"]:
+        print(f"Já existia: {nome}")
+    for nome in resultado["falhas"]:
+        print(f"FALHOU: {nome}")
+    codigo = 0 if not resultado["falhas"] else 1
+
+    if args.verificar:
+        print("\nPlanos das consultas frequentes:")
+        for consulta in verificar_uso_indices(db):
+            situacao = "OK" if consulta["ok"] else "SEM ÍNDICE"
+            detalhe = consulta["erro"] or (
+                f"esperado={consulta['indice_esperado']} estágios={'>'.join(consulta['estagios'])} "
+                f"índices={','.join(consulta['indices']) or '-'} chaves={consulta['chaves_examinadas']} "
+                f"documentos={consulta['documentos_examinados']} retornados={consulta['retornados']}"
+            )
+            print(f"  [{situacao}] {consulta['colecao']}: {consulta['nome']} ({detalhe})")
+            if not consulta["ok"]:
+                codigo = 1
+    return codigo
+
+
+if __name__ == '__main__':
+    try:
+        codigo = main()
+    finally:
+        fechar_cliente()
+    sys.exit(codigo)
+
+
+"""
+COMO USAR
+Dentro do contêiner do backend:
+
+docker compose exec backend python garantir_indices.py --verificar
+"""
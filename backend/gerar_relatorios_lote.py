@@ -0,0 +1,69 @@
+# backend/gerar_relatorios_lote.py
+import argparse
+import json
+import os
+import sys
+
+# Adiciona o diretório do backend ao path para importar o pacote 'src' (que usa imports relativos)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.core.database import Database, fechar_cliente
+from src.report_generation.report_batch import gerar_relatorios_em_lote
+
+
+def _carregar_entradas(caminho_arquivo):
+    with open(caminho_arquivo, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    # Aceita a lista de entradas ou o mesmo corpo do endpoint /reports/gerarRelatoriosEmLote/
+    return dados.get("relatorios", []) if isinstance(dados, dict) else dados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os relatórios de várias listas em lote.")
+    parser.add_argument("arquivo", help="JSON com as entradas: idLista e campos da capa (nomeSecretaria, siglaSecretaria, dataInicio, dataFim, ano, mes, linkGoogleDrive)")
+    parser.add_argument("--usuario", default="admin", help="Usuário registrado nos logs como autor das gerações (padrão: admin)")
+    parser.add_argument("--saida", default=None, help="Grava o resumo do lote neste arquivo JSON")
+    args = parser.parse_args()
+
+    entradas = _carregar_entradas(args.arquivo)
+    if not entradas:
+        print("Nenhum relatório para gerar.")
+        return 1
+
+    db = Database()
+    usuario = db.find_one('users', {'username': args.usuario})
+    db.close()
+    if not usuario:
+        print(f"Usuário '{args.usuario}' não encontrado.")
+        return 1
+
+    def ao_concluir(resultado):
+        situacao = "OK" if resultado["erro"] is None else f"FALHOU: {resultado['erro']}"
+        print(f"[{resultado['status']}] {resultado['nome'] or resultado['id_lista']} (relatório {resultado['relatorio_id']}) {situacao}")
+
+    resumo = gerar_relatorios_em_lote(entradas, usuario, ao_concluir)
+
+    print(f"\n{resumo['concluidos']}/{resumo['total']} relatório(s) gerados em {resumo['duracao_segundos']}s ({resumo['falhas']} falha(s), {resumo['cancelados']} cancelado(s)).")
+    for resultado in resumo["relatorios"]:
+        print(f"  {resultado['id_lista']}: {resultado['status']} relatório={resultado['relatorio_id']} reaproveitado={resultado['reaproveitado']} erro={resultado['erro']}")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2, default=str)
+    return 0 if resumo["concluidos"] == resumo["total"] else 2
+
+
+if __name__ == '__main__':
+    try:
+        codigo = main()
+    finally:
+        fechar_cliente()
+    sys.exit(codigo)
+
+
+"""
+COMO USAR
+Dentro do contêiner do backend, com um arquivo JSON contendo a lista de relatórios:
+
+docker compose exec backend python gerar_relatorios_lote.py lote.json --saida resumo.json
+
+O número de relatórios gerados em paralelo vem de max_relatorios_paralelos_lote (MAX_RELATORIOS_PARALELOS_LOTE).
+"""
@@ -38,6 +38,66 @@ class Config:
         self._caminho_shared_jsons = os.getenv('CAMINHO_SHARED_JSONS', self._arquivo_config["caminho_shared_jsons"])
         self._caminho_report_templates_base = os.getenv('CAMINHO_REPORT_TEMPLATES_BASE', self._arquivo_config["caminho_report_templates_base"])
         self._caminho_report_templates_descriptions = os.getenv('CAMINHO_REPORT_TEMPLATES_DESCRIPTIONS', self._arquivo_config["caminho_report_templates_descriptions"])
+        # Como os assets somente-leitura do template chegam à pasta de cada relatório: 'link' (hardlink/symlink, com fallback para cópia) ou 'copia'
+        self._modo_assets_template = os.getenv('MODO_ASSETS_TEMPLATE', self._arquivo_config.get("modo_assets_template", "link"))
+        # Acima deste número de instâncias por vulnerabilidade, o Anexo A mostra apenas uma amostra e a lista completa vai para um CSV
+        self._limite_instancias_anexo = int(os.getenv('LIMITE_INSTANCIAS_ANEXO', self._arquivo_config.get("limite_instancias_anexo", 500)))
+        self._amostra_instancias_anexo = int(os.getenv('AMOSTRA_INSTANCIAS_ANEXO', self._arquivo_config.get("amostra_instancias_anexo", 60)))
+        # Cache dos fragmentos LaTeX por entrada do catálogo: tamanho do LRU em memória e pasta opcional em disco (vazio desativa o disco)
+        self._tamanho_cache_fragmentos = int(os.getenv('TAMANHO_CACHE_FRAGMENTOS', self._arquivo_config.get("tamanho_cache_fragmentos", 2048)))
+        self._caminho_cache_fragmentos = os.getenv('CAMINHO_CACHE_FRAGMENTOS', self._arquivo_config.get("caminho_cache_fragmentos", ""))
+        # Compilação LaTeX: driver ('pdflatex' ou 'latexmk') e número máximo de passadas completas do pdflatex
+        self._driver_latex = os.getenv('DRIVER_LATEX', self._arquivo_config.get("driver_latex", "pdflatex"))
+        self._max_passadas_latex = int(os.getenv('MAX_PASSADAS_LATEX', self._arquivo_config.get("max_passadas_latex", 3)))
+        # Formato pré-compilado do preâmbulo (pdflatex -fmt), gerado uma vez por versão do template
+        self._usar_formato_preambulo = str(os.getenv('USAR_FORMATO_PREAMBULO', self._arquivo_config.get("usar_formato_preambulo", True))).lower() in ("1", "true", "sim")
+        # Executor de compilação: vagas simultâneas (0 = número de CPUs), tempo limite por job e rlimits do processo (0 = sem limite)
+        self._max_compilacoes_simultaneas = int(os.getenv('MAX_COMPILACOES_SIMULTANEAS', self._arquivo_config.get("max_compilacoes_simultaneas", 0)))
+        self._tempo_limite_compilacao = int(os.getenv('TEMPO_LIMITE_COMPILACAO', self._arquivo_config.get("tempo_limite_compilacao", 600)))
+        self._limite_memoria_compilacao_mb = int(os.getenv('LIMITE_MEMORIA_COMPILACAO_MB', self._arquivo_config.get("limite_memoria_compilacao_mb", 2048)))
+        self._limite_cpu_compilacao_segundos = int(os.getenv('LIMITE_CPU_COMPILACAO_SEGUNDOS', self._arquivo_config.get("limite_cpu_compilacao_segundos", 600)))
+        # Cache de PDFs endereçado pelo conteúdo do build (vazio = desabilitado) e seu tamanho máximo
+        self._caminho_cache_pdfs = os.getenv('CAMINHO_CACHE_PDFS', self._arquivo_config.get("caminho_cache_pdfs", ""))
+        self._tamanho_max_cache_pdfs_mb = int(os.getenv('TAMANHO_MAX_CACHE_PDFS_MB', self._arquivo_config.get("tamanho_max_cache_pdfs_mb", 1024)))
+        # Pasta local para os builds de rascunho (vazio = /dev/shm quando houver espaço, senão o temporário do sistema)
+        self._diretorio_scratch_compilacao = os.getenv('DIRETORIO_SCRATCH_COMPILACAO', self._arquivo_config.get("diretorio_scratch_compilacao", ""))
+        # Compila as partes do relatório (marcadores %%AUDITEX-PARTE do template) em paralelo e une os PDFs; links do sumário e referências entre partes saem sem link (ver section_compiler)
+        self._compilacao_paralela_secoes = str(os.getenv('COMPILACAO_PARALELA_SECOES', self._arquivo_config.get("compilacao_paralela_secoes", False))).lower() in ("1", "true", "sim")
+        # Cache dos gráficos renderizados, endereçado pelos dados de entrada (vazio = desabilitado) e seu tamanho máximo
+        self._caminho_cache_graficos = os.getenv('CAMINHO_CACHE_GRAFICOS', self._arquivo_config.get("caminho_cache_graficos", ""))
+        self._tamanho_max_cache_graficos_mb = int(os.getenv('TAMANHO_MAX_CACHE_GRAFICOS_MB', self._arquivo_config.get("tamanho_max_cache_graficos_mb", 256)))
+        # Processos que renderizam os gráficos do relatório em paralelo (0 = renderiza no próprio processo do servidor)
+        self._processos_graficos = int(os.getenv('PROCESSOS_GRAFICOS', self._arquivo_config.get("processos_graficos", 3)))
+        # Sites com barra própria no gráfico de vulnerabilidades por site; os demais são somados na barra "Outros" (0 = todos)
+        self._max_sites_grafico = int(os.getenv('MAX_SITES_GRAFICO', self._arquivo_config.get("max_sites_grafico", 40)))
+        # Divide as barras do gráfico por site nas severidades (Critical, High, Medium, Low)
+        self._grafico_sites_empilhado = str(os.getenv('GRAFICO_SITES_EMPILHADO', self._arquivo_config.get("grafico_sites_empilhado", False))).lower() in ("1", "true", "sim")
+        # Formato do gráfico por site: "png" ou "pdf" (vetorial, incluído pelo pdflatex sem reamostragem)
+        self._formato_grafico_sites = str(os.getenv('FORMATO_GRAFICO_SITES', self._arquivo_config.get("formato_grafico_sites", "png"))).lower()
+        # Relatórios gerados em paralelo pelo pool de jobs em segundo plano (os demais aguardam na fila)
+        self._max_jobs_relatorio = int(os.getenv('MAX_JOBS_RELATORIO', self._arquivo_config.get("max_jobs_relatorio", 2)))
+        # Prazo de cada geração em segundo plano, contado do início da execução; ao excedê-lo, a geração é cancelada (0 = sem prazo)
+        self._tempo_limite_job_relatorio = int(os.getenv('TEMPO_LIMITE_JOB_RELATORIO', self._arquivo_config.get("tempo_limite_job_relatorio", 1800)))
+        # Uma geração idêntica (mesma lista, mesmos scans e mesmos campos) concluída há menos que isso é reaproveitada (0 = só junta às em andamento)
+        self._janela_reaproveitamento_relatorio_segundos = int(os.getenv('JANELA_REAPROVEITAMENTO_RELATORIO_SEGUNDOS', self._arquivo_config.get("janela_reaproveitamento_relatorio_segundos", 600)))
+        # Reaproveita, do relatório anterior da lista, os estágios de dados (TXTs, anexos e gráficos) cujas entradas não mudaram
+        self._reaproveitar_preprocessado = str(os.getenv('REAPROVEITAR_PREPROCESSADO', self._arquivo_config.get("reaproveitar_preprocessado", True))).lower() in ("1", "true", "sim")
+        # Geração em lote: relatórios com as etapas de dados (scans e gráficos) em paralelo; a compilação segue max_compilacoes_simultaneas
+        self._max_relatorios_paralelos_lote = int(os.getenv('MAX_RELATORIOS_PARALELOS_LOTE', self._arquivo_config.get("max_relatorios_paralelos_lote", 4)))
+        # Pool de conexões do MongoClient compartilhado pelo processo (um por worker)
+        self._mongo_max_pool_size = int(os.getenv('MONGO_MAX_POOL_SIZE', self._arquivo_config.get("mongo_max_pool_size", 50)))
+        self._mongo_min_pool_size = int(os.getenv('MONGO_MIN_POOL_SIZE', self._arquivo_config.get("mongo_min_pool_size", 0)))
+        # Timeouts do MongoDB em milissegundos: escolha do servidor, abertura de conexão, operações e espera por uma conexão livre no pool (0 = sem limite nos dois últimos)
+        self._mongo_server_selection_timeout_ms = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', self._arquivo_config.get("mongo_server_selection_timeout_ms", 5000)))
+        self._mongo_connect_timeout_ms = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', self._arquivo_config.get("mongo_connect_timeout_ms", 5000)))
+        self._mongo_socket_timeout_ms = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', self._arquivo_config.get("mongo_socket_timeout_ms", 0)))
+        self._mongo_wait_queue_timeout_ms = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', self._arquivo_config.get("mongo_wait_queue_timeout_ms", 0)))
+        # Cria os índices das coleções (core/indexes.py) ao iniciar a aplicação; desativar se forem criados pelo script garantir_indices.py
+        self._criar_indices_na_inicializacao = str(os.getenv('CRIAR_INDICES_NA_INICIALIZACAO', self._arquivo_config.get("criar_indices_na_inicializacao", True))).lower() in ("1", "true", "sim")
+        # Pré-visualização HTML do relatório: vulnerabilidades exibidas por página
+        self._vulnerabilidades_por_pagina_preview = int(os.getenv('VULNERABILIDADES_POR_PAGINA_PREVIEW', self._arquivo_config.get("vulnerabilidades_por_pagina_preview", 30)))
+        # Listas com as seções da pré-visualização mantidas em memória, para paginar sem reler os scans
+        self._tamanho_cache_preview = int(os.getenv('TAMANHO_CACHE_PREVIEW', self._arquivo_config.get("tamanho_cache_preview", 8)))
 
     @property
     def caminho_shared_relatorios(self) -> str:
@@ -53,4 +113,148 @@ class Config:
 
     @property
     def caminho_report_templates_descriptions(self) -> str:
-        return self._caminho_report_templates_descriptions
\ No newline at end of file
+        return self._caminho_report_templates_descriptions
+
+    @property
+    def modo_assets_template(self) -> str:
+        return self._modo_assets_template
+
+    @property
+    def limite_instancias_anexo(self) -> int:
+        return self._limite_instancias_anexo
+
+    @property
+    def amostra_instancias_anexo(self) -> int:
+        return self._amostra_instancias_anexo
+
+    @property
+    def tamanho_cache_fragmentos(self) -> int:
+        return self._tamanho_cache_fragmentos
+
+    @property
+    def caminho_cache_fragmentos(self) -> str:
+        return self._caminho_cache_fragmentos
+
+    @property
+    def driver_latex(self) -> str:
+        return self._driver_latex
+
+    @property
+    def max_passadas_latex(self) -> int:
+        return self._max_passadas_latex
+
+    @property
+    def usar_formato_preambulo(self) -> bool:
+        return self._usar_formato_preambulo
+
+    @property
+    def max_compilacoes_simultaneas(self) -> int:
+        return self._max_compilacoes_simultaneas
+
+    @property
+    def tempo_limite_compilacao(self) -> int:
+        return self._tempo_limite_compilacao
+
+    @property
+    def limite_memoria_compilacao_mb(self) -> int:
+        return self._limite_memoria_compilacao_mb
+
+    @property
+    def limite_cpu_compilacao_segundos(self) -> int:
+        return self._limite_cpu_compilacao_segundos
+
+    @property
+    def caminho_cache_pdfs(self) -> str:
+        return self._caminho_cache_pdfs
+
+    @property
+    def tamanho_max_cache_pdfs_mb(self) -> int:
+        return self._tamanho_max_cache_pdfs_mb
+
+    @property
+    def diretorio_scratch_compilacao(self) -> str:
+        return self._diretorio_scratch_compilacao
+
+    @property
+    def compilacao_paralela_secoes(self) -> bool:
+        return self._compilacao_paralela_secoes
+
+    @property
+    def vulnerabilidades_por_pagina_preview(self) -> int:
+        return self._vulnerabilidades_por_pagina_preview
+
+    @property
+    def caminho_cache_graficos(self) -> str:
+        return self._caminho_cache_graficos
+
+    @property
+    def tamanho_max_cache_graficos_mb(self) -> int:
+        return self._tamanho_max_cache_graficos_mb
+
+    @property
+    def processos_graficos(self) -> int:
+        return self._processos_graficos
+
+    @property
+    def max_sites_grafico(self) -> int:
+        return self._max_sites_grafico
+
+    @property
+    def grafico_sites_empilhado(self) -> bool:
+        return self._grafico_sites_empilhado
+
+    @property
+    def formato_grafico_sites(self) -> str:
+        return self._formato_grafico_sites
+
+    @property
+    def max_jobs_relatorio(self) -> int:
+        return self._max_jobs_relatorio
+
+    @property
+    def janela_reaproveitamento_relatorio_segundos(self) -> int:
+        return self._janela_reaproveitamento_relatorio_segundos
+
+    @property
+    def reaproveitar_preprocessado(self) -> bool:
+        return self._reaproveitar_preprocessado
+
+    @property
+    def max_relatorios_paralelos_lote(self) -> int:
+        return self._max_relatorios_paralelos_lote
+
+    @property
+    def tempo_limite_job_relatorio(self) -> int:
+        return self._tempo_limite_job_relatorio
+
+    @property
+    def mongo_max_pool_size(self) -> int:
+        return self._mongo_max_pool_size
+
+    @property
+    def mongo_min_pool_size(self) -> int:
+        return self._mongo_min_pool_size
+
+    @property
+    def mongo_server_selection_timeout_ms(self) -> int:
+        return self._mongo_server_selection_timeout_ms
+
+    @property
+    def mongo_connect_timeout_ms(self) -> int:
+        return self._mongo_connect_timeout_ms
+
+    @property
+    def mongo_socket_timeout_ms(self) -> int:
+        return self._mongo_socket_timeout_ms
+
+    @property
+    def mongo_wait_queue_timeout_ms(self) -> int:
+        return self._mongo_wait_queue_timeout_ms
+
+    @property
+    def criar_indices_na_inicializacao(self) -> bool:
+        return self._criar_indices_na_inicializacao
+
+    @property
+    def tamanho_cache_preview(self) -> int:
+        return self._tamanho_cache_preview
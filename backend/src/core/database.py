@@ -1,15 +1,85 @@
 import os
+import threading
 from pymongo import MongoClient
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from bson.objectid import ObjectId
 
+from .config import Config
+
+config = Config("config.json")
+
+# Cliente compartilhado por todas as instâncias de Database do processo (ver `obter_cliente`)
+_cliente: Optional[MongoClient] = None
+_cliente_pid: Optional[int] = None
+_cliente_lock = threading.Lock()
+
+
+def _milissegundos_ou_none(valor: int) -> Optional[int]:
+    # 0 nas configurações de timeout = sem limite (padrão do pymongo)
+    return valor if valor > 0 else None
+
+
+def obter_cliente() -> MongoClient:
+    """
+    Retorna o MongoClient do processo, criado na primeira chamada. O cliente mantém um pool de
+    conexões (`mongo_max_pool_size`) usado por todas as threads, então cada requisição reaproveita
+    conexões já abertas em vez de refazer a conexão e a descoberta do servidor.
+
+    O MongoClient não pode ser usado depois de um fork: um processo filho (ex.: workers de um
+    servidor com preload) descarta o cliente herdado e cria o seu.
+    """
+    global _cliente, _cliente_pid
+    pid = os.getpid()
+    if _cliente is None or _cliente_pid != pid:
+        with _cliente_lock:
+            if _cliente is None or _cliente_pid != pid:
+                # ATENÇÃO: Alterado de "mongodb://localhost:27017/" para "mongodb://mongodb:27017/"
+                # 'mongodb' é o nome do serviço MongoDB no docker-compose.yml
+                MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/mydatabase")
+                _cliente = MongoClient(
+                    MONGO_URI,
+                    maxPoolSize=config.mongo_max_pool_size,
+                    minPoolSize=config.mongo_min_pool_size,
+                    serverSelectionTimeoutMS=config.mongo_server_selection_timeout_ms,
+                    connectTimeoutMS=config.mongo_connect_timeout_ms,
+                    socketTimeoutMS=_milissegundos_ou_none(config.mongo_socket_timeout_ms),
+                    waitQueueTimeoutMS=_milissegundos_ou_none(config.mongo_wait_queue_timeout_ms),
+                    # A conexão é aberta na primeira operação, não na importação dos módulos
+                    connect=False
+                )
+                _cliente_pid = pid
+    return _cliente
+
+
+def _apos_fork_no_filho() -> None:
+    # O lock pode ter sido copiado adquirido por outra thread do processo pai
+    global _cliente, _cliente_pid, _cliente_lock
+    _cliente, _cliente_pid, _cliente_lock = None, None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_apos_fork_no_filho)
+
+
+def fechar_cliente() -> None:
+    """
+    Fecha o pool de conexões do processo (ex.: ao fim de um script). Uma nova instância de
+    Database depois disso cria outro cliente.
+    """
+    global _cliente, _cliente_pid
+    with _cliente_lock:
+        if _cliente is not None and _cliente_pid == os.getpid():
+            _cliente.close()
+        _cliente, _cliente_pid = None, None
+
+
 class Database:
+    """
+    Acesso às coleções do banco. As instâncias são leves: todas usam o cliente compartilhado do
+    processo (ver `obter_cliente`), então podem ser criadas a cada uso.
+    """
     def __init__(self, db_name: str = "mydatabase"):
-        # ATENÇÃO: Alterado de "mongodb://localhost:27017/" para "mongodb://mongodb:27017/"
-        # 'mongodb' é o nome do serviço MongoDB no docker-compose.yml
-        MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/mydatabase")
-
-        self.client = MongoClient(MONGO_URI) 
+        self.client = obter_cliente()
         self.db = self.client[db_name]
 
     def insert_one(self, collection_name: str, data: Dict[str, Any]):
@@ -40,7 +110,11 @@ class Database:
         return self.db[collection_name].count_documents(query)
 
     def close(self):
-        self.client.close()
+        """
+        Mantido por compatibilidade: as conexões voltam sozinhas ao pool compartilhado, que não é
+        encerrado aqui (ver `fechar_cliente`).
+        """
+        pass
 
     def get_object_id(self, id_string: str) -> ObjectId:
         """Converte uma string de ID em um ObjectId do MongoDB."""
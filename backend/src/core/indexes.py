@@ -0,0 +1,172 @@
+# backend/src/core/indexes.py
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+from .database import Database
+
+# Índices secundários das coleções: (coleção, chaves, opções). Os nomes são fixos para que
+# `garantir_indices` seja idempotente e um índice alterado aqui seja recriado com o mesmo nome.
+INDICES = [
+    # Toda operação em listas busca pelo nome (routes/lists.py), que também não pode repetir
+    ("listas", [("nomeLista", ASCENDING)], {"name": "nomeLista_unico", "unique": True}),
+    # Login e cadastro de usuários
+    ("users", [("username", ASCENDING)], {"name": "username_unico", "unique": True}),
+    # Parcial para não tratar como duplicados os usuários antigos sem e-mail
+    ("users", [("email", ASCENDING)], {"name": "email_unico", "unique": True, "partialFilterExpression": {"email": {"$type": "string"}}}),
+    # Página de logs: filtros opcionais por usuário, ação e dia, sempre ordenada por timestamp decrescente.
+    # Igualdades antes do timestamp para que o mesmo índice sirva o intervalo e a ordenação.
+    ("logs", [("username", ASCENDING), ("action", ASCENDING), ("timestamp", DESCENDING)], {"name": "username_action_timestamp"}),
+    # Só o usuário: com a ação entre as chaves, o índice acima obrigaria a ordenar em memória
+    ("logs", [("username", ASCENDING), ("timestamp", DESCENDING)], {"name": "username_timestamp"}),
+    ("logs", [("action", ASCENDING), ("timestamp", DESCENDING)], {"name": "action_timestamp"}),
+    ("logs", [("timestamp", DESCENDING)], {"name": "timestamp"}),
+    # Relatório anterior da lista a reaproveitar (pipeline) e relatório recente com a mesma chave de geração (routes/reports.py)
+    ("relatorios", [("id_lista", ASCENDING), ("status", ASCENDING)], {"name": "id_lista_status"}),
+    ("relatorios", [("chave_geracao", ASCENDING), ("status", ASCENDING), ("finalizado_em", DESCENDING)], {"name": "chave_geracao_status_finalizado_em"}),
+]
+
+
+def _consultas_frequentes() -> List[Dict[str, Any]]:
+    """
+    Consultas das rotas que `verificar_uso_indices` confere, no mesmo formato usado por elas, com
+    o índice de `INDICES` que cada uma deve usar.
+    """
+    inicio_dia = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    dia = {"$gte": inicio_dia, "$lte": inicio_dia + timedelta(days=1, microseconds=-1)}
+    por_timestamp = [("timestamp", DESCENDING)]
+    return [
+        {"nome": "lista por nome", "colecao": "listas", "filtro": {"nomeLista": "exemplo"}, "indice": "nomeLista_unico"},
+        {"nome": "usuário por username", "colecao": "users", "filtro": {"username": "admin"}, "indice": "username_unico"},
+        {"nome": "usuário por e-mail", "colecao": "users", "filtro": {"email": "admin@example.com"}, "indice": "email_unico"},
+        {"nome": "logs sem filtro", "colecao": "logs", "filtro": {}, "ordenacao": por_timestamp, "indice": "timestamp"},
+        {"nome": "logs por usuário", "colecao": "logs", "filtro": {"username": "admin"}, "ordenacao": por_timestamp, "indice": "username_timestamp"},
+        {"nome": "logs por ação", "colecao": "logs", "filtro": {"action": "generate_report"}, "ordenacao": por_timestamp, "indice": "action_timestamp"},
+        {"nome": "logs por dia", "colecao": "logs", "filtro": {"timestamp": dia}, "ordenacao": por_timestamp, "indice": "timestamp"},
+        {"nome": "logs por usuário, ação e dia", "colecao": "logs", "filtro": {"username": "admin", "action": "generate_report", "timestamp": dia}, "ordenacao": por_timestamp, "indice": "username_action_timestamp"},
+        {"nome": "relatórios concluídos da lista", "colecao": "relatorios", "filtro": {"id_lista": "exemplo", "status": "concluido"}, "indice": "id_lista_status"},
+        {"nome": "relatório recente por chave", "colecao": "relatorios", "filtro": {"chave_geracao": "exemplo", "status": "concluido", "finalizado_em": {"$gte": inicio_dia}}, "indice": "chave_geracao_status_finalizado_em"},
+    ]
+
+
+def garantir_indices(db_instance: Optional[Database] = None) -> Dict[str, List[str]]:
+    """
+    Cria os índices de `INDICES` que ainda não existem. Pode ser executada a cada inicialização:
+    índices já existentes com a mesma definição não são recriados.
+
+    Um índice que não pode ser criado (ex.: nomes de lista duplicados impedindo o índice único) é
+    informado e não impede os demais. Retorna os nomes dos índices em "criados", "existentes" e "falhas".
+    """
+    db_instance = db_instance or Database()
+    resultado = {"criados": [], "existentes": [], "falhas": []}
+    for colecao, chaves, opcoes in INDICES:
+        nome = opcoes["name"]
+        try:
+            existentes = db_instance.db[colecao].index_information()
+            atual = existentes.get(nome)
+            if atual is not None:
+                mesma_definicao = (
+                    [tuple(chave) for chave in atual["key"]] == chaves
+                    and all(atual.get(opcao) == valor for opcao, valor in opcoes.items() if opcao != "name")
+                )
+                if mesma_definicao:
+                    resultado["existentes"].append(f"{colecao}.{nome}")
+                    continue
+                # Definição alterada em INDICES: o índice antigo é substituído
+                db_instance.db[colecao].drop_index(nome)
+            db_instance.db[colecao].create_index(chaves, **opcoes)
+            resultado["criados"].append(f"{colecao}.{nome}")
+        except DuplicateKeyError as e:
+            print(f"Erro: índice único '{colecao}.{nome}' não criado, há documentos duplicados: {e}")
+            resultado["falhas"].append(f"{colecao}.{nome}")
+        except OperationFailure as e:
+            print(f"Erro ao criar o índice '{colecao}.{nome}': {e}")
+            resultado["falhas"].append(f"{colecao}.{nome}")
+    return resultado
+
+
+def _estagios_plano(plano: Any) -> List[str]:
+    """Estágios de um plano do explain (ex.: IXSCAN, FETCH, SORT, COLLSCAN), incluindo os aninhados."""
+    estagios = []
+    if isinstance(plano, dict):
+        if isinstance(plano.get("stage"), str):
+            estagios.append(plano["stage"])
+        for valor in plano.values():
+            estagios.extend(_estagios_plano(valor))
+    elif isinstance(plano, list):
+        for item in plano:
+            estagios.extend(_estagios_plano(item))
+    return estagios
+
+
+def _indices_plano(plano: Any) -> List[str]:
+    if isinstance(plano, dict):
+        indices = [plano["indexName"]] if isinstance(plano.get("indexName"), str) else []
+        for valor in plano.values():
+            indices.extend(_indices_plano(valor))
+        return indices
+    if isinstance(plano, list):
+        return [indice for item in plano for indice in _indices_plano(item)]
+    return []
+
+
+def verificar_uso_indices(db_instance: Optional[Database] = None) -> List[Dict[str, Any]]:
+    """
+    Executa o explain das consultas frequentes das rotas e informa, para cada uma, os estágios e
+    os índices do plano vencedor e as chaves e documentos examinados para os documentos retornados.
+
+    A consulta está "ok" quando o plano vencedor usa o índice esperado, sem percorrer a coleção
+    (COLLSCAN) nem ordenar em memória (SORT), e não examina mais documentos do que retorna — ou
+    seja, quando o filtro inteiro e a ordenação vêm do índice. Sem executionStats no explain
+    (servidor que não o inclui), a última condição não é verificada.
+    """
+    db_instance = db_instance or Database()
+    resultados = []
+    for consulta in _consultas_frequentes():
+        cursor = db_instance.db[consulta["colecao"]].find(consulta["filtro"])
+        if consulta.get("ordenacao"):
+            cursor = cursor.sort(consulta["ordenacao"])
+        resultado = {
+            "nome": consulta["nome"],
+            "colecao": consulta["colecao"],
+            "indice_esperado": consulta["indice"],
+            "estagios": [],
+            "indices": [],
+            "chaves_examinadas": None,
+            "documentos_examinados": None,
+            "retornados": None,
+            "ok": False,
+            "erro": None,
+        }
+        try:
+            explain = cursor.explain()
+        except PyMongoError as e:
+            resultados.append({**resultado, "erro": str(e)})
+            continue
+        plano = explain.get("queryPlanner", {}).get("winningPlan", {})
+        estatisticas = explain.get("executionStats", {})
+        estagios = _estagios_plano(plano)
+        indices = _indices_plano(plano)
+        resultado.update({
+            "estagios": estagios,
+            "indices": indices,
+            "chaves_examinadas": estatisticas.get("totalKeysExamined"),
+            "documentos_examinados": estatisticas.get("totalDocsExamined"),
+            "retornados": estatisticas.get("nReturned"),
+        })
+        # Documentos examinados e descartados indicam parte do filtro aplicada fora do índice
+        filtro_no_indice = (
+            resultado["documentos_examinados"] is None
+            or resultado["retornados"] is None
+            or resultado["documentos_examinados"] <= resultado["retornados"]
+        )
+        resultado["ok"] = (
+            consulta["indice"] in indices
+            and "COLLSCAN" not in estagios
+            and "SORT" not in estagios
+            and filtro_no_indice
+        )
+        resultados.append(resultado)
+    return resultados
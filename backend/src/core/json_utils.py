@@ -1,5 +1,6 @@
 import json
 import os
+import threading
 from json import dumps
 def carregar_json(caminho_arquivo_json: str) -> str:
     """
@@ -17,6 +18,30 @@ def carregar_json_utf(caminho_arquivo_json: str) -> str:
     with open(caminho_arquivo_json, 'r', encoding='utf-8') as arquivo:
         return json.load(arquivo)
 
+_cache_json = {}
+_cache_json_lock = threading.Lock()
+
+
+def carregar_json_em_cache(caminho_arquivo_json: str):
+    """
+    Carrega um arquivo JSON somente-leitura (ex.: o catálogo de vulnerabilidades) com cache em
+    memória, invalidado quando o mtime ou o tamanho do arquivo mudam. O objeto retornado é
+    compartilhado entre as chamadas e não deve ser alterado.
+    """
+    caminho = os.path.abspath(caminho_arquivo_json)
+    stat = os.stat(caminho)
+    assinatura = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_json_lock:
+        em_cache = _cache_json.get(caminho)
+        if em_cache and em_cache[0] == assinatura:
+            return em_cache[1]
+
+    dados = carregar_json_utf(caminho)
+    with _cache_json_lock:
+        _cache_json[caminho] = (assinatura, dados)
+    return dados
+
 def salvar_json(caminho_arquivo_json:str, dados:str) -> None:
     """
     Função para salvar dados em um arquivo JSON.
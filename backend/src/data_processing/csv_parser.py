@@ -2,30 +2,32 @@ from collections import defaultdict
 import json
 import os
 import re
-from typing import List
+from typing import Callable, List, Optional
 import pandas as pd
 from ..core.json_utils import carregar_json_utf
 
 
-def obter_vulnerabilidades_comum_csv(csv_files: List[str]) -> dict:
+def obter_vulnerabilidades_comum_csv(csv_files: List[str], ao_ler_arquivo: Optional[Callable[[int, int], None]] = None) -> dict:
     """
     Obtém as vulnerabilidades comuns entre os arquivos CSV, agrupando-as por Name,
-    listando os hosts afetados e a severidade (Risk).
+    listando os hosts afetados e a severidade (Risk). `ao_ler_arquivo`, se informada, é
+    chamada com (arquivos lidos, total) após cada arquivo.
     """
     common_vulnerabilities = defaultdict(lambda: {"hosts": set(), "risks": set()})
 
     if not csv_files:
         return {}
-    for csv_file in csv_files:
+    for indice, csv_file in enumerate(csv_files, start=1):
         try:
             df = pd.read_csv(csv_file, usecols=['Name', 'Host', 'Risk'], encoding='utf-8', on_bad_lines='skip')
             df = df.dropna(subset=['Name', 'Host', 'Risk'])
 
-            for _, row in df.iterrows():
-                name = str(row['Name']).strip()
-                host = str(row['Host']).strip()
-                risk = str(row['Risk']).strip().lower()
+            # Colunas normalizadas de uma vez (vetorizado) em vez de iterar linha a linha com iterrows
+            nomes = df['Name'].astype(str).str.strip()
+            hosts = df['Host'].astype(str).str.strip()
+            riscos = df['Risk'].astype(str).str.strip().str.lower()
 
+            for name, host, risk in zip(nomes, hosts, riscos):
                 if risk in {'critical', 'high', 'medium', 'low'}:
                     common_vulnerabilities[name]["hosts"].add(host)
                     common_vulnerabilities[name]["risks"].add(risk)
@@ -33,6 +35,8 @@ def obter_vulnerabilidades_comum_csv(csv_files: List[str]) -> dict:
             print(f"Aviso: O arquivo CSV '{csv_file}' está vazio ou não possui dados.")
         except Exception as e:
             print(f"Erro ao processar {csv_file}: {e}")
+        if ao_ler_arquivo:
+            ao_ler_arquivo(indice, len(csv_files))
 
     return {
         name: {
@@ -19,7 +19,7 @@ import re
 from urllib.parse import urlparse, urljoin
 import glob
 import os
-from typing import List
+from typing import Callable, List, Optional
 from pathlib import Path
 
 # Importa as funções de utilidade genéricas e as funções de JSON do módulo core
@@ -73,18 +73,19 @@ def extrair_targets(json_files: List[str]) -> List[str]:
             
     return list(targets)
 
-def obter_vulnerabilidades_comum(json_files: List[str]) -> dict:
+def obter_vulnerabilidades_comum(json_files: List[str], ao_ler_arquivo: Optional[Callable[[int, int], None]] = None) -> dict:
     """
     Obtém as vulnerabilidades comuns entre os arquivos JSON, agrupando-as por nome e plugin_id.
 
     Parâmetros:
     - json_files (List[str]): Lista com os caminhos dos arquivos JSON.
+    - ao_ler_arquivo (callable, opcional): Chamada com (arquivos lidos, total) após cada arquivo.
 
     Retorna:
     - dict: Dicionário com vulnerabilidades agrupadas por (nome, plugin_id) e as URIs afetadas.
     """
     common_vulnerabilities = defaultdict(list)
-    for json_file in json_files:
+    for indice, json_file in enumerate(json_files, start=1):
         data = carregar_json(json_file)
         target = data.get('scan', {}).get('target', 'Não disponível')
         
@@ -96,6 +97,8 @@ def obter_vulnerabilidades_comum(json_files: List[str]) -> dict:
             if "info" not in risk_factor:
                 formatted_uri = formatar_uri(target, uri)
                 common_vulnerabilities[(name, plugin_id)].append(formatted_uri)
+        if ao_ler_arquivo:
+            ao_ler_arquivo(indice, len(json_files))
     return common_vulnerabilities
 
 def extrair_dominio(target: str) -> str:
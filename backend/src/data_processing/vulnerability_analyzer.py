@@ -3,6 +3,7 @@ import json
 from collections import defaultdict
 import sys
 import os
+from typing import Callable, Optional
 
 # Importa as funções de parsing do json_parser e csv_parser
 from .json_parser import localizar_arquivos, extrair_targets, obter_vulnerabilidades_comum, contar_vulnerabilidades, extrair_dados_vulnerabilidades
@@ -14,6 +15,7 @@ from ..report_generation.report_builder import gerar_relatorio_txt, gerar_relato
 
 # Importa a função de verificação de ausências do core.utils
 from ..core.utils import verificar_e_salvar_vulnerabilidades_ausentes
+from ..core.json_utils import carregar_json
 # Importa a classe Config
 from ..core.config import Config
 
@@ -21,13 +23,18 @@ from ..core.config import Config
 config = Config("config.json") # config.json está em AudiTex/backend/
 
 
-def processar_relatorio_json(caminho_arquivos_json: str, caminho_salvar_relatorio_preprocessado: str) -> None:
+def processar_relatorio_json(
+    caminho_arquivos_json: str,
+    caminho_salvar_relatorio_preprocessado: str,
+    ao_progredir: Optional[Callable[[int, int], None]] = None
+) -> None:
     """
     Função que encontra os arquivos JSON de relatórios, conta as vulnerabilidades e gera o relatório TXT e LaTeX.
     
     Parâmetros:
     - caminho_arquivos_json (str): Caminho para o diretório onde os arquivos JSON dos scans web app estão.
     - caminho_salvar_relatorio_preprocessado (str): Caminho para o diretório onde os relatórios TXT e LaTeX pré-processados serão salvos.
+    - ao_progredir (callable, opcional): Chamada com (arquivos de scan processados, total) durante o agrupamento das vulnerabilidades.
     """
     caminhos_relatorios_json = localizar_arquivos(caminho_arquivos_json, "json")
 
@@ -36,7 +43,7 @@ def processar_relatorio_json(caminho_arquivos_json: str, caminho_salvar_relatori
         quantidade_vulnerabilidades_por_risco = contar_vulnerabilidades(caminhos_relatorios_json)
 
         # Obter vulnerabilidades comuns entre sites
-        vulnerabilidades_comuns = obter_vulnerabilidades_comum(caminhos_relatorios_json)
+        vulnerabilidades_comuns = obter_vulnerabilidades_comum(caminhos_relatorios_json, ao_progredir)
 
         # Obter Vulnerabilidades não categorizadas
         nome_arquivo_ausentes = "vulnerabilidades_sites_ausentes.txt"
@@ -73,18 +80,23 @@ def processar_relatorio_json(caminho_arquivos_json: str, caminho_salvar_relatori
             caminho_descritivo_webapp # Descritivo de categorias/subcategorias
         )
 
-def processar_relatorio_csv(caminho_arquivos_csv: str, caminho_salvar_relatorio_preprocessado: str) -> None:
+def processar_relatorio_csv(
+    caminho_arquivos_csv: str,
+    caminho_salvar_relatorio_preprocessado: str,
+    ao_progredir: Optional[Callable[[int, int], None]] = None
+) -> None:
     """
     Função que encontra os arquivos CSV de relatórios, conta as vulnerabilidades e gera o relatório TXT e LaTeX.
     
     Parâmetros:
     - caminho_arquivos_csv (str): Caminho para o diretório onde os arquivos CSV dos scans de servidores estão.
     - caminho_salvar_relatorio_preprocessado (str): Caminho para o diretório onde os relatórios TXT e LaTeX pré-processados serão salvos.
+    - ao_progredir (callable, opcional): Chamada com (arquivos CSV processados, total) durante o agrupamento das vulnerabilidades.
     """
     caminhos_relatorios_csv = localizar_arquivos(caminho_arquivos_csv, "csv")
     if caminhos_relatorios_csv:
         # Obter vulnerabilidades comuns entre hosts
-        vulnerabilidades_comuns_csv = obter_vulnerabilidades_comum_csv(caminhos_relatorios_csv)
+        vulnerabilidades_comuns_csv = obter_vulnerabilidades_comum_csv(caminhos_relatorios_csv, ao_progredir)
         
         # Obter Vulnerabilidades não categorizadas
         nome_arquivo_ausentes = "vulnerabilidades_servidores_ausentes.txt"
@@ -124,7 +136,7 @@ def processar_relatorio_csv(caminho_arquivos_csv: str, caminho_salvar_relatorio_
             caminho_descritivo_servers # Descritivo de categorias/subcategorias
         )
 
-def extrair_quantidades_vulnerabilidades_por_site(output_path: str, caminhos_json_scans: str) -> None:
+def extrair_quantidades_vulnerabilidades_por_site(output_path: str, caminhos_json_scans: str) -> list:
     """
     Extrai dados de vulnerabilidades por site a partir de arquivos JSON,
     organiza os dados e gera um relatório no formato CSV.
@@ -132,6 +144,9 @@ def extrair_quantidades_vulnerabilidades_por_site(output_path: str, caminhos_jso
     Parâmetros:
     - output_path (str): Caminho para salvar o arquivo CSV de vulnerabilidades agrupadas por site.
     - caminhos_json_scans (str): Caminho para o diretório contendo os arquivos JSON dos scans web app.
+
+    Retorno:
+    - list: As linhas gravadas no CSV (ordenadas pelo total), para uso direto nos gráficos.
     """
     try:
         files = localizar_arquivos(caminhos_json_scans, "json")
@@ -161,6 +176,66 @@ def extrair_quantidades_vulnerabilidades_por_site(output_path: str, caminhos_jso
                 writer.writerow(row)
 
         print(f"Relatório de vulnerabilidades agrupadas por site gerado com sucesso em: {output_path}")
+        return sorted_rows
 
     except Exception as e:
-        print(f"Erro ao extrair dados para o CSV de vulnerabilidades por site: {e}")
\ No newline at end of file
+        print(f"Erro ao extrair dados para o CSV de vulnerabilidades por site: {e}")
+        return []
+
+def extrair_modelo_webapp(caminho_arquivos_json: str) -> dict:
+    """
+    Lê os scans de Web App e devolve, em memória, os mesmos dados que `processar_relatorio_json`
+    grava nos arquivos preprocessados: contagem por risco, sites, vulnerabilidades comuns (no
+    formato de `carregar_vulnerabilidades_do_relatorio`) e totais por site. Nada é gravado em disco.
+    """
+    caminhos_relatorios_json = localizar_arquivos(caminho_arquivos_json, "json")
+    if not caminhos_relatorios_json:
+        return {}
+
+    vulnerabilidades_comuns = obter_vulnerabilidades_comum(caminhos_relatorios_json)
+    vulnerabilidades = []
+    # Mesma ordem do TXT gerado por gerar_relatorio_txt: mais URIs afetadas primeiro
+    for (nome, _plugin_id), uris in sorted(vulnerabilidades_comuns.items(), key=lambda x: len(set(x[1])), reverse=True):
+        vulnerabilidades.append({"Vulnerabilidade": nome, "URI Afetadas": sorted(set(uris))})
+
+    por_site = []
+    for caminho in caminhos_relatorios_json:
+        dados_site = extrair_dados_vulnerabilidades(carregar_json(caminho))
+        if dados_site:
+            por_site.append(dados_site)
+
+    return {
+        "contagem_riscos": contar_vulnerabilidades(caminhos_relatorios_json),
+        "alvos": extrair_targets(caminhos_relatorios_json),
+        "vulnerabilidades": vulnerabilidades,
+        "por_site": sorted(por_site, key=lambda x: x['Total'], reverse=True),
+    }
+
+
+def extrair_modelo_servidores(caminho_arquivos_csv: str) -> dict:
+    """
+    Lê os scans de Servidores e devolve, em memória, os mesmos dados que `processar_relatorio_csv`
+    grava nos arquivos preprocessados (vulnerabilidades no formato de
+    `carregar_vulnerabilidades_do_relatorio_csv`). Nada é gravado em disco.
+    """
+    caminhos_relatorios_csv = localizar_arquivos(caminho_arquivos_csv, "csv")
+    if not caminhos_relatorios_csv:
+        return {}
+
+    vulnerabilidades_comuns_csv = obter_vulnerabilidades_comum_csv(caminhos_relatorios_csv)
+    vulnerabilidades = []
+    # Mesma ordem do TXT gerado por gerar_relatorio_txt_csv: mais hosts afetados primeiro
+    for nome, dados in sorted(vulnerabilidades_comuns_csv.items(), key=lambda item: len(item[1]['hosts']), reverse=True):
+        hosts_afetados = sorted(dados['hosts'])
+        vulnerabilidades.append({
+            "Vulnerabilidade": nome,
+            "Severidade": ", ".join(sorted(dados['risks'])),
+            "Total de Hosts Afetados": len(hosts_afetados),
+            "Hosts": hosts_afetados,
+        })
+
+    return {
+        "contagem_riscos": contar_vulnerabilidades_csv(vulnerabilidades_comuns_csv),
+        "alvos": extrair_hosts_csv(caminhos_relatorios_csv),
+        "vulnerabilidades": vulnerabilidades,
+    }
@@ -3,6 +3,7 @@
 from flask import Flask
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
+from pymongo.errors import PyMongoError
 import os
 
 # Importações dos módulos core
@@ -19,6 +20,12 @@ from .routes.api_key_manager import api_keys_bp
 from .routes.auth import auth_bp
 from .routes.users import users_bp
 from .routes.logs import logs_bp 
+from .core.config import Config
+from .core.indexes import garantir_indices
+from .report_generation.report_jobs import recuperar_jobs_interrompidos
+
+config = Config("config.json")
+
 # Inicializa a aplicação Flask
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'uma-chave-secreta-muito-dificil-de-adivinhar'
@@ -38,6 +45,20 @@ app.register_blueprint(auth_bp)
 app.register_blueprint(users_bp)
 app.register_blueprint(logs_bp)
 
+# Índices das coleções (idempotente: só cria os que ainda não existem)
+if config.criar_indices_na_inicializacao:
+    try:
+        garantir_indices()
+    except PyMongoError as e:
+        # Sem o banco a aplicação ainda sobe; os índices podem ser criados depois com garantir_indices.py
+        print(f"Aviso: não foi possível verificar os índices do MongoDB: {e}")
+
+# Relatórios deixados na fila ou em execução por um processo anterior (a fila de jobs só existe em memória)
+try:
+    recuperar_jobs_interrompidos()
+except PyMongoError as e:
+    print(f"Aviso: não foi possível verificar as gerações de relatório interrompidas: {e}")
+
 # Define o caminho para a pasta de imagens estáticas para os relatórios
 images_folder_path = os.path.join(
     os.path.dirname(os.path.abspath(__file__)), 
@@ -0,0 +1,20 @@
+# backend/src/report_generation/cancellation.py
+
+import threading
+from typing import Optional
+
+
+class TarefaCancelada(Exception):
+    """
+    A geração foi cancelada (a pedido do usuário ou por exceder o prazo do job) e deve ser
+    interrompida no próximo ponto de verificação.
+    """
+
+
+def verificar_cancelamento(cancelado: Optional[threading.Event]) -> None:
+    """
+    Lança `TarefaCancelada` se o evento de cancelamento da geração estiver sinalizado.
+    Chamada nos pontos de verificação: a cada arquivo de scan lido, a cada estágio e a cada passada do compilador.
+    """
+    if cancelado is not None and cancelado.is_set():
+        raise TarefaCancelada("Geração do relatório cancelada.")
@@ -0,0 +1,112 @@
+# backend/src/report_generation/chart_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import matplotlib
+
+from ..core.config import Config
+
+config = Config("config.json")
+
+# Incrementar sempre que o desenho de algum gráfico mudar (cores, tamanhos, rótulos), para invalidar o cache.
+VERSAO_GRAFICOS = 1
+
+
+def chave_grafico(tipo_grafico: str, dados: Any, parametros: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Calcula a chave de cache de um gráfico a partir do tipo, dos dados de entrada e dos
+    parâmetros de renderização (serializados em JSON com chaves ordenadas), da versão dos
+    gráficos e da versão do matplotlib. `dados` pode ser um dicionário, uma lista ou bytes
+    (o conteúdo de um CSV, por exemplo). Retorna None se o cache estiver desabilitado.
+    """
+    if not config.caminho_cache_graficos:
+        return None
+    digest = hashlib.sha256()
+    digest.update(f"{VERSAO_GRAFICOS}\0{matplotlib.__version__}\0{tipo_grafico}\0".encode('utf-8'))
+    digest.update(json.dumps(parametros or {}, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(b"\0")
+    if isinstance(dados, bytes):
+        digest.update(dados)
+    else:
+        digest.update(json.dumps(dados, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _caminho_no_cache(chave: str, extensao: str) -> Path:
+    return Path(config.caminho_cache_graficos) / chave[:2] / f"{chave}{extensao}"
+
+
+def restaurar_grafico(chave: Optional[str], caminho_saida: str) -> bool:
+    """
+    Se o gráfico estiver no cache, coloca-o em `caminho_saida` (hardlink, com fallback para
+    cópia, sempre trocado via os.replace) e retorna True.
+    """
+    if not chave:
+        return False
+    caminho_cache = _caminho_no_cache(chave, os.path.splitext(caminho_saida)[1])
+    if not caminho_cache.is_file():
+        return False
+    try:
+        # Atualiza o mtime: é ele que define a ordem de remoção (LRU)
+        os.utime(caminho_cache)
+        os.makedirs(os.path.dirname(caminho_saida) or ".", exist_ok=True)
+        base, extensao = os.path.splitext(caminho_saida)
+        caminho_temporario = f"{base}.{os.getpid()}.tmp{extensao}"
+        try:
+            os.link(caminho_cache, caminho_temporario)
+        except OSError:
+            shutil.copy2(caminho_cache, caminho_temporario)
+        os.replace(caminho_temporario, caminho_saida)
+        return True
+    except OSError as e:
+        print(f"Aviso: não foi possível restaurar o gráfico do cache '{caminho_cache}': {e}")
+        return False
+
+
+def armazenar_grafico(chave: Optional[str], caminho_saida: str) -> None:
+    """
+    Copia o gráfico recém-renderizado para o cache e aplica o limite de tamanho (`tamanho_max_cache_graficos_mb`).
+    """
+    if not chave or not os.path.isfile(caminho_saida):
+        return
+    caminho_cache = _caminho_no_cache(chave, os.path.splitext(caminho_saida)[1])
+    try:
+        caminho_cache.parent.mkdir(parents=True, exist_ok=True)
+        caminho_temporario = caminho_cache.with_name(f"{caminho_cache.name}.{os.getpid()}.tmp")
+        shutil.copy2(caminho_saida, caminho_temporario)
+        os.replace(caminho_temporario, caminho_cache)
+    except OSError as e:
+        print(f"Aviso: não foi possível gravar o gráfico no cache '{caminho_cache}': {e}")
+        return
+    _aplicar_limite_cache()
+
+
+def _aplicar_limite_cache() -> None:
+    """
+    Remove os gráficos usados há mais tempo (menor mtime) até o cache caber no limite configurado.
+    """
+    limite_bytes = config.tamanho_max_cache_graficos_mb * 1024 * 1024
+    entradas = []
+    for caminho in Path(config.caminho_cache_graficos).glob("*/*"):
+        if caminho.name.endswith(".tmp"):
+            continue
+        try:
+            stat = caminho.stat()
+        except OSError:
+            continue
+        entradas.append((stat.st_mtime, stat.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        try:
+            caminho.unlink()
+            total -= tamanho
+        except OSError:
+            pass
@@ -0,0 +1,221 @@
+# backend/src/report_generation/compile_executor.py
+
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+try:
+    import resource  # só para detectar uma plataforma com rlimits (o `sh` aplica os limites)
+except ImportError:  # Windows: sem rlimits
+    resource = None
+
+from ..core.config import Config
+from .cancellation import TarefaCancelada, verificar_cancelamento
+
+config = Config("config.json")
+
+
+class TempoCompilacaoEsgotado(Exception):
+    """
+    A compilação excedeu o tempo limite (`tempo_limite_compilacao`) e o grupo de processos foi encerrado.
+    """
+
+
+# Quantas linhas finais da saída de cada processo ficam em memória (o restante só passa pelo callback)
+_LINHAS_SAIDA_RETIDAS = 200
+
+# Intervalo entre as verificações do pedido de cancelamento enquanto o processo roda ou aguarda uma vaga
+_INTERVALO_VERIFICACAO_CANCELAMENTO = 0.2
+
+_max_simultaneas = config.max_compilacoes_simultaneas or os.cpu_count() or 1
+_semaforo = threading.BoundedSemaphore(_max_simultaneas)
+
+_metricas_lock = threading.Lock()
+_metricas: Dict[str, Any] = {
+    "aguardando": 0,
+    "em_execucao": 0,
+    "concluidas": 0,
+    "tempos_esgotados": 0,
+    "espera_total_segundos": 0.0,
+    "espera_maxima_segundos": 0.0,
+    "ultima_espera_segundos": 0.0,
+}
+
+
+def _com_limites_recursos(command: List[str], env: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Prefixa o comando com um `sh` que aplica os limites de memória (`ulimit -v`, RLIMIT_AS) e de
+    tempo de CPU (`ulimit -t`, RLIMIT_CPU) e então faz exec do comando, que mantém o mesmo PID e
+    grupo de processos. Os limites não são aplicados com `preexec_fn` porque ele não é seguro em
+    processos com threads (os pools de jobs, estágios e lotes), onde o filho pode travar antes do exec.
+
+    Como o `sh` sempre existe, um comando ausente no PATH terminaria com o código 127 em vez de
+    falhar no Popen; por isso ele é procurado antes e `FileNotFoundError` é levantada, como no Popen.
+    """
+    if resource is None:
+        return command
+    limites = []
+    if config.limite_memoria_compilacao_mb > 0:
+        limites.append(f"ulimit -v {config.limite_memoria_compilacao_mb * 1024}")
+    if config.limite_cpu_compilacao_segundos > 0:
+        limites.append(f"ulimit -t {config.limite_cpu_compilacao_segundos}")
+    if not limites:
+        return command
+    caminho_busca = (env if env is not None else os.environ).get("PATH", os.defpath)
+    if shutil.which(command[0], path=caminho_busca) is None:
+        raise FileNotFoundError(2, "No such file or directory", command[0])
+    return ["sh", "-c", " && ".join(limites) + ' && exec "$@"', "sh"] + list(command)
+
+
+@contextmanager
+def vaga_compilacao(cancelado: Optional[threading.Event] = None) -> Iterator[float]:
+    """
+    Reserva uma das `max_compilacoes_simultaneas` vagas de compilação, aguardando na fila
+    se todas estiverem ocupadas. Retorna o prazo final (time.monotonic) do job, calculado
+    a partir de `tempo_limite_compilacao` no momento em que a vaga é obtida.
+
+    Se `cancelado` for sinalizado enquanto aguarda na fila, desiste da vaga e levanta `TarefaCancelada`.
+    """
+    inicio_espera = time.monotonic()
+    with _metricas_lock:
+        _metricas["aguardando"] += 1
+    try:
+        verificar_cancelamento(cancelado)
+        while not _semaforo.acquire(timeout=_INTERVALO_VERIFICACAO_CANCELAMENTO):
+            verificar_cancelamento(cancelado)
+    except TarefaCancelada:
+        with _metricas_lock:
+            _metricas["aguardando"] -= 1
+        raise
+    espera = time.monotonic() - inicio_espera
+    with _metricas_lock:
+        _metricas["aguardando"] -= 1
+        _metricas["em_execucao"] += 1
+        _metricas["espera_total_segundos"] += espera
+        _metricas["espera_maxima_segundos"] = max(_metricas["espera_maxima_segundos"], espera)
+        _metricas["ultima_espera_segundos"] = espera
+    if espera >= 1:
+        print(f"Compilação aguardou {espera:.1f}s na fila por uma vaga livre.")
+    try:
+        yield time.monotonic() + config.tempo_limite_compilacao
+    finally:
+        with _metricas_lock:
+            _metricas["em_execucao"] -= 1
+            _metricas["concluidas"] += 1
+        _semaforo.release()
+
+
+def executar_processo(
+    command: List[str],
+    cwd: str,
+    prazo: Optional[float] = None,
+    env: Optional[Dict[str, str]] = None,
+    ao_ler_linha: Optional[Callable[[str], bool]] = None,
+    cancelado: Optional[threading.Event] = None
+) -> subprocess.CompletedProcess:
+    """
+    Executa um comando de compilação em um novo grupo de processos, com os rlimits configurados.
+
+    A saída (stdout e stderr combinados) é lida linha a linha: cada linha é entregue a
+    `ao_ler_linha`, que pode retornar True para interromper o processo (fail-fast). Apenas as
+    últimas `_LINHAS_SAIDA_RETIDAS` linhas ficam em `stdout` do resultado.
+
+    Se `prazo` (time.monotonic) for atingido, o grupo inteiro (pdflatex e filhos, como o
+    latexmk ou o bibtex) recebe SIGKILL e `TempoCompilacaoEsgotado` é lançada. Da mesma forma,
+    se `cancelado` for sinalizado (cancelamento da geração), o grupo é encerrado e
+    `TarefaCancelada` é lançada.
+    """
+    verificar_cancelamento(cancelado)
+    tempo_restante = None
+    if prazo is not None:
+        tempo_restante = prazo - time.monotonic()
+        if tempo_restante <= 0:
+            raise TempoCompilacaoEsgotado("Tempo limite de compilação atingido antes de iniciar o processo.")
+
+    processo = subprocess.Popen(
+        _com_limites_recursos(command, env),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        encoding='latin-1',
+        cwd=cwd,
+        env=env,
+        start_new_session=True
+    )
+
+    esgotado = threading.Event()
+
+    def ao_esgotar_prazo() -> None:
+        esgotado.set()
+        _encerrar_grupo(processo)
+
+    vigia = threading.Timer(tempo_restante, ao_esgotar_prazo) if tempo_restante is not None else None
+    if vigia:
+        vigia.daemon = True
+        vigia.start()
+
+    interrompido = threading.Event()
+
+    def vigiar_cancelamento() -> None:
+        while processo.poll() is None:
+            if cancelado.wait(_INTERVALO_VERIFICACAO_CANCELAMENTO):
+                interrompido.set()
+                _encerrar_grupo(processo)
+                return
+
+    if cancelado is not None:
+        threading.Thread(target=vigiar_cancelamento, name="vigia-cancelamento", daemon=True).start()
+
+    ultimas_linhas: Deque[str] = deque(maxlen=_LINHAS_SAIDA_RETIDAS)
+    try:
+        for linha in processo.stdout:
+            ultimas_linhas.append(linha)
+            if ao_ler_linha is not None and ao_ler_linha(linha.rstrip("\n")):
+                _encerrar_grupo(processo)
+                break
+        processo.stdout.close()
+        processo.wait()
+    except BaseException:
+        _encerrar_grupo(processo)
+        processo.wait()
+        raise
+    finally:
+        if vigia:
+            vigia.cancel()
+
+    if interrompido.is_set():
+        raise TarefaCancelada("Compilação interrompida: geração do relatório cancelada.")
+    if esgotado.is_set():
+        with _metricas_lock:
+            _metricas["tempos_esgotados"] += 1
+        raise TempoCompilacaoEsgotado(
+            f"Compilação excedeu o tempo limite de {config.tempo_limite_compilacao}s e foi interrompida."
+        )
+    return subprocess.CompletedProcess(command, processo.returncode, "".join(ultimas_linhas), "")
+
+
+def _encerrar_grupo(processo: subprocess.Popen) -> None:
+    try:
+        os.killpg(processo.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, AttributeError):
+        processo.kill()
+
+
+def status_executor() -> Dict[str, Any]:
+    """
+    Retorna um retrato das métricas do executor (fila, vagas em uso e tempos de espera).
+    """
+    with _metricas_lock:
+        status = dict(_metricas)
+    concluidas_ou_em_execucao = status["concluidas"] + status["em_execucao"]
+    status["espera_media_segundos"] = (
+        status["espera_total_segundos"] / concluidas_ou_em_execucao if concluidas_ou_em_execucao else 0.0
+    )
+    status["max_simultaneas"] = _max_simultaneas
+    status["tempo_limite_segundos"] = config.tempo_limite_compilacao
+    return status
@@ -0,0 +1,97 @@
+# backend/src/report_generation/fragment_cache.py
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from cachetools import LRUCache
+
+from ..core.config import Config
+
+config = Config("config.json")
+
+# Incrementar sempre que o formato do fragmento renderizado mudar, para invalidar o cache em disco.
+_VERSAO_FRAGMENTO = 1
+
+_cache_memoria: LRUCache = LRUCache(maxsize=config.tamanho_cache_fragmentos)
+_cache_lock = threading.Lock()
+
+
+def chave_entrada_catalogo(entrada: Dict[str, Any]) -> str:
+    """
+    Calcula a chave do fragmento de uma entrada do catálogo de vulnerabilidades
+    a partir do hash do conteúdo que aparece no fragmento (nome, Descrição, Solução e Imagem).
+    """
+    campos = [
+        _VERSAO_FRAGMENTO,
+        entrada.get("Vulnerabilidade", ""),
+        entrada.get("Descrição", "Descrição não disponível."),
+        entrada.get("Solução", "Solução não disponível."),
+        entrada.get("Imagem", ""),
+    ]
+    return hashlib.sha256(json.dumps(campos, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _caminho_em_disco(chave: str) -> Optional[str]:
+    if not config.caminho_cache_fragmentos:
+        return None
+    return os.path.join(config.caminho_cache_fragmentos, chave[:2], f"{chave}.tex")
+
+
+def obter_fragmento(chave: str, renderizar: Callable[[], str]) -> str:
+    """
+    Retorna o fragmento LaTeX em cache para `chave`, procurando primeiro na memória (LRU)
+    e depois em disco (se `caminho_cache_fragmentos` estiver configurado). Em caso de
+    ausência, chama `renderizar` e guarda o resultado nos dois níveis.
+    """
+    with _cache_lock:
+        fragmento = _cache_memoria.get(chave)
+    if fragmento is not None:
+        return fragmento
+
+    caminho = _caminho_em_disco(chave)
+    if caminho and os.path.exists(caminho):
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                fragmento = f.read()
+        except OSError as e:
+            print(f"Aviso: não foi possível ler o fragmento em cache '{caminho}': {e}")
+
+    if fragmento is None:
+        fragmento = renderizar()
+        if caminho:
+            try:
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                # Único por thread: estágios, lotes e jobs do mesmo processo podem gravar o mesmo fragmento ao mesmo tempo
+                caminho_temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(caminho_temporario, 'w', encoding='utf-8') as f:
+                    f.write(fragmento)
+                os.replace(caminho_temporario, caminho)
+            except OSError as e:
+                print(f"Aviso: não foi possível gravar o fragmento em cache '{caminho}': {e}")
+
+    with _cache_lock:
+        _cache_memoria[chave] = fragmento
+    return fragmento
+
+
+def invalidar_fragmento(entrada: Optional[Dict[str, Any]]) -> None:
+    """
+    Remove do cache (memória e disco) o fragmento de uma entrada do catálogo.
+
+    Como a chave é o hash do conteúdo, uma entrada editada já gera uma chave nova;
+    esta função apenas descarta imediatamente o fragmento da versão anterior.
+    """
+    if not entrada:
+        return
+    chave = chave_entrada_catalogo(entrada)
+    with _cache_lock:
+        _cache_memoria.pop(chave, None)
+    caminho = _caminho_em_disco(chave)
+    if caminho and os.path.exists(caminho):
+        try:
+            os.remove(caminho)
+        except OSError as e:
+            print(f"Aviso: não foi possível remover o fragmento em cache '{caminho}': {e}")
@@ -0,0 +1,228 @@
+# backend/src/report_generation/html_preview.py
+
+import io
+import math
+import threading
+from html import escape
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from cachetools import LRUCache
+
+from ..core.config import Config
+from ..core.json_utils import carregar_json_em_cache
+from .report_builder import agrupar_vulnerabilidades
+
+config = Config("config.json")
+
+# Ordem e cores das severidades nos gráficos (as mesmas dos donuts do PDF)
+_SEVERIDADES = (
+    ("Critical", "Crítica", "#8B0000"),
+    ("High", "Alta", "#FF3030"),
+    ("Medium", "Média", "#FFE066"),
+    ("Low", "Baixa", "#87F1FF"),
+)
+
+# Quantos sites aparecem no gráfico de vulnerabilidades por site
+_MAX_SITES_GRAFICO = 20
+
+# Seções já montadas por lista e versão dos dados (ver `obter_secoes_preview`)
+_cache_secoes: LRUCache = LRUCache(maxsize=max(1, config.tamanho_cache_preview))
+_cache_secoes_lock = threading.Lock()
+
+_ESTILO = """
+body { font-family: Helvetica, Arial, sans-serif; color: #222; margin: 2em auto; max-width: 60em; line-height: 1.4; }
+h1 { color: #007BB4; } h2 { border-bottom: 2px solid #007BB4; padding-bottom: .2em; }
+h3 { color: #005f87; margin-top: 1.5em; } h4, h5 { margin-bottom: .3em; } h5 { font-size: 1em; }
+.aviso { background: #fff4e5; border-left: 4px solid #FFA500; padding: .5em 1em; }
+.vulnerabilidade { border: 1px solid #ddd; border-radius: 4px; padding: .5em 1em; margin: .8em 0; }
+.rotulo { font-weight: bold; } .imagem { color: #666; font-size: .85em; }
+.instancias { columns: 3; font-size: .85em; word-break: break-all; }
+.grafico { margin: 1em 0; } .barra-linha { display: flex; align-items: center; margin: 2px 0; font-size: .85em; }
+.barra-nome { width: 16em; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; }
+.barra { display: flex; height: 1.1em; } .barra span { display: block; height: 100%; }
+.barra-total { margin-left: .5em; } .legenda span { display: inline-block; width: .8em; height: .8em; margin: 0 .3em 0 1em; }
+.paginacao { text-align: center; color: #666; margin: 2em 0; }
+"""
+
+
+def montar_secao_preview(
+    titulo: str,
+    tipo_vulnerabilidade: str,
+    modelo: Dict[str, Any],
+    caminho_detalhes_json: str,
+    caminho_descritivo_json: str
+) -> Dict[str, Any]:
+    """
+    Agrupa as vulnerabilidades de um modelo extraído dos scans (ver `extrair_modelo_webapp` e
+    `extrair_modelo_servidores`) com o catálogo atual, do mesmo jeito que o conteúdo LaTeX.
+    """
+    categorias, sem_categoria = agrupar_vulnerabilidades(
+        modelo.get("vulnerabilidades", []),
+        carregar_json_em_cache(caminho_detalhes_json),
+        carregar_json_em_cache(caminho_descritivo_json),
+        tipo_vulnerabilidade
+    )
+    return {
+        "titulo": titulo,
+        "tipo": tipo_vulnerabilidade,
+        "modelo": modelo,
+        "categorias": categorias,
+        "sem_categoria": sem_categoria,
+    }
+
+
+def obter_secoes_preview(chave: str, montar: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Retorna as seções da pré-visualização em cache para `chave` (a lista e a impressão digital
+    dos seus dados, ver `fingerprint_dados`) ou as monta com `montar`, que lê todos os scans.
+    Assim só a primeira página de uma lista paga a leitura dos scans; as demais apenas paginam.
+    As seções retornadas são compartilhadas entre as requisições e não devem ser alteradas.
+    """
+    with _cache_secoes_lock:
+        secoes = _cache_secoes.get(chave)
+    if secoes is None:
+        secoes = montar()
+        with _cache_secoes_lock:
+            _cache_secoes[chave] = secoes
+    return secoes
+
+
+def _paginar(secoes: List[Dict[str, Any]], pagina: int, por_pagina: int) -> Tuple[List[tuple], int, int]:
+    """
+    Divide as vulnerabilidades de todas as seções em páginas de `por_pagina` itens, mantendo a
+    ordem do documento. Retorna os itens da página pedida (limitada ao intervalo válido) como
+    tuplas (seção, categoria, subcategoria, vulnerabilidade), o número da página e o total de páginas.
+    """
+    itens = [
+        (secao, categoria, subcategoria, vulnerabilidade)
+        for secao in secoes
+        for categoria in secao["categorias"]
+        for subcategoria in categoria["subcategorias"]
+        for vulnerabilidade in subcategoria["vulnerabilidades"]
+    ]
+    total_paginas = max(1, math.ceil(len(itens) / por_pagina))
+    pagina = min(max(1, pagina), total_paginas)
+    inicio = (pagina - 1) * por_pagina
+    return itens[inicio:inicio + por_pagina], pagina, total_paginas
+
+
+def _escrever_grafico_severidades(escrever, contagem: Dict[str, int]) -> None:
+    contagem = {chave.capitalize(): int(valor) for chave, valor in contagem.items()}
+    total = sum(contagem.values())
+    escrever('<div class="grafico"><div class="barra-linha"><div class="barra" style="width: 100%">')
+    for chave, _nome, cor in _SEVERIDADES:
+        if total and contagem.get(chave):
+            escrever(f'<span style="width: {100 * contagem[chave] / total:.2f}%; background: {cor}"></span>')
+    escrever('</div></div><div class="legenda">')
+    for chave, nome, cor in _SEVERIDADES:
+        escrever(f'<span style="background: {cor}"></span>{nome}: {contagem.get(chave, 0)}')
+    escrever(f' &mdash; <b>Total: {total}</b></div></div>\n')
+
+
+def _escrever_grafico_por_site(escrever, por_site: List[Dict[str, Any]]) -> None:
+    sites = por_site[:_MAX_SITES_GRAFICO]
+    maior_total = max((site["Total"] for site in sites), default=0)
+    if not maior_total:
+        return
+    escrever(f'<h4>Total de vulnerabilidades por site ({len(sites)} de {len(por_site)})</h4><div class="grafico">\n')
+    for site in sites:
+        escrever(f'<div class="barra-linha"><div class="barra-nome" title="{escape(site["Site"])}">{escape(site["Site"])}</div>')
+        escrever(f'<div class="barra" style="width: {60 * site["Total"] / maior_total:.2f}%">')
+        for chave, _nome, cor in _SEVERIDADES:
+            if site.get(chave):
+                escrever(f'<span style="flex: {site[chave]}; background: {cor}"></span>')
+        escrever(f'</div><div class="barra-total">{site["Total"]}</div></div>\n')
+    escrever('</div>\n')
+
+
+def _escrever_resumo(escrever, secao: Dict[str, Any]) -> None:
+    modelo = secao["modelo"]
+    rotulo_alvos = "Sites analisados" if secao["tipo"] == "webapp" else "Hosts analisados"
+    escrever(f'<h2>{escape(secao["titulo"])}</h2>\n')
+    escrever(f'<p><span class="rotulo">{rotulo_alvos}:</span> {len(modelo.get("alvos", []))}</p>\n')
+    _escrever_grafico_severidades(escrever, modelo.get("contagem_riscos", {}))
+    if modelo.get("por_site"):
+        _escrever_grafico_por_site(escrever, modelo["por_site"])
+    if secao["sem_categoria"]:
+        escrever(f'<div class="aviso"><p><b>{len(secao["sem_categoria"])} vulnerabilidade(s) sem cadastro no catálogo</b> '
+                 '(não entram no relatório):</p><ul>')
+        for nome in secao["sem_categoria"]:
+            escrever(f'<li>{escape(nome)}</li>')
+        escrever('</ul></div>\n')
+
+
+def _escrever_vulnerabilidade(escrever, v: Dict[str, Any], tipo_vulnerabilidade: str) -> None:
+    if tipo_vulnerabilidade == "webapp":
+        instancias = v.get("URIs Afetadas", [])
+        total, rotulo = v.get("Total de URIs Afetadas", 0), "URIs Afetadas"
+    else:
+        instancias = v.get("Hosts Afetados", [])
+        total, rotulo = v.get("Total de Hosts Afetados", 0), "Hosts Afetados"
+
+    escrever(f'<div class="vulnerabilidade"><h5>{escape(v["Vulnerabilidade"])}</h5>\n')
+    if v.get("Imagem"):
+        escrever(f'<p class="imagem">Imagem: {escape(v["Imagem"])}</p>\n')
+    escrever(f'<p><span class="rotulo">Descrição:</span> {escape(v["Descricao"])}</p>\n')
+    escrever(f'<p><span class="rotulo">Solução:</span> {escape(v["Solucao"])}</p>\n')
+    escrever(f'<p><span class="rotulo">Total de {rotulo}:</span> {total}</p>\n')
+    if instancias:
+        amostra = instancias[:config.amostra_instancias_anexo]
+        escrever(f'<details><summary>{rotulo} ({len(amostra)} de {len(instancias)})</summary><ul class="instancias">')
+        for instancia in amostra:
+            escrever(f'<li>{escape(instancia)}</li>')
+        escrever('</ul></details>\n')
+    escrever('</div>\n')
+
+
+def gerar_preview_html(
+    secoes: List[Dict[str, Any]],
+    pagina: int = 1,
+    por_pagina: Optional[int] = None,
+    titulo: str = "Pré-visualização do relatório",
+    saida: Optional[TextIO] = None
+) -> Tuple[str, int, int]:
+    """
+    Renderiza uma página da pré-visualização HTML do relatório, sem passar pelo LaTeX.
+
+    A primeira página traz o resumo de cada seção (totais, gráficos por severidade e por site e
+    as vulnerabilidades sem cadastro); as vulnerabilidades são distribuídas em páginas de
+    `por_pagina` itens (padrão `vulnerabilidades_por_pagina_preview`), repetindo os títulos de
+    categoria e subcategoria quando um grupo continua na página seguinte.
+
+    Retorna o HTML (ou uma string vazia, se `saida` for informado), a página efetivamente
+    exibida e o total de páginas.
+    """
+    buffer = None
+    if saida is None:
+        buffer = io.StringIO()
+        saida = buffer
+    escrever = saida.write
+
+    por_pagina = max(1, por_pagina or config.vulnerabilidades_por_pagina_preview)
+    itens, pagina, total_paginas = _paginar(secoes, pagina, por_pagina)
+
+    escrever(f'<!DOCTYPE html>\n<html lang="pt-BR"><head><meta charset="utf-8"><title>{escape(titulo)}</title>'
+             f'<style>{_ESTILO}</style></head><body>\n<h1>{escape(titulo)}</h1>\n')
+
+    if pagina == 1:
+        for secao in secoes:
+            _escrever_resumo(escrever, secao)
+
+    secao_atual = categoria_atual = subcategoria_atual = None
+    for secao, categoria, subcategoria, vulnerabilidade in itens:
+        if secao is not secao_atual:
+            escrever(f'<h2>{escape(secao["titulo"])} &mdash; Vulnerabilidades</h2>\n')
+            secao_atual, categoria_atual, subcategoria_atual = secao, None, None
+        if categoria is not categoria_atual:
+            escrever(f'<h3>{escape(categoria["categoria"])}</h3>\n<p>{escape(categoria["descricao"])}</p>\n')
+            categoria_atual, subcategoria_atual = categoria, None
+        if subcategoria is not subcategoria_atual:
+            escrever(f'<h4>{escape(subcategoria["subcategoria"])}</h4>\n<p>{escape(subcategoria["descricao"])}</p>\n')
+            subcategoria_atual = subcategoria
+        _escrever_vulnerabilidade(escrever, vulnerabilidade, secao["tipo"])
+
+    if not any(secao["categorias"] for secao in secoes):
+        escrever('<p>Nenhuma vulnerabilidade catalogada encontrada nos scans desta lista.</p>\n')
+    escrever(f'<p class="paginacao">Página {pagina} de {total_paginas}</p>\n</body></html>\n')
+
+    return (buffer.getvalue() if buffer is not None else ""), pagina, total_paginas
@@ -1,19 +1,454 @@
 # backend/src/report_generation/latex_compiler.py (Modificar)
 
+import hashlib
+import json
 import subprocess
 import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
 from pathlib import Path
 import sys
 import re # Importar regex para análise de logs
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
-def compilar_latex(caminho_main_tex: str, diretorio_saida: str):
+from ..core.config import Config
+from .latex_format import obter_formato_preambulo, ambiente_com_formato, obter_versao_pdflatex
+from .compile_executor import vaga_compilacao, executar_processo, TempoCompilacaoEsgotado
+from .cancellation import TarefaCancelada
+from .pdf_cache import calcular_manifesto, restaurar_pdf, armazenar_pdf
+from .section_compiler import compilar_em_partes
+
+config = Config("config.json")
+
+# Arquivos auxiliares cujas mudanças entre passadas indicam que as referências ainda não estabilizaram
+EXTENSOES_REFERENCIAS = ('.aux', '.toc', '.out')
+
+# Saída do pdflatex quando o formato pré-compilado não pode ser carregado
+FORMATO_INVALIDO_PATTERN = re.compile(r"I can't find the format file|Fatal format file error", re.IGNORECASE)
+
+# Mensagens do LaTeX/pacotes pedindo uma nova passada
+RERUN_PATTERN = re.compile(
+    r"Rerun to get (?:cross-references|outlines) right|Label\(s\) may have changed|Please rerun LaTeX",
+    re.IGNORECASE
+)
+
+# Erros da saída do pdflatex (com max_print_line alto, cada mensagem vem em uma única linha)
+# Exemplo: `! LaTeX Error: File `assets/images-was/missing-image.png' not found.`
+# Exemplo: `! Package pdftex.def Error: File `assets/images-was/another.png' not found: using draft setting.`
+ARQUIVO_AUSENTE_PATTERN = re.compile(
+    r"^! (?:LaTeX Error: File `|Package \S+ Error: File `|I can't find file `)(?P<arquivo>[^']+)'"
+)
+# Erros que tornam o restante da compilação inútil e a interrompem imediatamente
+FATAL_PATTERN = re.compile(
+    r"^!\s+(?:Undefined control sequence|Emergency stop|TeX capacity exceeded|==> Fatal error occurred)"
+)
+# Linha "l.<número> <trecho>" que o TeX imprime após o erro, indicando onde ele ocorreu
+LINHA_ERRO_PATTERN = re.compile(r"^l\.(\d+)")
+AVISO_PATTERN = re.compile(r"^(?:LaTeX|Package \S+|Class \S+) Warning")
+
+ARQUIVO_RESUMO_COMPILACAO = "resumo_compilacao.json"
+
+# Identifica o resultado sintético da compilação em partes
+_ARGS_COMPILACAO_PARALELA = ["compilacao-paralela"]
+
+# Limites do resumo estruturado da compilação
+_MAX_ERROS_RESUMO = 20
+_LINHAS_CONTEXTO_ERRO = 4
+_LINHAS_RESUMO = 40
+_TAMANHO_MAXIMO_LINHA = 300
+
+# Arquivos gerados pelo LaTeX que não devem ser vinculados da pasta de saída para o rascunho
+EXTENSOES_GERADAS = (
+    '.aux', '.toc', '.out', '.log', '.pdf', '.lof', '.lot', '.bbl', '.blg', '.fls', '.fdb_latexmk', '.synctex.gz'
+)
+
+# Espaço livre mínimo para usar o tmpfs (/dev/shm) como pasta de rascunho; em contêineres ele costuma ter só 64 MB
+_ESPACO_MINIMO_TMPFS = 512 * 1024 * 1024
+
+
+def _base_scratch() -> Optional[str]:
+    """
+    Escolhe onde criar as pastas de rascunho: `diretorio_scratch_compilacao` se configurado,
+    /dev/shm se houver espaço suficiente, ou o diretório temporário padrão.
+    """
+    if config.diretorio_scratch_compilacao:
+        return config.diretorio_scratch_compilacao
+    try:
+        if os.access("/dev/shm", os.W_OK) and shutil.disk_usage("/dev/shm").free >= _ESPACO_MINIMO_TMPFS:
+            return "/dev/shm"
+    except OSError:
+        pass
+    return None
+
+
+def _preparar_diretorio_scratch(diretorio_saida: str) -> str:
+    """
+    Cria uma pasta de rascunho local com links simbólicos para as entradas de primeiro nível
+    da pasta de saída (main.tex, preâmbulo, assets, anexos...), exceto arquivos gerados pelo LaTeX.
+    """
+    base = _base_scratch()
+    if base:
+        os.makedirs(base, exist_ok=True)
+    diretorio_build = tempfile.mkdtemp(prefix="auditex-build-", dir=base)
+    for entrada in Path(diretorio_saida).iterdir():
+        if entrada.is_file() and entrada.name.endswith(EXTENSOES_GERADAS):
+            continue
+        os.symlink(entrada.resolve(), Path(diretorio_build) / entrada.name)
+    return diretorio_build
+
+
+def _publicar_arquivo(origem: Path, destino: Path) -> None:
+    """
+    Copia um arquivo do rascunho para a pasta de saída de forma atômica (cópia temporária + os.replace),
+    para que leitores nunca vejam um arquivo pela metade.
+    """
+    caminho_temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    shutil.copyfile(origem, caminho_temporario)
+    os.replace(caminho_temporario, destino)
+
+
+def _hash_arquivos_referencias(diretorio_saida: str, nome_base: str) -> Dict[str, Optional[str]]:
+    """
+    Calcula o hash dos arquivos .aux/.toc/.out do documento (None quando o arquivo não existe).
+    """
+    hashes = {}
+    for extensao in EXTENSOES_REFERENCIAS:
+        caminho = Path(diretorio_saida) / f"{nome_base}{extensao}"
+        hashes[extensao] = hashlib.sha256(caminho.read_bytes()).hexdigest() if caminho.exists() else None
+    return hashes
+
+
+class _AnalisadorSaida:
+    """
+    Acompanha a saída do pdflatex/latexmk linha a linha durante a compilação.
+
+    Registra erros (com a linha do .tex e algumas linhas de contexto), arquivos não
+    encontrados, pedidos de nova passada e o número de avisos, e indica quando a passada
+    deve ser interrompida por um erro fatal. Só um resumo truncado fica em memória.
+    """
+
+    def __init__(
+        self,
+        driver: str,
+        ao_iniciar_passada: Optional[Callable[[str], None]] = None,
+        cancelado: Optional[threading.Event] = None
+    ):
+        self.driver = driver
+        # Chamado com a descrição de cada passada ao iniciá-la (progresso da geração do relatório)
+        self.ao_iniciar_passada = ao_iniciar_passada
+        # Sinalizado quando a geração é cancelada: o processo em execução é encerrado
+        self.cancelado = cancelado
+        self.passadas: List[Dict[str, Any]] = []
+        self.erros: List[Dict[str, Any]] = []
+        self.arquivos_ausentes: List[str] = []
+        self.avisos = 0
+        self.fatal = False
+        self.pediu_nova_passada = False
+        self.formato_invalido = False
+        self._erro_aberto: Optional[Dict[str, Any]] = None
+        self._interromper_ao_fechar_erro = False
+        self._ultimas_linhas: Deque[str] = deque(maxlen=_LINHAS_RESUMO)
+
+    def iniciar_passada(self) -> None:
+        self.pediu_nova_passada = False
+        self.formato_invalido = False
+        self._erro_aberto = None
+        self._interromper_ao_fechar_erro = False
+        self._ultimas_linhas.clear()
+
+    def processar_linha(self, linha: str) -> bool:
+        """
+        Processa uma linha da saída; retorna True quando o processo deve ser interrompido.
+        """
+        self._ultimas_linhas.append(linha[:_TAMANHO_MAXIMO_LINHA])
+
+        if self._erro_aberto is not None:
+            self._erro_aberto["contexto"].append(linha[:_TAMANHO_MAXIMO_LINHA])
+            match_linha = LINHA_ERRO_PATTERN.match(linha)
+            if match_linha:
+                self._erro_aberto["linha"] = int(match_linha.group(1))
+            if match_linha or len(self._erro_aberto["contexto"]) >= _LINHAS_CONTEXTO_ERRO:
+                self._erro_aberto = None
+                if self._interromper_ao_fechar_erro:
+                    return True
+
+        if FORMATO_INVALIDO_PATTERN.search(linha):
+            self.formato_invalido = True
+            return True
+        if RERUN_PATTERN.search(linha):
+            self.pediu_nova_passada = True
+        if AVISO_PATTERN.match(linha):
+            self.avisos += 1
+
+        if not linha.startswith("!"):
+            return False
+
+        match_arquivo = ARQUIVO_AUSENTE_PATTERN.match(linha)
+        if match_arquivo:
+            arquivo = match_arquivo.group("arquivo")
+            if arquivo not in self.arquivos_ausentes:
+                self.arquivos_ausentes.append(arquivo)
+            tipo = "arquivo_nao_encontrado"
+        elif FATAL_PATTERN.match(linha):
+            tipo = "fatal"
+        else:
+            tipo = "erro"
+
+        erro = {"tipo": tipo, "mensagem": linha[1:].strip()[:_TAMANHO_MAXIMO_LINHA], "linha": None, "contexto": []}
+        if len(self.erros) < _MAX_ERROS_RESUMO:
+            self.erros.append(erro)
+        self._erro_aberto = erro
+        if tipo != "erro":
+            # Fail-fast: interrompe assim que o contexto do erro (linha "l.<n>") for lido
+            self.fatal = True
+            self._interromper_ao_fechar_erro = True
+        return False
+
+    def registrar_passada(self, descricao: str, resultado: subprocess.CompletedProcess, duracao: float, interrompida: bool) -> None:
+        self.passadas.append({
+            "descricao": descricao,
+            "codigo_retorno": resultado.returncode,
+            "duracao_segundos": round(duracao, 2),
+            "interrompida": interrompida,
+        })
+        if resultado.returncode != 0 or interrompida:
+            print(f"--- ÚLTIMAS LINHAS DA SAÍDA ({descricao.upper()}) ---")
+            print("\n".join(self._ultimas_linhas))
+            print(f"--- FIM ({descricao.upper()}) ---")
+
+    def incorporar(self, outro: "_AnalisadorSaida", origem: str) -> None:
+        """
+        Junta a este resumo o resultado da compilação de uma parte do documento (`origem`).
+        """
+        self.passadas.extend({**passada, "descricao": f"{origem}: {passada['descricao']}"} for passada in outro.passadas)
+        vagas_erros = max(_MAX_ERROS_RESUMO - len(self.erros), 0)
+        self.erros.extend({**erro, "arquivo_tex": origem} for erro in outro.erros[:vagas_erros])
+        self.arquivos_ausentes.extend(arquivo for arquivo in outro.arquivos_ausentes if arquivo not in self.arquivos_ausentes)
+        self.avisos += outro.avisos
+        self.fatal = self.fatal or outro.fatal
+        if outro.fatal or not self._ultimas_linhas:
+            self._ultimas_linhas = deque(outro._ultimas_linhas, maxlen=_LINHAS_RESUMO)
+
+    def primeiro_erro(self) -> Optional[Dict[str, Any]]:
+        fatais = [erro for erro in self.erros if erro["tipo"] != "erro"]
+        return (fatais or self.erros or [None])[0]
+
+    def resumo(self, sucesso: bool, mensagem: str) -> Dict[str, Any]:
+        return {
+            "sucesso": sucesso,
+            "mensagem": mensagem,
+            "driver": self.driver,
+            "passadas": self.passadas,
+            "erros": self.erros,
+            "arquivos_nao_encontrados": self.arquivos_ausentes,
+            "avisos": self.avisos,
+            "ultimas_linhas": list(self._ultimas_linhas),
+        }
+
+
+def _executar_passada(
+    command: List[str],
+    diretorio_saida: str,
+    descricao: str,
+    prazo: float,
+    analisador: _AnalisadorSaida,
+    ambiente: Optional[Dict[str, str]] = None
+) -> subprocess.CompletedProcess:
+    """
+    Executa uma passada do pdflatex/latexmk analisando a saída enquanto ela é produzida.
+    """
+    print(f"Executando {descricao} em {diretorio_saida}...")
+    ambiente = dict(ambiente or os.environ)
+    # Sem quebra de linha em 79 colunas, para que nomes de arquivo e mensagens cheguem inteiros ao analisador
+    ambiente["max_print_line"] = "10000"
+
+    interrompida = False
+
+    def ao_ler_linha(linha: str) -> bool:
+        nonlocal interrompida
+        interrompida = analisador.processar_linha(linha)
+        return interrompida
+
+    analisador.iniciar_passada()
+    if analisador.ao_iniciar_passada:
+        analisador.ao_iniciar_passada(descricao)
+    inicio = time.monotonic()
+    resultado = executar_processo(
+        command, cwd=diretorio_saida, prazo=prazo, env=ambiente, ao_ler_linha=ao_ler_linha, cancelado=analisador.cancelado
+    )
+    duracao = time.monotonic() - inicio
+    analisador.registrar_passada(descricao, resultado, duracao, interrompida)
+    print(f"{descricao.capitalize()} concluída em {duracao:.1f}s (código {resultado.returncode}{', interrompida' if interrompida else ''}).")
+    return resultado
+
+
+def _compilar_com_pdflatex(
+    diretorio_saida: str,
+    main_tex_filename: str,
+    prazo: float,
+    analisador: _AnalisadorSaida
+) -> subprocess.CompletedProcess:
+    """
+    Compila com pdflatex executando apenas as passadas necessárias.
+
+    Em um build limpo (sem .aux/.toc/.out), a primeira passada roda com -draftmode, que
+    só gera os arquivos de referência, sem escrever o PDF. Em seguida, passadas completas
+    são repetidas (até `max_passadas_latex`) enquanto os hashes dos arquivos de referência
+    mudarem ou o log pedir uma nova execução. Um erro fatal encerra a compilação na hora.
+
+    Quando disponível, o pdflatex parte do formato pré-compilado do preâmbulo (ver
+    `latex_format`); se o formato não puder ser carregado, a compilação volta ao modo normal.
+    """
+    nome_base = Path(main_tex_filename).stem
+    formato = obter_formato_preambulo(diretorio_saida, main_tex_filename, prazo)
+
+    def executar(descricao: str, *opcoes: str) -> subprocess.CompletedProcess:
+        nonlocal formato
+        while True:
+            command = ['pdflatex', *opcoes]
+            if formato:
+                command.append(f"-fmt={formato['nome']}")
+            command += ['-interaction=nonstopmode', '-output-directory', diretorio_saida, main_tex_filename]
+            resultado = _executar_passada(command, diretorio_saida, descricao, prazo, analisador, ambiente_com_formato(formato))
+            if formato and analisador.formato_invalido:
+                print("Aviso: formato pré-compilado do preâmbulo inválido; compilando sem ele.")
+                formato = None
+                continue
+            return resultado
+
+    hashes_anteriores = _hash_arquivos_referencias(diretorio_saida, nome_base)
+
+    if not any(hashes_anteriores.values()):
+        resultado = executar("passada de rascunho", '-draftmode')
+        if analisador.fatal:
+            return resultado
+        hashes_anteriores = _hash_arquivos_referencias(diretorio_saida, nome_base)
+
+    for numero_passada in range(1, max(config.max_passadas_latex, 1) + 1):
+        resultado = executar(f"passada completa {numero_passada}")
+        if analisador.fatal:
+            break
+
+        hashes_atuais = _hash_arquivos_referencias(diretorio_saida, nome_base)
+        if hashes_atuais == hashes_anteriores and not analisador.pediu_nova_passada:
+            break
+        hashes_anteriores = hashes_atuais
+    else:
+        print(f"Aviso: as referências não estabilizaram após {config.max_passadas_latex} passadas completas.")
+
+    return resultado
+
+
+def _compilar_com_latexmk(
+    diretorio_saida: str,
+    main_tex_filename: str,
+    prazo: float,
+    analisador: _AnalisadorSaida
+) -> subprocess.CompletedProcess:
+    """
+    Compila com latexmk, que decide sozinho quantas passadas são necessárias.
+    """
+    formato = obter_formato_preambulo(diretorio_saida, main_tex_filename, prazo)
+    command = [
+        'latexmk',
+        '-pdf',
+        '-interaction=nonstopmode',
+        f'-outdir={diretorio_saida}',
+        main_tex_filename
+    ]
+    if formato:
+        command.insert(2, f"-pdflatex=pdflatex -fmt={formato['nome']} %O %S")
+    return _executar_passada(command, diretorio_saida, "latexmk", prazo, analisador, ambiente_com_formato(formato))
+
+
+def _compilar_secoes_em_paralelo(
+    diretorio_build: str,
+    main_tex_filename: str,
+    analisador: _AnalisadorSaida
+) -> Optional[subprocess.CompletedProcess]:
+    """
+    Compila as partes do documento em paralelo (ver `section_compiler`), cada uma ocupando
+    a própria vaga do executor e todas sob o mesmo prazo final. Retorna None se o documento
+    não tiver marcadores de partes.
+    """
+    prazo = time.monotonic() + config.tempo_limite_compilacao
+    lock_analisador = threading.Lock()
+
+    def compilar_parte(nome_arquivo: str) -> bool:
+        ao_iniciar_passada = None
+        if analisador.ao_iniciar_passada:
+            ao_iniciar_passada = lambda descricao: analisador.ao_iniciar_passada(f"{nome_arquivo}: {descricao}")
+        analisador_parte = _AnalisadorSaida(config.driver_latex, ao_iniciar_passada, analisador.cancelado)
+        try:
+            with vaga_compilacao(analisador.cancelado):
+                resultado = _compilar_com_pdflatex(diretorio_build, nome_arquivo, prazo, analisador_parte)
+        finally:
+            with lock_analisador:
+                analisador.incorporar(analisador_parte, nome_arquivo)
+        return resultado.returncode == 0 and not analisador_parte.fatal
+
+    resultado = compilar_em_partes(diretorio_build, main_tex_filename, compilar_parte, prazo)
+    if resultado is None:
+        print("Documento sem marcadores de partes; usando a compilação normal.")
+        return None
+    sucesso, mensagem = resultado
+    print(mensagem)
+    return subprocess.CompletedProcess(_ARGS_COMPILACAO_PARALELA, 0 if sucesso else 1, mensagem, "")
+
+
+def _gravar_resumo(diretorio_saida: str, resumo: Dict[str, Any]) -> None:
+    """
+    Grava o resumo estruturado da compilação (resumo_compilacao.json) na pasta de saída, de forma atômica.
+    """
+    destino = Path(diretorio_saida) / ARQUIVO_RESUMO_COMPILACAO
+    caminho_temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    try:
+        with open(caminho_temporario, 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+        os.replace(caminho_temporario, destino)
+    except OSError as e:
+        print(f"Aviso: não foi possível gravar o resumo da compilação em '{destino}': {e}")
+
+
+def _modo_build() -> str:
+    """
+    Configurações que mudam o PDF gerado a partir das mesmas fontes (paginação, sumário e
+    referências), incluídas na chave do cache de PDFs junto com a versão do compilador.
+    """
+    paralelo = config.compilacao_paralela_secoes and config.driver_latex != "latexmk"
+    return "|".join([
+        config.driver_latex,
+        obter_versao_pdflatex(),
+        f"passadas={config.max_passadas_latex}",
+        f"formato={int(config.usar_formato_preambulo)}",
+        f"partes_paralelas={int(paralelo)}",
+    ])
+
+
+def compilar_latex(
+    caminho_main_tex: str,
+    diretorio_saida: str,
+    ao_iniciar_passada: Optional[Callable[[str], None]] = None,
+    cancelado: Optional[threading.Event] = None
+):
     """
     Compila um arquivo LaTeX (.tex) para gerar um PDF e verifica erros comuns.
 
+    A saída do compilador é analisada enquanto é produzida: erros fatais (arquivo não
+    encontrado, comando indefinido, emergency stop) interrompem a compilação imediatamente,
+    e um resumo estruturado e truncado é gravado em `resumo_compilacao.json` na pasta de saída.
+
     Args:
         caminho_main_tex (str): O caminho completo para o arquivo main.tex.
         diretorio_saida (str): O diretório onde o PDF e outros arquivos de saída serão gerados.
-    
+        ao_iniciar_passada (callable, opcional): Chamada com a descrição de cada passada do
+            compilador ao iniciá-la (ex.: "passada completa 1").
+        cancelado (threading.Event, opcional): Sinalizado quando a geração é cancelada; o
+            pdflatex em execução é encerrado e `TarefaCancelada` é propagada.
+
     Returns:
         bool: True se a compilação foi bem-sucedida, False caso contrário.
         str: Mensagem de sucesso ou de erro detalhada.
@@ -26,85 +461,89 @@ def compilar_latex(caminho_main_tex: str, diretorio_saida: str):
         if not preambulo_path.exists():
             return False, f"Erro: Arquivo '{preambulo_path}' não encontrado no diretório de saída. Verifique se foi copiado corretamente do template."
 
-        command = [
-            'pdflatex',
-            '-interaction=nonstopmode',
-            '-output-directory', diretorio_saida,
-            main_tex_filename
-        ]
-
-        full_log_output = ""
-
-        # Primeira passada
-        print(f"Executando primeira passada do pdflatex em {diretorio_saida}...")
-        result_1 = subprocess.run(
-            command,
-            capture_output=True,
-            encoding='latin-1', # Usar latin-1 ou utf-8, dependendo da codificação real da saída do pdflatex
-            check=False,
-            cwd=diretorio_saida
-        )
-        full_log_output += result_1.stdout
-        if result_1.stderr:
-            full_log_output += result_1.stderr
-
-        print("\n--- SAÍDA DO PDFLATEX (PRIMEIRA PASSADA) ---")
-        print(result_1.stdout)
-        if result_1.stderr:
-            print(result_1.stderr)
-        print("--- FIM SAÍDA DO PDFLATEX (PRIMEIRA PASSADA) ---\n")
-
-        # Segunda passada
-        print(f"Executando segunda passada do pdflatex em {diretorio_saida}...")
-        result_2 = subprocess.run(
-            command,
-            capture_output=True,
-            encoding='latin-1',
-            check=False,
-            cwd=diretorio_saida
-        )
-        full_log_output += result_2.stdout
-        if result_2.stderr:
-            full_log_output += result_2.stderr
-
-        print("\n--- SAÍDA DO PDFLATEX (SEGUNDA PASSADA) ---")
-        print(result_2.stdout)
-        if result_2.stderr:
-            print(result_2.stderr)
-        print("--- FIM SAÍDA DO PDFLATEX (SEGUNDA PASSADA) ---\n")
-
-        # Análise dos logs para erros específicos
-        # Padrões de regex para erros de imagem (sensíveis à saída do pdflatex)
-        # Exemplo: `! LaTeX Error: File `assets/images-was/missing-image.png' not found.`
-        # Exemplo: `! Package pdftex.def Error: File `assets/images-was/another.png' not found: using draft setting.`
-        image_error_pattern = re.compile(
-            r"!(?: LaTeX)? Error: (?:File `|Package .*?\.def Error: File `)(?P<filename>[^']+)` not found",
-            re.IGNORECASE
-        )
-        
-        image_errors = []
-        for line in full_log_output.splitlines():
-            match = image_error_pattern.search(line)
-            if match:
-                filename = match.group("filename")
-                image_errors.append(filename)
-
-        if image_errors:
-            error_message = "Erro de compilação: Imagens não encontradas no relatório LaTeX. Por favor, verifique as seguintes imagens e certifique-se de que estão presentes e com o nome correto: "
-            error_message += ", ".join(image_errors)
-            return False, error_message
+        pdf_path = Path(diretorio_saida) / main_tex_filename.replace('.tex', '.pdf')
 
-        # Verificação do código de retorno final (se não houver erros específicos de imagem)
-        if result_2.returncode != 0:
-            return False, f"Erro na compilação LaTeX. Código de retorno: {result_2.returncode}. Verifique os logs do backend para detalhes."
-        else:
-            pdf_path = Path(diretorio_saida) / main_tex_filename.replace('.tex', '.pdf')
-            if not pdf_path.exists():
-                return False, f"AVISO: pdflatex retornou 0, mas o PDF '{pdf_path.name}' NÃO foi encontrado em '{diretorio_saida}'. Isso pode indicar um problema de permissão ou compilação inválida."
-            else:
-                return True, f"PDF compilado com sucesso em: {pdf_path}"
+        # Build idêntico a um anterior (main.tex, preâmbulo, bibliografia e imagens): reaproveita o PDF em cache
+        manifesto = None
+        try:
+            manifesto = calcular_manifesto(diretorio_saida, main_tex_filename, _modo_build())
+        except Exception as e:
+            print(f"Aviso: não foi possível calcular o manifesto do build para o cache de PDFs: {e}")
+        analisador = _AnalisadorSaida(config.driver_latex, ao_iniciar_passada, cancelado)
+        if restaurar_pdf(manifesto, pdf_path):
+            mensagem = f"PDF obtido do cache de compilação em: {pdf_path}"
+            _gravar_resumo(diretorio_saida, analisador.resumo(True, mensagem))
+            return True, mensagem
+
+        sucesso, mensagem = _compilar_em_scratch(diretorio_saida, main_tex_filename, pdf_path, manifesto, analisador)
+        _gravar_resumo(diretorio_saida, analisador.resumo(sucesso, mensagem))
+        return sucesso, mensagem
 
+    except TarefaCancelada:
+        raise
     except FileNotFoundError as fnf_e:
-        return False, f"Erro: Comando 'pdflatex' não encontrado. Certifique-se de que o LaTeX está instalado e configurado no PATH do sistema. Detalhes: {fnf_e}"
+        return False, f"Erro: Comando '{config.driver_latex}' não encontrado. Certifique-se de que o LaTeX está instalado e configurado no PATH do sistema. Detalhes: {fnf_e}"
     except Exception as e:
         return False, f"Erro inesperado durante a compilação LaTeX: {str(e)}"
+
+
+def _compilar_em_scratch(
+    diretorio_saida: str,
+    main_tex_filename: str,
+    pdf_path: Path,
+    manifesto: Optional[str],
+    analisador: _AnalisadorSaida
+) -> Tuple[bool, str]:
+    """
+    Executa o build em uma pasta de rascunho local e publica o PDF e o log na pasta de saída.
+    """
+    # O build roda em uma pasta de rascunho local; só o PDF e o log finais vão para o volume compartilhado
+    diretorio_build = _preparar_diretorio_scratch(diretorio_saida)
+    try:
+        try:
+            resultado_final = None
+            if config.compilacao_paralela_secoes and config.driver_latex != "latexmk":
+                resultado_final = _compilar_secoes_em_paralelo(diretorio_build, main_tex_filename, analisador)
+                nome_compilador = "pdflatex (partes em paralelo)"
+            if resultado_final is None:
+                # A vaga no executor vale para o job inteiro (todas as passadas), com um único prazo final
+                with vaga_compilacao(analisador.cancelado) as prazo:
+                    if config.driver_latex == "latexmk":
+                        resultado_final = _compilar_com_latexmk(diretorio_build, main_tex_filename, prazo, analisador)
+                        nome_compilador = "latexmk"
+                    else:
+                        resultado_final = _compilar_com_pdflatex(diretorio_build, main_tex_filename, prazo, analisador)
+                        nome_compilador = "pdflatex"
+        except TempoCompilacaoEsgotado as timeout_e:
+            return False, f"Erro: {timeout_e}"
+        finally:
+            # O log é publicado mesmo em caso de falha, para permitir o diagnóstico
+            log_build = Path(diretorio_build) / f"{Path(main_tex_filename).stem}.log"
+            if log_build.exists():
+                _publicar_arquivo(log_build, Path(diretorio_saida) / log_build.name)
+
+        if analisador.arquivos_ausentes:
+            error_message = "Erro de compilação: Imagens não encontradas no relatório LaTeX. Por favor, verifique as seguintes imagens e certifique-se de que estão presentes e com o nome correto: "
+            error_message += ", ".join(analisador.arquivos_ausentes)
+            return False, error_message
+
+        primeiro_erro = analisador.primeiro_erro()
+        if analisador.fatal and primeiro_erro:
+            local = f" (linha {primeiro_erro['linha']} do {primeiro_erro.get('arquivo_tex', main_tex_filename)})" if primeiro_erro["linha"] else ""
+            return False, f"Erro na compilação LaTeX: {primeiro_erro['mensagem'].rstrip('.')}{local}. Veja {ARQUIVO_RESUMO_COMPILACAO} para detalhes."
+
+        # Verificação do código de retorno final (se não houver erros fatais)
+        if resultado_final.returncode != 0 and resultado_final.args == _ARGS_COMPILACAO_PARALELA:
+            return False, f"Erro na compilação LaTeX em partes: {resultado_final.stdout}"
+        if resultado_final.returncode != 0:
+            return False, f"Erro na compilação LaTeX. Código de retorno: {resultado_final.returncode}. Verifique {ARQUIVO_RESUMO_COMPILACAO} e os logs do backend para detalhes."
+
+        pdf_build = Path(diretorio_build) / pdf_path.name
+        if not pdf_build.exists():
+            return False, f"AVISO: {nome_compilador} retornou 0, mas o PDF '{pdf_path.name}' NÃO foi encontrado em '{diretorio_build}'. Isso pode indicar um problema de permissão ou compilação inválida."
+
+        _publicar_arquivo(pdf_build, pdf_path)
+        armazenar_pdf(manifesto, pdf_path)
+        return True, f"PDF compilado com sucesso em: {pdf_path}"
+    finally:
+        shutil.rmtree(diretorio_build, ignore_errors=True)
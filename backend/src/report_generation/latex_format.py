@@ -0,0 +1,169 @@
+# backend/src/report_generation/latex_format.py
+
+import hashlib
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import fasteners
+
+from ..core.config import Config
+from .compile_executor import executar_processo
+
+config = Config("config.json")
+
+# Pasta, ao lado do template, onde ficam os formatos pré-compilados do preâmbulo
+DIRETORIO_CACHE_FORMATO = ".cache_formato"
+
+_MARCADOR_INICIO_DOCUMENTO = "\\begin{document}"
+
+# Formatos de versões anteriores do template só são apagados após este intervalo, para não
+# remover um formato que outra compilação em andamento acabou de selecionar
+_IDADE_MINIMA_REMOCAO_SEGUNDOS = 3600
+
+_versao_pdflatex: Optional[str] = None
+_build_lock = threading.Lock()
+# Formatos cuja geração já falhou neste processo; não são tentados de novo a cada compilação
+_formatos_com_falha = set()
+
+
+def obter_versao_pdflatex() -> str:
+    """
+    Retorna (uma vez por processo) a primeira linha de `pdflatex --version`; o formato
+    gerado só é válido para o mesmo binário.
+    """
+    global _versao_pdflatex
+    if _versao_pdflatex is None:
+        resultado = subprocess.run(['pdflatex', '--version'], capture_output=True, encoding='latin-1', check=False)
+        _versao_pdflatex = (resultado.stdout.splitlines() or [""])[0]
+    return _versao_pdflatex
+
+
+def _extrair_preambulo(caminho_main_tex: Path) -> Optional[str]:
+    """
+    Retorna o trecho de main.tex anterior a \\begin{document}, ou None se o marcador não existir.
+    """
+    conteudo = caminho_main_tex.read_text(encoding='utf-8')
+    posicao = conteudo.find(_MARCADOR_INICIO_DOCUMENTO)
+    if posicao < 0:
+        return None
+    return conteudo[:posicao]
+
+
+def _diretorio_cache() -> Path:
+    return Path(config.caminho_report_templates_base) / DIRETORIO_CACHE_FORMATO
+
+
+def _gerar_formato(
+    diretorio_build: str,
+    preambulo_main: str,
+    nome_formato: str,
+    diretorio_cache: Path,
+    prazo: Optional[float]
+) -> bool:
+    """
+    Gera `<nome_formato>.fmt` com mylatexformat a partir do preâmbulo de main.tex.
+
+    O formato é gerado em uma pasta temporária e movido atomicamente para o cache.
+    """
+    diretorio_cache.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=diretorio_cache) as diretorio_temporario:
+        caminho_driver = Path(diretorio_temporario) / "preambulo_formato.tex"
+        caminho_driver.write_text(preambulo_main + _MARCADOR_INICIO_DOCUMENTO + "\n\\end{document}\n", encoding='utf-8')
+
+        command = [
+            'pdflatex',
+            '-ini',
+            '-interaction=nonstopmode',
+            f'-jobname={nome_formato}',
+            '-output-directory', diretorio_temporario,
+            '&pdflatex',
+            'mylatexformat.ltx',
+            str(caminho_driver)
+        ]
+        print(f"Gerando formato pré-compilado do preâmbulo '{nome_formato}'...")
+        # cwd no build para que \input{./preambulo} e caminhos relativos resolvam como na compilação
+        resultado = executar_processo(command, cwd=diretorio_build, prazo=prazo)
+
+        caminho_gerado = Path(diretorio_temporario) / f"{nome_formato}.fmt"
+        if resultado.returncode != 0 or not caminho_gerado.exists():
+            print(f"Aviso: falha ao gerar o formato do preâmbulo (código {resultado.returncode}). A compilação seguirá sem ele.")
+            print(resultado.stdout[-2000:])
+            return False
+        os.replace(caminho_gerado, diretorio_cache / f"{nome_formato}.fmt")
+    return True
+
+
+def obter_formato_preambulo(diretorio_build: str, main_tex_filename: str, prazo: Optional[float] = None) -> Optional[Dict[str, str]]:
+    """
+    Retorna o formato pré-compilado do preâmbulo para o documento em `diretorio_build`,
+    gerando-o se ainda não existir no cache.
+
+    O nome do formato é o hash do preâmbulo de main.tex, de preambulo.tex e da versão do
+    pdflatex; qualquer mudança no template gera um formato novo. O retorno traz o nome do
+    formato (para `-fmt`) e o diretório que deve entrar em TEXFORMATS; em caso de falha,
+    retorna None e a compilação segue do jeito normal.
+    """
+    if not config.usar_formato_preambulo:
+        return None
+    try:
+        preambulo_main = _extrair_preambulo(Path(diretorio_build) / main_tex_filename)
+        caminho_preambulo = Path(diretorio_build) / "preambulo.tex"
+        if preambulo_main is None or not caminho_preambulo.exists():
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(obter_versao_pdflatex().encode('utf-8'))
+        digest.update(preambulo_main.encode('utf-8'))
+        digest.update(caminho_preambulo.read_bytes())
+        nome_formato = f"preambulo-{digest.hexdigest()[:16]}"
+
+        diretorio_cache = _diretorio_cache()
+        caminho_formato = diretorio_cache / f"{nome_formato}.fmt"
+        if nome_formato in _formatos_com_falha:
+            return None
+        if not caminho_formato.exists():
+            diretorio_cache.mkdir(parents=True, exist_ok=True)
+            # Lock entre threads e entre processos (workers do servidor) para gerar o formato uma única vez
+            with _build_lock, fasteners.InterProcessLock(str(diretorio_cache / ".lock")):
+                if not caminho_formato.exists():
+                    if nome_formato in _formatos_com_falha:
+                        return None
+                    if not _gerar_formato(diretorio_build, preambulo_main, nome_formato, diretorio_cache, prazo):
+                        _formatos_com_falha.add(nome_formato)
+                        return None
+                    _remover_formatos_antigos(diretorio_cache, nome_formato)
+
+        return {"nome": nome_formato, "diretorio": str(diretorio_cache)}
+    except Exception as e:
+        print(f"Aviso: formato pré-compilado do preâmbulo indisponível: {e}")
+        return None
+
+
+def _remover_formatos_antigos(diretorio_cache: Path, nome_formato_atual: str) -> None:
+    """
+    Remove os formatos de versões anteriores do template.
+    """
+    limite = time.time() - _IDADE_MINIMA_REMOCAO_SEGUNDOS
+    for caminho in diretorio_cache.glob("preambulo-*.fmt"):
+        if caminho.stem != nome_formato_atual and caminho.stat().st_mtime < limite:
+            try:
+                caminho.unlink()
+            except OSError:
+                pass
+
+
+def ambiente_com_formato(formato: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """
+    Retorna o ambiente do subprocesso com o diretório do formato no início de TEXFORMATS
+    (o ':' final mantém os caminhos padrão do kpathsea), ou None para herdar o ambiente atual.
+    """
+    if not formato:
+        return None
+    ambiente = dict(os.environ)
+    ambiente["TEXFORMATS"] = f"{formato['diretorio']}{os.pathsep}{ambiente.get('TEXFORMATS', '')}"
+    return ambiente
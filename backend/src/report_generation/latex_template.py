@@ -0,0 +1,100 @@
+# backend/src/report_generation/latex_template.py
+
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, TextIO, Tuple, Union
+
+# Placeholders do template seguem o formato [CHAVE], com letras maiúsculas, dígitos, espaços ou '_'.
+# Opções do LaTeX como [h!] ou [a4paper,12pt] não casam com o padrão.
+_PLACEHOLDER_PATTERN = re.compile(r"\[([A-Z0-9_ ]+)\]")
+
+# Um segmento é (é_placeholder, texto): texto literal ou o nome da chave do placeholder.
+Segmento = Tuple[bool, str]
+
+# Valor de substituição: texto já pronto ou caminho de um arquivo cujo conteúdo será injetado.
+ValorSubstituicao = Union[str, os.PathLike]
+
+_cache_templates: Dict[str, Tuple[Tuple[int, int], List[Segmento]]] = {}
+_cache_lock = threading.Lock()
+
+
+def separar_segmentos(conteudo: str) -> List[Segmento]:
+    """
+    Divide o conteúdo de um template em segmentos literais e placeholders [CHAVE].
+    """
+    segmentos: List[Segmento] = []
+    posicao = 0
+    for match in _PLACEHOLDER_PATTERN.finditer(conteudo):
+        if match.start() > posicao:
+            segmentos.append((False, conteudo[posicao:match.start()]))
+        segmentos.append((True, match.group(1)))
+        posicao = match.end()
+    if posicao < len(conteudo):
+        segmentos.append((False, conteudo[posicao:]))
+    return segmentos
+
+
+def compilar_template(caminho_template: str) -> List[Segmento]:
+    """
+    Retorna o template já dividido em segmentos, usando um cache em memória
+    invalidado quando o mtime ou o tamanho do arquivo mudam.
+    """
+    caminho = os.path.abspath(caminho_template)
+    stat = os.stat(caminho)
+    assinatura = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        em_cache = _cache_templates.get(caminho)
+        if em_cache and em_cache[0] == assinatura:
+            return em_cache[1]
+
+    with open(caminho, 'r', encoding='utf-8') as f:
+        segmentos = separar_segmentos(f.read())
+
+    with _cache_lock:
+        _cache_templates[caminho] = (assinatura, segmentos)
+    return segmentos
+
+
+def renderizar_template(
+    segmentos: List[Segmento],
+    substituicoes: Dict[str, ValorSubstituicao],
+    saida: TextIO
+) -> None:
+    """
+    Escreve o template em `saida` em uma única passada.
+
+    Valores do tipo str são escritos diretamente; valores do tipo Path têm o conteúdo do
+    arquivo copiado em blocos, sem carregá-lo inteiro em memória. Placeholders sem valor
+    em `substituicoes` são mantidos como estão no template.
+    """
+    for eh_placeholder, texto in segmentos:
+        if not eh_placeholder:
+            saida.write(texto)
+            continue
+
+        valor = substituicoes.get(texto)
+        if valor is None:
+            saida.write(f"[{texto}]")
+        elif isinstance(valor, os.PathLike):
+            with open(valor, 'r', encoding='utf-8') as origem:
+                shutil.copyfileobj(origem, saida)
+        else:
+            saida.write(valor)
+
+
+def renderizar_template_em_arquivo(
+    caminho_template: str,
+    substituicoes: Dict[str, ValorSubstituicao],
+    caminho_saida: str
+) -> None:
+    """
+    Renderiza o template compilado diretamente no arquivo de saída.
+    """
+    segmentos = compilar_template(caminho_template)
+    Path(caminho_saida).parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho_saida, 'w', encoding='utf-8') as saida:
+        renderizar_template(segmentos, substituicoes, saida)
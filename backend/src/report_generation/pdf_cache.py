@@ -0,0 +1,166 @@
+# backend/src/report_generation/pdf_cache.py
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from ..core.config import Config
+
+config = Config("config.json")
+
+# Incrementar quando a forma de calcular o manifesto mudar, para invalidar o cache.
+_VERSAO_MANIFESTO = 1
+
+_INCLUDEGRAPHICS_PATTERN = re.compile(r"\\includegraphics\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}")
+_INPUT_PATTERN = re.compile(r"\\(?:input|include)\s*\{([^}]+)\}")
+_GRAPHICSPATH_PATTERN = re.compile(r"\\graphicspath\s*\{((?:\{[^}]*\})+)\}")
+
+# Extensões testadas pelo pdflatex quando o \includegraphics não informa a extensão
+_EXTENSOES_IMAGEM = ("", ".pdf", ".png", ".jpg", ".jpeg")
+
+# Arquivos fixos do template que sempre entram no manifesto
+_ARQUIVOS_FIXOS = ("preambulo.tex", "referencias.bib")
+
+
+def _sem_comentarios(conteudo: str) -> str:
+    return re.sub(r"(?<!\\)%.*", "", conteudo)
+
+
+def _resolver_arquivo(diretorio_build: Path, nome: str, pastas: List[str], extensoes) -> Optional[Path]:
+    for pasta in pastas:
+        for extensao in extensoes:
+            candidato = diretorio_build / pasta / f"{nome}{extensao}"
+            if candidato.is_file():
+                return candidato
+    return None
+
+
+def calcular_manifesto(diretorio_build: str, main_tex_filename: str, identificacao_compilador: str = "") -> Optional[str]:
+    """
+    Calcula o hash de conteúdo de um build: main.tex, preambulo.tex, referencias.bib, os arquivos
+    incluídos via \\input/\\include e todos os alvos de \\includegraphics (resolvidos a partir do
+    build e das pastas do \\graphicspath). Retorna None se o cache estiver desabilitado.
+    """
+    if not config.caminho_cache_pdfs:
+        return None
+
+    raiz = Path(diretorio_build)
+    digest = hashlib.sha256()
+    digest.update(f"{_VERSAO_MANIFESTO}\0{identificacao_compilador}\0".encode('utf-8'))
+
+    pendentes = [raiz / main_tex_filename]
+    visitados = set()
+    pastas_graficos = [""]
+    imagens = []
+    while pendentes:
+        caminho = pendentes.pop(0)
+        if caminho in visitados:
+            continue
+        visitados.add(caminho)
+        conteudo_bytes = caminho.read_bytes()
+        digest.update(f"tex:{caminho.relative_to(raiz).as_posix()}\0".encode('utf-8'))
+        digest.update(conteudo_bytes)
+
+        conteudo = _sem_comentarios(conteudo_bytes.decode('utf-8', errors='replace'))
+        for match in _GRAPHICSPATH_PATTERN.finditer(conteudo):
+            pastas_graficos.extend(re.findall(r"\{([^}]*)\}", match.group(1)))
+        for nome in _INPUT_PATTERN.findall(conteudo):
+            incluido = _resolver_arquivo(raiz, nome.strip(), [""], ("", ".tex"))
+            if incluido:
+                pendentes.append(incluido)
+        imagens.extend(nome.strip() for nome in _INCLUDEGRAPHICS_PATTERN.findall(conteudo))
+
+    for nome in _ARQUIVOS_FIXOS:
+        caminho = raiz / nome
+        digest.update(f"fixo:{nome}\0".encode('utf-8'))
+        if caminho.is_file() and caminho not in visitados:
+            digest.update(caminho.read_bytes())
+
+    for nome in imagens:
+        caminho = _resolver_arquivo(raiz, nome, pastas_graficos, _EXTENSOES_IMAGEM)
+        digest.update(f"imagem:{nome}\0".encode('utf-8'))
+        if caminho is None:
+            # Imagem ausente: a compilação vai falhar e nada será gravado no cache
+            digest.update(b"ausente")
+            continue
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(bloco)
+
+    return digest.hexdigest()
+
+
+def _caminho_no_cache(manifesto: str) -> Path:
+    return Path(config.caminho_cache_pdfs) / manifesto[:2] / f"{manifesto}.pdf"
+
+
+def restaurar_pdf(manifesto: Optional[str], caminho_pdf: Path) -> bool:
+    """
+    Se houver um PDF em cache para o manifesto, coloca-o em `caminho_pdf` (hardlink, com
+    fallback para cópia) e retorna True.
+    """
+    if not manifesto:
+        return False
+    caminho_cache = _caminho_no_cache(manifesto)
+    if not caminho_cache.is_file():
+        return False
+    try:
+        # Atualiza o mtime: é ele que define a ordem de remoção (LRU)
+        os.utime(caminho_cache)
+        caminho_temporario = caminho_pdf.with_name(f"{caminho_pdf.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            os.link(caminho_cache, caminho_temporario)
+        except OSError:
+            shutil.copy2(caminho_cache, caminho_temporario)
+        os.replace(caminho_temporario, caminho_pdf)
+        return True
+    except OSError as e:
+        print(f"Aviso: não foi possível restaurar o PDF do cache '{caminho_cache}': {e}")
+        return False
+
+
+def armazenar_pdf(manifesto: Optional[str], caminho_pdf: Path) -> None:
+    """
+    Copia o PDF compilado para o cache e aplica o limite de tamanho (`tamanho_max_cache_pdfs_mb`).
+    """
+    if not manifesto or not caminho_pdf.is_file():
+        return
+    caminho_cache = _caminho_no_cache(manifesto)
+    try:
+        caminho_cache.parent.mkdir(parents=True, exist_ok=True)
+        caminho_temporario = caminho_cache.with_name(f"{caminho_cache.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copy2(caminho_pdf, caminho_temporario)
+        os.replace(caminho_temporario, caminho_cache)
+    except OSError as e:
+        print(f"Aviso: não foi possível gravar o PDF no cache '{caminho_cache}': {e}")
+        return
+    _aplicar_limite_cache()
+
+
+def _aplicar_limite_cache() -> None:
+    """
+    Remove os PDFs usados há mais tempo (menor mtime) até o cache caber no limite configurado.
+    """
+    limite_bytes = config.tamanho_max_cache_pdfs_mb * 1024 * 1024
+    entradas = []
+    for caminho in Path(config.caminho_cache_pdfs).glob("*/*.pdf"):
+        try:
+            stat = caminho.stat()
+        except OSError:
+            continue
+        entradas.append((stat.st_mtime, stat.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        try:
+            caminho.unlink()
+            total -= tamanho
+        except OSError:
+            pass
+
@@ -0,0 +1,604 @@
+# backend/src/report_generation/pipeline.py
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from ..core.config import Config
+from ..data_processing.vulnerability_analyzer import processar_relatorio_csv, processar_relatorio_json, extrair_quantidades_vulnerabilidades_por_site
+from .report_builder import terminar_relatorio_preprocessado, DIRETORIO_GRAFICOS
+from .latex_compiler import compilar_latex
+from .report_jobs import STATUS_CONCLUIDO
+from .stage_graph import ARQUIVO_ESTAGIOS, estagio, executar_estagios
+from .cancellation import verificar_cancelamento
+from .plot_generator import gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site, gerar_grafico_donut, gerar_grafico_donut_webapp, renderizar_grafico, aguardar_graficos
+
+config = Config("config.json")
+
+# Etapas da geração do relatório, na ordem em que são executadas, com a descrição exibida ao usuário
+ETAPAS = {
+    "processando_webapp": "Processando scans de aplicações web",
+    "processando_servidores": "Processando scans de servidores",
+    "gerando_graficos": "Gerando gráficos",
+    "montando_latex": "Montando o documento LaTeX",
+    "compilando_pdf": "Compilando o PDF",
+}
+
+# Peso de cada etapa no percentual geral do progresso (soma 100)
+_PESOS_ETAPAS = {
+    "processando_webapp": 35,
+    "processando_servidores": 25,
+    "gerando_graficos": 10,
+    "montando_latex": 10,
+    "compilando_pdf": 20,
+}
+
+
+# Etapa (em `ETAPAS`) de cada estágio do grafo da geração; os gráficos são estágios independentes
+_ETAPA_DO_ESTAGIO = {
+    "processando_webapp": "processando_webapp",
+    "processando_servidores": "processando_servidores",
+    "grafico_donut_webapp": "gerando_graficos",
+    "grafico_vulnerabilidades_por_site": "gerando_graficos",
+    "grafico_donut_servidores": "gerando_graficos",
+    "montando_latex": "montando_latex",
+    "compilando_pdf": "compilando_pdf",
+}
+
+# Estágios executados por `preprocessar_relatorio` (os demais, por `finalizar_relatorio`)
+_ESTAGIOS_DADOS = (
+    "processando_webapp",
+    "processando_servidores",
+    "grafico_donut_webapp",
+    "grafico_vulnerabilidades_por_site",
+    "grafico_donut_servidores",
+)
+
+
+# Arquivos do catálogo de vulnerabilidades usados na montagem do relatório
+ARQUIVOS_CATALOGO = (
+    "vulnerabilities_webapp.json",
+    "descritivo_webapp.json",
+    "vulnerabilities_servers.json",
+    "descritivo_servers.json",
+)
+
+# Campos do formulário que aparecem no relatório (capa e placeholders do template)
+CAMPOS_FORMULARIO = ("nomeSecretaria", "siglaSecretaria", "dataInicio", "dataFim", "ano", "mes", "linkGoogleDrive")
+
+
+def _assinatura_arquivos(pasta: Optional[str], extensao: str) -> list:
+    """
+    Nome, tamanho e mtime (em ns) dos arquivos `*.<extensao>` da pasta, em ordem de nome.
+    """
+    if not pasta or not os.path.isdir(pasta):
+        return []
+    assinatura = []
+    with os.scandir(pasta) as entradas:
+        for entrada in entradas:
+            if entrada.is_file() and entrada.name.endswith(f".{extensao}"):
+                stat = entrada.stat()
+                assinatura.append([entrada.name, stat.st_size, stat.st_mtime_ns])
+    return sorted(assinatura)
+
+
+def _assinatura_catalogo(nomes: Tuple[str, ...]) -> list:
+    """
+    Nome, tamanho e mtime (em ns) dos arquivos do catálogo de vulnerabilidades.
+    """
+    caminho_catalogo = Path(config.caminho_report_templates_descriptions)
+    catalogo = []
+    for nome in nomes:
+        try:
+            stat = (caminho_catalogo / nome).stat()
+            catalogo.append([nome, stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            catalogo.append([nome, None, None])
+    return catalogo
+
+
+def fingerprint_dados(lista_doc: Dict[str, Any]) -> str:
+    """
+    Impressão digital dos dados de entrada do relatório de uma lista: arquivos de scan de
+    aplicações web (JSON) e de servidores (CSV), identificados por nome, tamanho e mtime, o
+    scan de servidores associado e a versão (tamanho e mtime) dos arquivos do catálogo.
+    Não lê o conteúdo dos arquivos; qualquer novo download de scan muda o resultado.
+    """
+    dados = {
+        "webapp": _assinatura_arquivos(lista_doc.get("pastas_scans_webapp"), "json"),
+        "servidores": _assinatura_arquivos(lista_doc.get("pastas_scans_vm"), "csv"),
+        "historyid_scanservidor": lista_doc.get("historyid_scanservidor"),
+        "catalogo": _assinatura_catalogo(ARQUIVOS_CATALOGO),
+    }
+    return hashlib.sha256(json.dumps(dados, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def chave_geracao(id_lista: str, fingerprint: str, formulario: Dict[str, Any]) -> str:
+    """
+    Chave que identifica uma geração de relatório: a lista, a impressão digital dos dados
+    (`fingerprint_dados`) e os campos do formulário. Duas requisições com a mesma chave
+    produzem o mesmo relatório.
+    """
+    campos = {campo: str(formulario.get(campo) or "").strip() for campo in CAMPOS_FORMULARIO}
+    conteudo = json.dumps({"id_lista": str(id_lista), "dados": fingerprint, "campos": campos}, sort_keys=True)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def pasta_relatorio_preprocessado(relatorio_id: str) -> Path:
+    """
+    Pasta de trabalho de um relatório: shared_data/generated_reports/<relatorio_id>/relatorio_preprocessado.
+    """
+    return Path(config.caminho_shared_relatorios) / str(relatorio_id) / "relatorio_preprocessado"
+
+
+def _ler_contagens(caminho_txt: Path, chaves: Tuple[str, ...]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Lê do TXT de resumo os totais ('Total de sites', 'Total de Vulnerabilidades') e a
+    contagem por severidade, com as chaves de severidade em `chaves` (na capitalização usada pelo chamador).
+    """
+    with open(caminho_txt, 'r', encoding='utf-8') as f:
+        content = f.read()
+    totais = {}
+    for rotulo in ('Total de sites', 'Total de Vulnerabilidades'):
+        match = re.search(rf'{rotulo}:\s*(\d+)', content)
+        if match:
+            totais[rotulo] = match.group(1)
+    contagens = {}
+    for chave in chaves:
+        match = re.search(rf'{chave.capitalize()}:\s*(\d+)', content)
+        if match:
+            contagens[chave] = match.group(1)
+    return totais, contagens
+
+
+def _trazer_arquivo(origem: Path, destino: Path) -> None:
+    """
+    Hardlink (ou cópia, se não for possível) de um arquivo de outro relatório. Não usa symlink:
+    o relatório de origem pode ser excluído depois.
+    """
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
+
+
+def _semear_de_relatorio_anterior(origem: Path, destino: Path) -> bool:
+    """
+    Traz para `destino` os arquivos pré-processados (TXTs, conteúdo LaTeX, CSVs, anexos, gráficos
+    e o registro de estágios) de um relatório anterior, sem o RelatorioPronto. Os estágios cujas
+    entradas não mudaram são então reaproveitados (ver `executar_estagios`). Se a cópia falhar,
+    `destino` é esvaziado e retorna False.
+    """
+    try:
+        if not (origem / ARQUIVO_ESTAGIOS).is_file():
+            return False
+        for caminho in origem.rglob("*"):
+            relativo = caminho.relative_to(origem)
+            if relativo.parts[0] == "RelatorioPronto" or not caminho.is_file():
+                continue
+            _trazer_arquivo(caminho, destino / relativo)
+        return True
+    except OSError as e:
+        print(f"Aviso: não foi possível reaproveitar o pré-processamento de '{origem}': {e}")
+        for caminho in list(destino.iterdir()) if destino.exists() else []:
+            if caminho.name != "RelatorioPronto":
+                shutil.rmtree(caminho) if caminho.is_dir() else caminho.unlink()
+        return False
+
+
+def _processar_webapp(lista_doc: Dict[str, Any], pasta: Path, informar: Callable[..., None]) -> Dict[str, Any]:
+    """
+    Processa os scans de aplicações web (JSON) e retorna os totais lidos do TXT de resumo e as
+    linhas por site (as mesmas gravadas no CSV), usadas diretamente pelo gráfico por site.
+    """
+    webapp_report_txt_path = pasta / "Sites_agrupados_por_vulnerabilidades.txt"
+    dados = {
+        "tem_webapp": False,
+        "total_sites": '0',
+        "total_vulnerabilidades_web": '0',
+        "webapp_risk_counts": {'Critical': '0', 'High': '0', 'Medium': '0', 'Low': '0'},
+        "vulnerabilidades_por_site": [],
+    }
+    pasta_scans_webapp = lista_doc.get("pastas_scans_webapp")
+
+    if pasta_scans_webapp and os.path.exists(pasta_scans_webapp) and any(f.endswith('.json') for f in os.listdir(pasta_scans_webapp)):
+        print(f"Processando scans de WebApp da pasta: {pasta_scans_webapp}")
+        processar_relatorio_json(
+            pasta_scans_webapp, str(pasta),
+            lambda lidos, total: informar("processando_webapp", lidos, total, "arquivos de scan")
+        )
+        informar("processando_webapp", detalhe="contando as vulnerabilidades por site")
+        dados["vulnerabilidades_por_site"] = extrair_quantidades_vulnerabilidades_por_site(
+            str(pasta / "vulnerabilidades_agrupadas_por_site.csv"), pasta_scans_webapp
+        )
+
+        totais, contagens = _ler_contagens(webapp_report_txt_path, tuple(dados["webapp_risk_counts"]))
+        dados["tem_webapp"] = True
+        dados["total_sites"] = totais.get('Total de sites', dados["total_sites"])
+        dados["total_vulnerabilidades_web"] = totais.get('Total de Vulnerabilidades', dados["total_vulnerabilidades_web"])
+        dados["webapp_risk_counts"].update(contagens)
+    else:
+        print(f"Aviso: Não há scans WebApp na pasta {pasta_scans_webapp} ou a pasta está vazia.")
+        pd.DataFrame(columns=['Site', 'Critical', 'High', 'Medium', 'Low', 'Total']).to_csv(str(pasta / "vulnerabilidades_agrupadas_por_site.csv"), index=False)
+        webapp_report_txt_path.touch()
+        (pasta / "(LATEX)Sites_agrupados_por_vulnerabilidades.txt").touch()
+    return dados
+
+
+def _processar_servidores(lista_doc: Dict[str, Any], pasta: Path, informar: Callable[..., None]) -> Dict[str, Any]:
+    """
+    Processa o CSV dos scans de servidores (VM) e retorna os totais lidos do TXT de resumo.
+    """
+    servers_report_txt_path = pasta / "Servidores_agrupados_por_vulnerabilidades.txt"
+    dados = {
+        "tem_servidores": False,
+        "total_vulnerabilidade_vm": '0',
+        "servers_risk_counts": {'critical': '0', 'high': '0', 'medium': '0', 'low': '0'},
+    }
+    pasta_scans_vm = lista_doc.get("pastas_scans_vm")
+    csv_servidor_path = None
+
+    if pasta_scans_vm:
+        csv_servidor_path = Path(pasta_scans_vm) / "servidores_scan.csv"
+
+    if lista_doc.get("historyid_scanservidor") and csv_servidor_path and csv_servidor_path.exists():
+        print(f"Arquivo CSV de servidores encontrado em {csv_servidor_path}. Processando...")
+        processar_relatorio_csv(
+            pasta_scans_vm, str(pasta),
+            lambda lidos, total: informar("processando_servidores", lidos, total, "arquivos CSV")
+        )
+        totais, contagens = _ler_contagens(servers_report_txt_path, tuple(dados["servers_risk_counts"]))
+        dados["tem_servidores"] = True
+        dados["total_vulnerabilidade_vm"] = totais.get('Total de Vulnerabilidades', dados["total_vulnerabilidade_vm"])
+        dados["servers_risk_counts"].update(contagens)
+    else:
+        print(f"Aviso: Não há scans de Servidores associados ou o arquivo CSV não foi encontrado. Caminho verificado: {csv_servidor_path}")
+        servers_report_txt_path.touch()
+        (pasta / "(LATEX)Servidores_agrupados_por_vulnerabilidades.txt").touch()
+    return dados
+
+
+def _relativo(pasta: Path, caminho: str) -> str:
+    return Path(caminho).relative_to(pasta).as_posix()
+
+
+def _informante(
+    relatorio_id: str,
+    progresso: Optional[Callable[[Dict[str, Any]], None]],
+    estagios: List[str],
+    etapas_concluidas: Tuple[str, ...] = (),
+    cancelado: Optional[threading.Event] = None
+) -> Tuple[Callable[..., None], Callable[[str, bool], None], Callable[[str, float, bool], None]]:
+    """
+    Retorna (informar, ao_iniciar, ao_concluir) para os eventos de progresso de um grafo com os
+    `estagios` dados. `informar` publica o progresso dentro de uma etapa; `ao_iniciar` e
+    `ao_concluir` são os callbacks de `executar_estagios` e publicam marcos (início e fim de
+    estágio, com os tempos dos estágios concluídos). O percentual soma, para cada etapa, o seu
+    peso vezes a fração concluída, já que estágios de etapas diferentes rodam ao mesmo tempo;
+    as etapas de `etapas_concluidas` (de um grafo anterior da mesma geração) contam como completas.
+
+    Cada chamada de `informar` é também um ponto de verificação do cancelamento: se `cancelado`
+    estiver sinalizado, `TarefaCancelada` é lançada no meio da etapa (ex.: entre dois arquivos de scan).
+    """
+    fracoes = {nome: (1.0 if nome in etapas_concluidas else 0.0) for nome in ETAPAS}
+    estagios_por_etapa = {nome: [estagio for estagio in estagios if _ETAPA_DO_ESTAGIO[estagio] == nome] for nome in ETAPAS}
+    concluidos: List[str] = []
+    tempos: Dict[str, float] = {}
+    lock = threading.Lock()
+
+    def informar(
+        nome: str,
+        processados: Optional[int] = None,
+        total: Optional[int] = None,
+        detalhe: Optional[str] = None,
+        fracao: Optional[float] = None,
+        marco: bool = False
+    ) -> None:
+        verificar_cancelamento(cancelado)
+        if progresso is None:
+            return
+        with lock:
+            if fracao is None and processados is not None and total:
+                fracao = processados / total
+            if fracao is not None:
+                fracoes[nome] = max(fracoes[nome], min(max(fracao, 0.0), 1.0))
+            evento = {
+                "etapa": nome,
+                "descricao": ETAPAS[nome],
+                "percentual": round(sum(_PESOS_ETAPAS[etapa] * fracao_etapa for etapa, fracao_etapa in fracoes.items()), 1),
+                "processados": processados,
+                "total": total,
+                "detalhe": detalhe,
+                "tempos_etapas": dict(tempos),
+                "marco": marco,
+            }
+        progresso(evento)
+
+    def ao_iniciar(nome_estagio: str, reaproveitado: bool) -> None:
+        etapa = _ETAPA_DO_ESTAGIO[nome_estagio]
+        detalhe = "entradas inalteradas, resultado reaproveitado" if reaproveitado else None
+        print(f"Relatório {relatorio_id}: {ETAPAS[etapa]} [{nome_estagio}]{f' ({detalhe})' if detalhe else ''}...")
+        informar(etapa, detalhe=detalhe, marco=True)
+
+    def ao_concluir(nome_estagio: str, duracao: float, reaproveitado: bool) -> None:
+        etapa = _ETAPA_DO_ESTAGIO[nome_estagio]
+        with lock:
+            tempos[nome_estagio] = duracao
+            concluidos.append(nome_estagio)
+            do_grupo = estagios_por_etapa[etapa]
+            fracao = sum(1 for estagio in do_grupo if estagio in concluidos) / len(do_grupo)
+        informar(etapa, fracao=fracao, detalhe=f"{nome_estagio} concluído em {duracao}s", marco=True)
+
+    return informar, ao_iniciar, ao_concluir
+
+
+def _estagios_dados(
+    lista_doc: Dict[str, Any],
+    pasta: Path,
+    caminhos_graficos: Dict[str, str],
+    informar: Callable[..., None],
+    cancelado: Optional[threading.Event] = None
+) -> List[Dict[str, Any]]:
+    """
+    Grafo das etapas de dados: os blocos de aplicações web (JSON e CSV por site) e de servidores
+    (CSV) são independentes; cada gráfico depende apenas do seu bloco.
+    """
+    parametros_anexos = [config.limite_instancias_anexo, config.amostra_instancias_anexo]
+    pasta_graficos = pasta / DIRETORIO_GRAFICOS
+
+    def grafico(chave: str, tem_dados: str, funcao: Callable, argumentos: Callable[[Dict[str, Any]], tuple]) -> Callable[[Dict[str, Any]], Dict[str, bool]]:
+        """
+        Estágio de um gráfico: renderiza no pool de processos com os argumentos montados a partir
+        do resultado do bloco do qual depende, se o bloco teve scans.
+        """
+        def executar(dependencias: Dict[str, Any]) -> Dict[str, bool]:
+            bloco = next(iter(dependencias.values()))
+            if not bloco[tem_dados]:
+                return {"gerado": False}
+            pasta_graficos.mkdir(parents=True, exist_ok=True)
+            return {"gerado": aguardar_graficos({chave: renderizar_grafico(funcao, *argumentos(bloco))}, cancelado=cancelado)[chave]}
+        return executar
+
+    return [
+        estagio(
+            "processando_webapp",
+            lambda dependencias: _processar_webapp(lista_doc, pasta, informar),
+            entradas=lambda: {
+                "pasta": lista_doc.get("pastas_scans_webapp"),
+                "scans": _assinatura_arquivos(lista_doc.get("pastas_scans_webapp"), "json"),
+                "catalogo": _assinatura_catalogo(("vulnerabilities_webapp.json", "descritivo_webapp.json")),
+                "anexos": parametros_anexos,
+            },
+            saidas=(
+                "Sites_agrupados_por_vulnerabilidades.txt", "(LATEX)Sites_agrupados_por_vulnerabilidades.txt",
+                "vulnerabilidades_agrupadas_por_site.csv", "anexos/webapp-*.csv",
+            ),
+            # Só gerado quando há vulnerabilidades fora do catálogo
+            saidas_opcionais=("vulnerabilidades_sites_ausentes.txt",),
+        ),
+        estagio(
+            "processando_servidores",
+            lambda dependencias: _processar_servidores(lista_doc, pasta, informar),
+            entradas=lambda: {
+                "pasta": lista_doc.get("pastas_scans_vm"),
+                "scans": _assinatura_arquivos(lista_doc.get("pastas_scans_vm"), "csv"),
+                "historyid_scanservidor": lista_doc.get("historyid_scanservidor"),
+                "catalogo": _assinatura_catalogo(("vulnerabilities_servers.json", "descritivo_servers.json")),
+                "anexos": parametros_anexos,
+            },
+            saidas=(
+                "Servidores_agrupados_por_vulnerabilidades.txt", "(LATEX)Servidores_agrupados_por_vulnerabilidades.txt",
+                "anexos/servers-*.csv",
+            ),
+            saidas_opcionais=("vulnerabilidades_servidores_ausentes.txt",),
+        ),
+        estagio(
+            "grafico_donut_webapp",
+            grafico("donut_webapp", "tem_webapp", gerar_grafico_donut_webapp,
+                    lambda bloco: ({k: int(v) for k, v in bloco["webapp_risk_counts"].items()}, caminhos_graficos["donut_webapp"])),
+            depende_de=("processando_webapp",),
+            saidas=(_relativo(pasta, caminhos_graficos["donut_webapp"]),),
+        ),
+        estagio(
+            "grafico_vulnerabilidades_por_site",
+            grafico("webapp_x_site", "tem_webapp", gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site,
+                    lambda bloco: (bloco["vulnerabilidades_por_site"], caminhos_graficos["webapp_x_site"], "descendente")),
+            # As linhas por site vêm no resultado de processando_webapp e entram no hash deste estágio com ele
+            depende_de=("processando_webapp",),
+            entradas=lambda: {
+                "formato": config.formato_grafico_sites,
+                "max_sites": config.max_sites_grafico,
+                "empilhado": config.grafico_sites_empilhado,
+            },
+            saidas=(_relativo(pasta, caminhos_graficos["webapp_x_site"]),),
+        ),
+        estagio(
+            "grafico_donut_servidores",
+            grafico("donut_servidores", "tem_servidores", gerar_grafico_donut,
+                    lambda bloco: ({k: int(v) for k, v in bloco["servers_risk_counts"].items()}, caminhos_graficos["donut_servidores"])),
+            depende_de=("processando_servidores",),
+            saidas=(_relativo(pasta, caminhos_graficos["donut_servidores"]),),
+        ),
+    ]
+
+
+def preprocessar_relatorio(
+    relatorio_id: str,
+    lista_doc: Dict[str, Any],
+    progresso: Optional[Callable[[Dict[str, Any]], None]] = None,
+    preprocessado_anterior: Optional[str] = None,
+    cancelado: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """
+    Etapas de dados da geração, executadas como um grafo de estágios (ver `stage_graph`): os scans
+    de aplicações web (JSON) e de servidores (CSV) são processados ao mesmo tempo e cada gráfico é
+    gerado assim que o seu bloco termina, na pasta do relatório `relatorio_id`.
+
+    Se `preprocessado_anterior` apontar para o relatorio_preprocessado de um relatório anterior
+    da lista, os arquivos dele são trazidos antes e os estágios cujas entradas não mudaram
+    (mesmos scans, catálogo e parâmetros) são reaproveitados em vez de executados.
+
+    `cancelado` interrompe a geração (ver `cancellation`): é verificado a cada arquivo de scan,
+    a cada estágio e enquanto os gráficos são renderizados.
+
+    Retorna o que `finalizar_relatorio` precisa: os totais extraídos dos scans ("dados"), os
+    caminhos dos gráficos ("caminhos_graficos"), os estágios reaproveitados ("reaproveitados"),
+    a duração de cada estágio ("tempos_etapas") e a assinatura das entradas ("assinatura").
+    """
+    pasta_destino_relatorio_temp_base = pasta_relatorio_preprocessado(relatorio_id)
+    pasta_destino_relatorio_temp_base.mkdir(parents=True, exist_ok=True)
+    if preprocessado_anterior and config.reaproveitar_preprocessado:
+        if _semear_de_relatorio_anterior(Path(preprocessado_anterior), pasta_destino_relatorio_temp_base):
+            print(f"Relatório {relatorio_id}: pré-processamento de '{preprocessado_anterior}' trazido para reaproveitamento.")
+
+    # Os gráficos são gerados na pasta do próprio relatório (nunca no template compartilhado);
+    # o gráfico por site pode ser gerado em PDF vetorial e o main.tex o referencia sem extensão
+    pasta_graficos = pasta_destino_relatorio_temp_base / DIRETORIO_GRAFICOS
+    formato_grafico_sites = "pdf" if config.formato_grafico_sites == "pdf" else "png"
+    caminhos_graficos = {
+        "donut_servidores": str(pasta_graficos / "total-vulnerabilidades-vm-donut.png"),
+        "donut_webapp": str(pasta_graficos / "total-vulnerabilidades-was-donut.png"),
+        "webapp_x_site": str(pasta_graficos / f"vulnerabilidades-x-site.{formato_grafico_sites}"),
+    }
+
+    informar, ao_iniciar, ao_concluir = _informante(relatorio_id, progresso, list(_ESTAGIOS_DADOS), cancelado=cancelado)
+    estagios = _estagios_dados(lista_doc, pasta_destino_relatorio_temp_base, caminhos_graficos, informar, cancelado)
+    executados = executar_estagios(estagios, pasta_destino_relatorio_temp_base, ao_iniciar, ao_concluir, cancelado=cancelado)
+
+    reaproveitados = [nome for nome, estado in executados.items() if estado["reaproveitado"]]
+    if reaproveitados:
+        print(f"Relatório {relatorio_id}: estágios reaproveitados: {', '.join(reaproveitados)}.")
+    return {
+        "dados": {**executados["processando_webapp"]["resultado"], **executados["processando_servidores"]["resultado"]},
+        "caminhos_graficos": caminhos_graficos,
+        "reaproveitados": reaproveitados,
+        "tempos_etapas": {nome: estado["duracao"] for nome, estado in executados.items()},
+        "assinatura": {nome: estado["hash"] for nome, estado in sorted(executados.items())},
+    }
+
+
+def finalizar_relatorio(
+    relatorio_id: str,
+    lista_doc: Dict[str, Any],
+    formulario: Dict[str, Any],
+    preprocessado: Dict[str, Any],
+    progresso: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancelado: Optional[threading.Event] = None
+) -> Tuple[bool, str]:
+    """
+    Etapas de documento da geração: substitui os campos do formulário e os totais de
+    `preprocessado` (retorno de `preprocessar_relatorio`) no template, monta o main.tex e
+    compila o PDF. Retorna (sucesso, mensagem) da compilação. Se `cancelado` for sinalizado
+    durante a compilação, o pdflatex é encerrado e `TarefaCancelada` é propagada.
+    """
+    informar, ao_iniciar, ao_concluir = _informante(
+        relatorio_id, progresso, ["montando_latex", "compilando_pdf"],
+        etapas_concluidas=("processando_webapp", "processando_servidores", "gerando_graficos"),
+        cancelado=cancelado
+    )
+    passadas_iniciadas = 0
+
+    def ao_iniciar_passada(descricao: str) -> None:
+        nonlocal passadas_iniciadas
+        passadas_iniciadas += 1
+        informar("compilando_pdf", passadas_iniciadas, None, descricao)
+
+    pasta_destino_relatorio_temp_base = pasta_relatorio_preprocessado(relatorio_id)
+    pasta_final_latex = pasta_destino_relatorio_temp_base / "RelatorioPronto"
+    dados = preprocessado["dados"]
+    caminhos_graficos = preprocessado["caminhos_graficos"]
+    criado_por_vm_scan = lista_doc.get("criado_por_scanservidor", "Não informado")
+
+    def montar_latex(dependencias: Dict[str, Any]) -> None:
+        webapp_risk_counts = dados["webapp_risk_counts"]
+        servers_risk_counts = dados["servers_risk_counts"]
+        terminar_relatorio_preprocessado(
+            formulario.get("nomeSecretaria"), formulario.get("siglaSecretaria"),
+            formulario.get("dataInicio"), formulario.get("dataFim"), formulario.get("ano"), formulario.get("mes"),
+            str(pasta_destino_relatorio_temp_base), str(pasta_final_latex / "main.tex"),
+            formulario.get("linkGoogleDrive"), dados["total_vulnerabilidades_web"], dados["total_vulnerabilidade_vm"],
+            webapp_risk_counts['Critical'], webapp_risk_counts['High'], webapp_risk_counts['Medium'], webapp_risk_counts['Low'],
+            servers_risk_counts['critical'], servers_risk_counts['high'], servers_risk_counts['medium'], servers_risk_counts['low'],
+            dados["total_sites"], criado_por_vm_scan,
+            caminhos_graficos["donut_servidores"], caminhos_graficos["donut_webapp"], caminhos_graficos["webapp_x_site"]
+        )
+
+    def compilar(dependencias: Dict[str, Any]) -> Tuple[bool, str]:
+        return compilar_latex(os.path.join(str(pasta_final_latex), "main.tex"), str(pasta_final_latex), ao_iniciar_passada, cancelado)
+
+    caminho_template = Path(config.caminho_report_templates_base) / "main.tex"
+    estagios = [
+        estagio(
+            "montando_latex",
+            montar_latex,
+            entradas=lambda: {
+                "formulario": {campo: formulario.get(campo) for campo in CAMPOS_FORMULARIO},
+                "criado_por_vm_scan": criado_por_vm_scan,
+                "template": [str(caminho_template), *_assinatura_arquivos(str(caminho_template.parent), "tex")],
+                "preprocessado": preprocessado.get("assinatura"),
+            },
+            saidas=("RelatorioPronto/main.tex",),
+        ),
+        # A compilação sempre roda: o PDF já é reaproveitado pelo cache de PDFs quando o main.tex não muda
+        estagio("compilando_pdf", compilar, depende_de=("montando_latex",), reaproveitavel=False),
+    ]
+    executados = executar_estagios(estagios, pasta_destino_relatorio_temp_base, ao_iniciar, ao_concluir, cancelado=cancelado)
+    sucesso, mensagem = executados["compilando_pdf"]["resultado"]
+    return sucesso, mensagem
+
+
+def gerar_relatorio_de_lista(
+    relatorio_id: str,
+    lista_doc: Dict[str, Any],
+    formulario: Dict[str, Any],
+    progresso: Optional[Callable[[Dict[str, Any]], None]] = None,
+    preprocessado_anterior: Optional[str] = None,
+    cancelado: Optional[threading.Event] = None
+) -> Tuple[bool, str]:
+    """
+    Executa a geração completa do relatório de uma lista: processa os scans de aplicações web
+    (JSON) e de servidores (CSV), gera os gráficos, monta o main.tex e compila o PDF na pasta
+    do relatório `relatorio_id` (`preprocessar_relatorio` seguido de `finalizar_relatorio`).
+
+    `formulario` traz os campos da capa como enviados pelo frontend (nomeSecretaria,
+    siglaSecretaria, dataInicio, dataFim, ano, mes e linkGoogleDrive). `progresso` recebe um
+    evento no início e no fim de cada estágio (com "marco" verdadeiro e a duração dos estágios
+    já concluídos em "tempos_etapas") e durante as etapas longas, com a etapa (ver `ETAPAS`), o
+    percentual geral, os itens processados na etapa (arquivos de scan, passadas do compilador)
+    e um detalhe opcional.
+
+    `preprocessado_anterior` é o relatorio_preprocessado de um relatório anterior da lista, cujos
+    estágios com as mesmas entradas são reaproveitados (ver `preprocessar_relatorio`).
+
+    `cancelado` é o evento de cancelamento do job: quando sinalizado, a geração é interrompida no
+    próximo ponto de verificação (arquivo de scan, estágio, gráfico ou passada do compilador,
+    com o pdflatex encerrado na hora) e `TarefaCancelada` é propagada.
+
+    Retorna (sucesso, mensagem) da compilação; erros de processamento são propagados.
+    """
+    preprocessado = preprocessar_relatorio(relatorio_id, lista_doc, progresso, preprocessado_anterior, cancelado)
+    return finalizar_relatorio(relatorio_id, lista_doc, formulario, preprocessado, progresso, cancelado)
+
+
+def preprocessado_reaproveitavel(db_instance: Any, id_lista: str) -> Optional[str]:
+    """
+    Pasta relatorio_preprocessado do relatório concluído mais recente da lista que ainda tem o
+    registro de estágios, ou None. Os estágios dele com as mesmas entradas são reaproveitados.
+    """
+    if not config.reaproveitar_preprocessado:
+        return None
+    candidatos = db_instance.find("relatorios", {"id_lista": id_lista, "status": STATUS_CONCLUIDO})
+    for relatorio in sorted(candidatos, key=lambda r: r.get("finalizado_em") or datetime.min, reverse=True):
+        pasta = pasta_relatorio_preprocessado(str(relatorio["_id"]))
+        if (pasta / ARQUIVO_ESTAGIOS).is_file():
+            return str(pasta)
+    return None
@@ -1,25 +1,112 @@
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Union
+
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg") # Backend sem interface gráfica: os gráficos são renderizados em threads/processos do servidor
 import matplotlib.pyplot as plt
 import os # Importar os para usar os.makedirs
 
-def gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(input_file: str, graph_output_path: str, ordem: str = "descendente"):
+from ..core.config import Config
+from .chart_cache import chave_grafico, restaurar_grafico, armazenar_grafico
+from .cancellation import verificar_cancelamento
+
+config = Config("config.json")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# O pyplot guarda a figura atual em estado global e não é thread-safe: a renderização no próprio
+# processo (sem pool) é serializada entre os estágios, jobs e lotes que rodam em threads
+_pyplot_lock = threading.Lock()
+
+# Intervalo entre as verificações do pedido de cancelamento enquanto os gráficos são renderizados
+_INTERVALO_VERIFICACAO_CANCELAMENTO = 0.2
+
+
+def _salvar_figura(caminho_saida: str):
+    """
+    Salva a figura atual em um arquivo temporário e o move para o destino com os.replace.
+    Assim o arquivo antigo nunca é sobrescrito no lugar, o que preserva as cópias
+    vinculadas por hardlink nas pastas de relatórios já gerados.
     """
-    Gera um gráfico de barras do quantitativo de vulnerabilidades por site e salva em um arquivo PNG.
+    base, extensao = os.path.splitext(caminho_saida)
+    caminho_temporario = f"{base}.{os.getpid()}.tmp{extensao}"
+    plt.savefig(caminho_temporario)
+    os.replace(caminho_temporario, caminho_saida)
+
+# Colunas das linhas por site e cores das severidades nas barras empilhadas (as mesmas dos donuts)
+_COLUNAS_POR_SITE = ['Site', 'Critical', 'High', 'Medium', 'Low', 'Total']
+_CORES_SEVERIDADE = (('Critical', '#8B0000'), ('High', '#FF3030'), ('Medium', '#FFE066'), ('Low', '#87F1FF'))
+
+
+def _agrupar_sites_excedentes(df_sorted: pd.DataFrame, max_sites: int):
+    """
+    Mantém os `max_sites` sites com mais vulnerabilidades (na ordem já definida) e resume os demais
+    em uma única barra "Outros", com a média por site (a soma ofuscaria as demais barras).
+    Retorna os dados do gráfico e o total somado dos sites agrupados (0 se não houve agrupamento).
+    Com `max_sites` igual a 0, ou se couber tudo, não altera os dados.
+    """
+    if max_sites <= 0 or len(df_sorted) <= max_sites:
+        return df_sorted, 0
+    principais = df_sorted.nlargest(max_sites, 'Total').index
+    excedentes = df_sorted.drop(index=principais)
+    outros = excedentes[['Critical', 'High', 'Medium', 'Low', 'Total']].mean().round().astype(int)
+    outros['Site'] = f"Outros (média de {len(excedentes)} sites)"
+    df_grafico = pd.concat([df_sorted.loc[df_sorted.index.isin(principais)], outros.to_frame().T], ignore_index=True)
+    return df_grafico, int(excedentes['Total'].sum())
+
+
+def gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(
+    dados_por_site: Union[pd.DataFrame, List[Dict[str, Any]], str],
+    graph_output_path: str,
+    ordem: str = "descendente"
+):
+    """
+    Gera um gráfico de barras do quantitativo de vulnerabilidades por site e salva no formato
+    indicado pela extensão de `graph_output_path` (PNG, ou PDF vetorial para o pdflatex).
+
+    Para que o tempo de renderização não cresça com o número de sites, apenas os
+    `max_sites_grafico` sites com mais vulnerabilidades ganham barra própria; os demais são
+    resumidos na barra "Outros". Com `grafico_sites_empilhado`, cada barra é dividida por severidade.
 
     Args:
-        input_file (str): Caminho do arquivo de entrada CSV (vulnerabilidades_agrupadas_por_site.csv).
-        graph_output_path (str): Caminho para salvar o arquivo PNG do gráfico.
+        dados_por_site: Linhas por site (colunas Site, Critical, High, Medium, Low e Total), como
+            DataFrame ou lista de dicionários; o caminho do CSV vulnerabilidades_agrupadas_por_site.csv
+            também é aceito.
+        graph_output_path (str): Caminho para salvar o gráfico (.png ou .pdf).
         ordem (str): Ordem de classificação ('descendente' ou 'crescente').
     """
     try:
-        # Carrega os dados do CSV em um DataFrame
-        df = pd.read_csv(input_file)
+        if isinstance(dados_por_site, str):
+            df = pd.read_csv(dados_por_site)
+        elif isinstance(dados_por_site, pd.DataFrame):
+            df = dados_por_site
+        else:
+            df = pd.DataFrame(dados_por_site, columns=_COLUNAS_POR_SITE)
+
+        max_sites = config.max_sites_grafico
+        empilhado = config.grafico_sites_empilhado
+
+        # A chave do cache usa os dados por site e as opções de desenho: se não mudaram, o gráfico é reaproveitado
+        chave = chave_grafico(
+            "quantitativo_por_site",
+            df[_COLUNAS_POR_SITE].to_csv(index=False).encode('utf-8'),
+            {"ordem": ordem.lower(), "max_sites": max_sites, "empilhado": empilhado}
+        )
+        if restaurar_grafico(chave, graph_output_path):
+            print(f"Gráfico reaproveitado do cache: {graph_output_path}")
+            return True
 
         # Define se a ordenação será crescente ou decrescente
         ordem_crescente = True if ordem.lower() == "crescente" else False
 
-        # Ordena os dados pela coluna 'Total' conforme especificado
+        # Ordena os dados pela coluna 'Total' conforme especificado; a barra "Outros", se houver, fica no fim
         df_sorted = df.sort_values(by='Total', ascending=ordem_crescente)
+        df_sorted, total_outros = _agrupar_sites_excedentes(df_sorted, max_sites)
 
         # Cria o diretório de saída se não existir
         output_dir = os.path.dirname(graph_output_path)
@@ -28,7 +115,19 @@ def gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(input_file: str, graph_
 
         # Configura o gráfico
         plt.figure(figsize=(20, 10))
-        plt.bar(df_sorted['Site'], df_sorted['Total'], color='skyblue')
+        sites = df_sorted['Site'].astype(str).tolist()
+        if empilhado:
+            base = [0] * len(sites)
+            for coluna, cor in _CORES_SEVERIDADE:
+                valores = df_sorted[coluna].astype(int).tolist()
+                plt.bar(sites, valores, bottom=base, color=cor, label=coluna)
+                base = [b + v for b, v in zip(base, valores)]
+            plt.legend(title="Severidade", fontsize=13, title_fontsize=14)
+        else:
+            plt.bar(sites, df_sorted['Total'].astype(int), color='skyblue')
+        if total_outros:
+            plt.annotate(f"Total: {total_outros}", (len(sites) - 1, int(df_sorted['Total'].iloc[-1])),
+                         xytext=(0, 4), textcoords='offset points', ha='center', fontsize=12)
 
         # Adiciona títulos e rótulos
         plt.title('Quantitativo de Vulnerabilidades por Site', fontsize=18)
@@ -41,12 +140,15 @@ def gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(input_file: str, graph_
         # Ajusta o layout para evitar cortes
         plt.tight_layout()
 
-        # Salva o gráfico como arquivo PNG
-        plt.savefig(graph_output_path)
+        # Salva o gráfico no formato da extensão do arquivo (PNG ou PDF vetorial)
+        _salvar_figura(graph_output_path)
         plt.close() # Fecha a figura para liberar memória
+        armazenar_grafico(chave, graph_output_path)
         print(f"Gráfico salvo em: {graph_output_path}")
+        return True
     except Exception as e:
         print(f"Erro ao gerar o gráfico de quantitativo de vulnerabilidades por site: {e}")
+        return False
     
     
 def gerar_grafico_donut(vulnerabilidades: dict, output_path: str): # Adicionado output_path
@@ -75,6 +177,11 @@ def gerar_grafico_donut(vulnerabilidades: dict, output_path: str): # Adicionado
         # Ou simplesmente não gerar o arquivo. Por agora, vamos não gerar.
         return False # Indica que o gráfico não foi gerado com sucesso
 
+    chave = chave_grafico("donut_servidores", data)
+    if restaurar_grafico(chave, output_path):
+        print(f"Gráfico donut reaproveitado do cache: {output_path}")
+        return True
+
     labels = [item[0] for item in data]
     sizes = [item[1] for item in data]
     colors = [item[2] for item in data]
@@ -115,8 +222,9 @@ def gerar_grafico_donut(vulnerabilidades: dict, output_path: str): # Adicionado
     # Ajusta o layout para evitar que a legenda se sobreponha ao gráfico
     plt.tight_layout()
 
-    plt.savefig(output_path) # Salva o gráfico
+    _salvar_figura(output_path) # Salva o gráfico
     plt.close() # Fecha a figura para liberar memória
+    armazenar_grafico(chave, output_path)
     print(f"Gráfico donut salvo em: {output_path}")
     return True # Indica que o gráfico foi gerado com sucesso
 
@@ -144,6 +252,11 @@ def gerar_grafico_donut_webapp(vulnerabilidades: dict, output_path: str): # NOVO
         print("Nenhuma vulnerabilidade de WebApp para exibir no gráfico donut.")
         return False
 
+    chave = chave_grafico("donut_webapp", data)
+    if restaurar_grafico(chave, output_path):
+        print(f"Gráfico donut de WebApp reaproveitado do cache: {output_path}")
+        return True
+
     labels = [item[0] for item in data]
     sizes = [item[1] for item in data]
     colors = [item[2] for item in data]
@@ -176,7 +289,102 @@ def gerar_grafico_donut_webapp(vulnerabilidades: dict, output_path: str): # NOVO
         os.makedirs(output_dir, exist_ok=True)
 
     plt.tight_layout()
-    plt.savefig(output_path)
+    _salvar_figura(output_path)
     plt.close()
+    armazenar_grafico(chave, output_path)
     print(f"Gráfico donut de WebApp salvo em: {output_path}")
-    return True
\ No newline at end of file
+    return True
+
+
+def _obter_executor() -> ProcessPoolExecutor:
+    """
+    Cria (uma vez por processo) o pool de processos que renderiza os gráficos. Usa 'forkserver'
+    quando disponível, para não copiar via fork o estado das threads do servidor. Os processos
+    do pool são reaproveitados entre relatórios, então o import do matplotlib acontece uma vez por processo.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            metodos = multiprocessing.get_all_start_methods()
+            contexto = multiprocessing.get_context("forkserver" if "forkserver" in metodos else "spawn")
+            _executor = ProcessPoolExecutor(max_workers=config.processos_graficos, mp_context=contexto)
+        return _executor
+
+
+def _descartar_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _executar_localmente(funcao: Callable, *args) -> Future:
+    futuro: Future = Future()
+    try:
+        with _pyplot_lock:
+            resultado = funcao(*args)
+        futuro.set_result(resultado)
+    except Exception as e:
+        futuro.set_exception(e)
+    return futuro
+
+
+def renderizar_grafico(funcao: Callable, *args) -> Future:
+    """
+    Agenda a renderização de um gráfico (`funcao(*args)`) em um processo do pool e retorna o Future.
+
+    Com `processos_graficos` igual a 0, ou se o pool estiver quebrado, o gráfico é renderizado
+    no próprio processo, um de cada vez (`_pyplot_lock`), e o Future já volta concluído.
+    """
+    if config.processos_graficos <= 0:
+        return _executar_localmente(funcao, *args)
+    try:
+        return _obter_executor().submit(funcao, *args)
+    except (BrokenProcessPool, RuntimeError) as e:
+        print(f"Aviso: pool de gráficos indisponível ({e}); renderizando no processo atual.")
+        _descartar_executor()
+        return _executar_localmente(funcao, *args)
+
+
+def aguardar_graficos(
+    futuros: Dict[str, Future],
+    ao_concluir: Optional[Callable[[int, int], None]] = None,
+    cancelado: Optional[threading.Event] = None
+) -> Dict[str, bool]:
+    """
+    Aguarda os gráficos agendados com `renderizar_grafico` e retorna, para cada nome, se o
+    arquivo foi gerado. Falhas são registradas e não interrompem a geração do relatório.
+    `ao_concluir` é chamada com (concluídos, total) a cada gráfico finalizado.
+
+    Se `cancelado` for sinalizado, os gráficos que ainda não começaram são descartados e
+    `TarefaCancelada` é lançada assim que os que já estão sendo renderizados terminarem
+    (o processo do pool não é interrompido, para não perder os demais gráficos em andamento).
+    """
+    resultados = {}
+    nomes = {futuro: nome for nome, futuro in futuros.items()}
+    pendentes = set(nomes)
+    while pendentes:
+        concluidos, pendentes = wait(
+            pendentes, timeout=_INTERVALO_VERIFICACAO_CANCELAMENTO if cancelado is not None else None, return_when=FIRST_COMPLETED
+        )
+        if cancelado is not None and cancelado.is_set():
+            for futuro in pendentes:
+                futuro.cancel()
+            # Aguarda os que já estavam rodando, para que não gravem na pasta do relatório depois de ela ser removida
+            wait(pendentes)
+            verificar_cancelamento(cancelado)
+        for futuro in concluidos:
+            nome = nomes[futuro]
+            try:
+                resultados[nome] = futuro.result() is not False
+            except BrokenProcessPool as e:
+                print(f"Erro: o processo que renderizava o gráfico '{nome}' foi encerrado: {e}")
+                _descartar_executor()
+                resultados[nome] = False
+            except Exception as e:
+                print(f"Erro ao renderizar o gráfico '{nome}': {e}")
+                resultados[nome] = False
+            if ao_concluir:
+                ao_concluir(len(resultados), len(futuros))
+    return resultados
@@ -0,0 +1,239 @@
+# backend/src/report_generation/report_batch.py
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from bson.objectid import ObjectId
+
+from ..core.config import Config
+from ..core.database import Database
+from ..core.json_utils import carregar_json_em_cache
+from .latex_template import compilar_template
+from .pipeline import ARQUIVOS_CATALOGO
+from .report_jobs import obter_job, STATUS_NA_FILA, STATUS_EM_EXECUCAO, STATUS_CONCLUIDO, STATUS_FALHOU, STATUS_CANCELADO
+from .report_submission import submeter_geracao
+
+config = Config("config.json")
+
+# Lotes ficam consultáveis em memória por este intervalo; depois, pelos documentos em `relatorios` com o id_lote
+_RETENCAO_LOTES_SEGUNDOS = 24 * 3600
+
+_lotes_lock = threading.Lock()
+_lotes: Dict[str, Dict[str, Any]] = {}
+
+
+def _precarregar_recursos() -> None:
+    """
+    Carrega o catálogo de vulnerabilidades e o template base uma única vez antes do lote; os
+    relatórios usam os mesmos objetos em cache (invalidados só se os arquivos mudarem).
+    """
+    for nome in ARQUIVOS_CATALOGO:
+        caminho = os.path.join(config.caminho_report_templates_descriptions, nome)
+        try:
+            carregar_json_em_cache(caminho)
+        except (OSError, ValueError) as e:
+            print(f"Aviso: não foi possível pré-carregar o catálogo '{caminho}': {e}")
+    compilar_template(os.path.join(config.caminho_report_templates_base, "main.tex"))
+
+
+def _remover_lotes_antigos() -> None:
+    limite = time.monotonic() - _RETENCAO_LOTES_SEGUNDOS
+    with _lotes_lock:
+        for id_lote in [i for i, lote in _lotes.items() if lote["_inicio"] < limite]:
+            del _lotes[id_lote]
+
+
+def _submeter_entrada(entrada: Any, usuario: Optional[Dict[str, Any]], id_lote: str) -> Dict[str, Any]:
+    """
+    Valida a lista da entrada e enfileira a geração dela (ver `submeter_geracao`). Retorna o item
+    do lote com o relatório e o job, ou com o erro que impediu a submissão.
+    """
+    item = {
+        "id_lista": entrada.get("idLista") if isinstance(entrada, dict) else None,
+        "nome": entrada.get("nomeSecretaria") if isinstance(entrada, dict) else None,
+        "relatorio_id": None,
+        "id_job": None,
+        "reaproveitado": False,
+        "erro": None,
+    }
+    if not isinstance(entrada, dict):
+        item["erro"] = "Entrada inválida: esperado um objeto com idLista e os campos do relatório."
+        return item
+    try:
+        objeto_id = ObjectId(entrada.get("idLista"))
+    except Exception:
+        item["erro"] = "ID de lista inválido."
+        return item
+    try:
+        db_instance = Database()
+        lista_doc = db_instance.find_one("listas", {"_id": objeto_id})
+        db_instance.close()
+        if not lista_doc:
+            item["erro"] = "Lista não encontrada."
+            return item
+        job, reaproveitado = submeter_geracao(lista_doc, entrada, usuario, id_lote)
+    except Exception as e:
+        traceback.print_exc()
+        item["erro"] = f"Erro interno ao gerar relatório: {e}"
+        return item
+    item["relatorio_id"] = str(job.get("relatorio_id") or job.get("_id"))
+    item["id_job"] = job.get("id_job") if job.get("relatorio_id") else None
+    item["reaproveitado"] = reaproveitado
+    return item
+
+
+def submeter_lote(entradas: List[Any], usuario: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Enfileira os relatórios de várias listas de uma vez e retorna o resumo do lote sem aguardar
+    (ver `resumo_lote`). Cada entrada tem o idLista e os campos da capa, como o corpo de
+    /reports/gerarRelatorioDeLista/.
+
+    Cada relatório vira um job comum (ver `submeter_geracao`): tem id, prazo, pode ser cancelado
+    e é coalescido com gerações idênticas em andamento ou recentes. Os jobs de lote rodam no
+    pool de lotes (`max_relatorios_paralelos_lote` em paralelo), com a compilação limitada a
+    `max_compilacoes_simultaneas`, de modo que os pdflatex de um relatório rodam enquanto os
+    dados dos seguintes são processados. O catálogo e o template são carregados uma única vez.
+    """
+    _remover_lotes_antigos()
+    id_lote = uuid.uuid4().hex
+    print(f"Lote {id_lote}: {len(entradas)} relatório(s).")
+    _precarregar_recursos()
+    lote = {
+        "id_lote": id_lote,
+        "criado_em": datetime.utcnow(),
+        "_inicio": time.monotonic(),
+        "itens": [_submeter_entrada(entrada, usuario, id_lote) for entrada in entradas],
+    }
+    with _lotes_lock:
+        _lotes[id_lote] = lote
+    return resumo_lote(id_lote)
+
+
+def _estado_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Estado atual de um item do lote: do job, se ainda estiver em memória, senão do documento do relatório.
+    """
+    estado = {
+        **item,
+        "status": STATUS_FALHOU if item["erro"] else STATUS_NA_FILA,
+        "tempos_etapas": {},
+        "finalizado_em": None,
+    }
+    if item["erro"]:
+        return estado
+    job = obter_job(item["id_job"]) if item["id_job"] else None
+    if job is None:
+        db_instance = Database()
+        job = db_instance.find_one("relatorios", {"_id": ObjectId(item["relatorio_id"])}) or {}
+        db_instance.close()
+        if not job:
+            # Documento removido: geração cancelada ou relatório excluído
+            return {**estado, "status": STATUS_CANCELADO, "erro": "Relatório removido."}
+    return {
+        **estado,
+        "status": job.get("status") or STATUS_CONCLUIDO,
+        "erro": job.get("erro"),
+        "tempos_etapas": job.get("tempos_etapas") or {},
+        "finalizado_em": job.get("finalizado_em"),
+    }
+
+
+def _itens_gravados(id_lote: str) -> List[Dict[str, Any]]:
+    # Lote fora da memória (ex.: depois de reiniciar o servidor): os relatórios criados por ele
+    db_instance = Database()
+    relatorios = db_instance.find("relatorios", {"id_lote": id_lote})
+    db_instance.close()
+    return [
+        {
+            "id_lista": relatorio.get("id_lista"),
+            "nome": relatorio.get("nome"),
+            "relatorio_id": str(relatorio["_id"]),
+            "id_job": relatorio.get("id_job"),
+            "reaproveitado": False,
+            "erro": None,
+        }
+        for relatorio in sorted(relatorios, key=lambda r: r.get("criado_em") or datetime.min)
+    ]
+
+
+def resumo_lote(id_lote: str) -> Optional[Dict[str, Any]]:
+    """
+    Resumo de um lote: o estado de cada relatório (na ordem das entradas), quantos foram
+    concluídos, falharam, foram cancelados ou ainda estão em andamento e se o lote terminou.
+    Retorna None se o lote não existir.
+    """
+    with _lotes_lock:
+        lote = _lotes.get(id_lote)
+    if lote is not None:
+        itens, criado_em = lote["itens"], lote["criado_em"]
+    else:
+        itens = _itens_gravados(id_lote)
+        if not itens:
+            return None
+        criado_em = None
+    estados = [_estado_item(item) for item in itens]
+
+    def contar(*status: str) -> int:
+        return sum(1 for estado in estados if estado["status"] in status)
+
+    em_andamento = contar(STATUS_NA_FILA, STATUS_EM_EXECUCAO)
+    finalizados_em = [estado["finalizado_em"] for estado in estados if estado["finalizado_em"]]
+    duracao = None
+    if criado_em is not None:
+        fim = max(finalizados_em) if finalizados_em and not em_andamento else datetime.utcnow()
+        duracao = round(max(0.0, (fim - criado_em).total_seconds()), 3)
+    return {
+        "id_lote": id_lote,
+        "total": len(estados),
+        "concluidos": contar(STATUS_CONCLUIDO),
+        "falhas": contar(STATUS_FALHOU),
+        "cancelados": contar(STATUS_CANCELADO),
+        "em_andamento": em_andamento,
+        "finalizado": em_andamento == 0,
+        "criado_em": criado_em,
+        "duracao_segundos": duracao,
+        "relatorios": estados,
+    }
+
+
+def aguardar_lote(
+    id_lote: str,
+    ao_concluir: Optional[Callable[[Dict[str, Any]], None]] = None,
+    intervalo: float = 1.0
+) -> Optional[Dict[str, Any]]:
+    """
+    Aguarda todos os relatórios do lote terminarem e retorna o resumo final. `ao_concluir`
+    recebe o estado de cada relatório quando ele termina.
+    """
+    avisados = set()
+    while True:
+        resumo = resumo_lote(id_lote)
+        if resumo is None:
+            return None
+        for indice, estado in enumerate(resumo["relatorios"]):
+            if indice not in avisados and estado["status"] not in (STATUS_NA_FILA, STATUS_EM_EXECUCAO):
+                avisados.add(indice)
+                if ao_concluir:
+                    ao_concluir(estado)
+        if resumo["finalizado"]:
+            print(f"Lote {id_lote} finalizado: {resumo['concluidos']}/{resumo['total']} relatório(s) gerados em {resumo['duracao_segundos']}s.")
+            return resumo
+        time.sleep(intervalo)
+
+
+def gerar_relatorios_em_lote(
+    entradas: List[Any],
+    usuario: Optional[Dict[str, Any]] = None,
+    ao_concluir: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Submete o lote (ver `submeter_lote`) e aguarda até o fim. Usado pelo script
+    gerar_relatorios_lote.py; a API responde logo após a submissão.
+    """
+    resumo = submeter_lote(entradas, usuario)
+    return aguardar_lote(resumo["id_lote"], ao_concluir)
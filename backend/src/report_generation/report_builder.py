@@ -1,20 +1,53 @@
+import csv
+import io
 import json
+import logging
 import re
 import os
 import shutil
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, TextIO
 from pathlib import Path
 from datetime import datetime, date
 from babel.dates import format_date
 import unicodedata # Adicionado para transliteração de nomes de arquivo de imagem
 
 # Importa as funções de utilidade e JSON do core
-from ..core.json_utils import carregar_json_utf, _load_data_
+from ..core.json_utils import carregar_json_em_cache, _load_data_
 from ..core.config import Config
+from .latex_template import separar_segmentos, renderizar_template, renderizar_template_em_arquivo
+from .fragment_cache import chave_entrada_catalogo, obter_fragmento
+from .latex_format import DIRETORIO_CACHE_FORMATO
 
 # Inicializa a configuração
 config = Config("config.json")
 
+logger = logging.getLogger(__name__)
+
+# Tabelas de tradução para escape de caracteres especiais do LaTeX em uma única passada.
+# A barra invertida não é escapada de propósito: os textos do catálogo podem conter comandos LaTeX.
+_LATEX_ESCAPE_TABLE = str.maketrans({
+    '&': '\\&',
+    '%': '\\%',
+    '$': '\\$',
+    '#': '\\#',
+    '_': '\\_',
+    '{': '\\{',
+    '}': '\\}',
+    '~': '\\textasciitilde{}',
+    '^': '\\textasciicircum{}',
+})
+
+_LATEX_PATH_ESCAPE_TABLE = str.maketrans({
+    '_': '\\_',
+    '%': '\\%',
+    '$': '\\$',
+    '&': '\\&',
+    '~': '\\textasciitilde{}',
+    '^': '\\textasciicircum{}',
+    '{': '\\{',
+    '}': '\\}',
+})
+
 # =======================================================================
 # FUNÇÕES DE CARREGAMENTO DE VULNERABILIDADES DE ARQUIVOS TXT DE RELATÓRIO
 # Essas funções foram movidas para cá de json_parser.py e csv_parser.py
@@ -277,62 +310,137 @@ def escape_path_for_latex(path_str: str) -> str:
     # Reúne o diretório e o nome base limpo para o caminho completo antes do escape final
     full_path_cleaned = os.path.join(dir_name, base_name_cleaned).replace('\\', '/')
 
-    # Escapa caracteres especiais do LaTeX
-    full_path_escaped = full_path_cleaned.replace('_', '\\_')
-    full_path_escaped = full_path_escaped.replace('%', '\\%')
-    full_path_escaped = full_path_escaped.replace('$', '\\$')
-    full_path_escaped = full_path_escaped.replace('&', '\\&')
-    full_path_escaped = full_path_escaped.replace('~', '\\textasciitilde{}')
-    full_path_escaped = full_path_escaped.replace('^', '\\textasciicircum{}')
-    full_path_escaped = full_path_escaped.replace('{', '\\{')
-    full_path_escaped = full_path_escaped.replace('}', '\\}')
+    # Escapa caracteres especiais do LaTeX em uma única passada
+    full_path_escaped = full_path_cleaned.translate(_LATEX_PATH_ESCAPE_TABLE)
 
     return full_path_escaped
 
-def gerar_conteudo_latex_para_vulnerabilidades(
+def _renderizar_fragmento_catalogo(v: Dict[str, Any]) -> str:
+    """
+    Renderiza a parte estática de uma vulnerabilidade (título, imagem, descrição e solução),
+    que é idêntica em todos os relatórios para a mesma entrada do catálogo.
+    """
+    partes = [f"\\item \\textbf{{\\texttt{{{escape_latex(v['Vulnerabilidade'])}}}}}\\\\\n"]
+    if v["Imagem"]:
+        caminho_imagem_latex = escape_path_for_latex(v["Imagem"])
+        partes.append(
+            r"""
+                        \begin{figure}[h!]
+                        \centering
+                        \includegraphics[width=0.8\textwidth]{""" + caminho_imagem_latex + r"""}
+                        \end{figure}
+                        \FloatBarrier
+                        """
+        )
+    partes.append(f"\\textbf{{Descrição:}} {escape_latex(v['Descricao'])}\n\n")
+    partes.append(f"\\textbf{{Solução:}} {escape_latex(v['Solucao'])}\n\n")
+    return "".join(partes)
+
+
+def _escrever_lista_instancias(escrever, instancias: List[str]) -> None:
+    """
+    Escreve os itens `\\item \\url{...}` de uma lista de instâncias diretamente na saída.
+    """
+    for instancia in instancias:
+        escrever(f"    \\item \\url{{{instancia}}}\n")
+
+
+def _nome_arquivo_anexo(vulnerabilidade_nome: str, tipo_vulnerabilidade: str, nomes_usados: set) -> str:
+    """
+    Gera um nome de arquivo CSV único e seguro para LaTeX/sistema de arquivos a partir do nome da vulnerabilidade.
+    """
+    base = unicodedata.normalize('NFKD', vulnerabilidade_nome).encode('ascii', 'ignore').decode('utf-8')
+    base = re.sub(r'[^a-zA-Z0-9]+', '-', base).strip('-').lower()[:80] or "vulnerabilidade"
+    nome = f"{tipo_vulnerabilidade}-{base}.csv"
+    contador = 2
+    while nome in nomes_usados:
+        nome = f"{tipo_vulnerabilidade}-{base}-{contador}.csv"
+        contador += 1
+    nomes_usados.add(nome)
+    return nome
+
+
+def _escrever_anexo_vulnerabilidade(
+    escrever,
+    vulnerabilidade_nome: str,
+    instancias_afetadas: List[str],
+    label_instancias: str,
+    tipo_vulnerabilidade: str,
+    diretorio_anexos: Optional[str],
+    nomes_usados: set
+) -> None:
+    """
+    Escreve a entrada do Anexo A de uma vulnerabilidade.
+
+    Se houver mais instâncias que `limite_instancias_anexo` e um diretório de anexos for
+    informado, a lista completa é gravada em um CSV que acompanha o relatório e o anexo
+    tipografado mostra apenas o total e uma amostra.
+    """
+    conteudo_anexo_vuln_nome = escape_latex(vulnerabilidade_nome)
+    escrever(f"%-------------- INÍCIO DO ANEXO PARA {conteudo_anexo_vuln_nome} --------------\n")
+    escrever(f"\\subsubsection*{{{conteudo_anexo_vuln_nome} }}\n")
+
+    instancias_tipografadas = instancias_afetadas
+    if diretorio_anexos and len(instancias_afetadas) > config.limite_instancias_anexo:
+        nome_csv = _nome_arquivo_anexo(vulnerabilidade_nome, tipo_vulnerabilidade, nomes_usados)
+        os.makedirs(diretorio_anexos, exist_ok=True)
+        with open(os.path.join(diretorio_anexos, nome_csv), 'w', newline='', encoding='utf-8') as arquivo_csv:
+            writer = csv.writer(arquivo_csv)
+            writer.writerow(["Vulnerabilidade", label_instancias])
+            writer.writerows((vulnerabilidade_nome, instancia) for instancia in instancias_afetadas)
+
+        instancias_tipografadas = instancias_afetadas[:config.amostra_instancias_anexo]
+        escrever(
+            f"Total de instâncias afetadas: \\textbf{{{len(instancias_afetadas)}}}. "
+            f"Abaixo é exibida apenas uma amostra com {len(instancias_tipografadas)} itens; a lista completa está no arquivo "
+            f"\\texttt{{{escape_latex(nome_csv)}}}, que acompanha este relatório.\n\n"
+        )
+
+    escrever("\\begin{multicols}{3}\n\\small\n\\begin{itemize}\n")
+    _escrever_lista_instancias(escrever, instancias_tipografadas)
+    escrever("\\end{itemize}\n\\end{multicols}\n\n")
+
+
+def agrupar_vulnerabilidades(
     vulnerabilidades_do_relatorio_txt: List[Dict[str, Any]],
     vulnerabilidades_detalhes_json: List[Dict[str, Any]],
     descritivo_vulnerabilidades_json: Dict[str, Any],
     tipo_vulnerabilidade: str
-) -> str:
-    conteudo = ""
-    anexo_conteudo = ""
+) -> tuple:
+    """
+    Monta o modelo agregado do relatório: vulnerabilidades agrupadas por categoria e subcategoria,
+    com as descrições do catálogo, já na ordem em que aparecem no documento.
+
+    Retorna uma tupla `(categorias, vulnerabilidades_sem_categoria)`, onde cada categoria é um
+    dicionário com "categoria", "descricao" e "subcategorias" (cada uma com "subcategoria",
+    "descricao" e "vulnerabilidades"). É a base comum do conteúdo LaTeX e da pré-visualização HTML.
+    """
     categorias_agrupadas: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
-    categorias_formatadas: Dict[str, str] = {}
     vulnerabilidades_sem_categoria: List[str] = []
 
-    # Certifique-se de que descritivo_list é uma lista de categorias, não um dicionário aninhado
-    # _load_data_ já deve retornar o dicionário completo que contém a chave "vulnerabilidades"
-    # então você precisa pegar a lista de categorias que está dentro dela.
-    descritivo_data = descritivo_vulnerabilidades_json # descritivo_vulnerabilidades_json já é o dicionário completo.
-    descritivo_list = descritivo_data.get("vulnerabilidades", []) # Correção para acessar a lista real.
+    # descritivo_vulnerabilidades_json já é o dicionário completo; a lista de categorias fica na chave "vulnerabilidades".
+    descritivo_list = descritivo_vulnerabilidades_json.get("vulnerabilidades", [])
 
+    # Índices por nome (mantendo a primeira ocorrência) para evitar buscas lineares a cada vulnerabilidade
+    detalhes_por_nome: Dict[str, Dict[str, Any]] = {}
+    for vuln in vulnerabilidades_detalhes_json:
+        detalhes_por_nome.setdefault(vuln.get("Vulnerabilidade"), vuln)
+    descritivo_por_categoria: Dict[str, Dict[str, Any]] = {}
+    for item in descritivo_list:
+        descritivo_por_categoria.setdefault(item.get("categoria"), item)
 
     for v in vulnerabilidades_do_relatorio_txt:
         vulnerabilidade_nome = v["Vulnerabilidade"]
-        dados_vuln = next(
-            (vuln for vuln in vulnerabilidades_detalhes_json if vuln.get("Vulnerabilidade") == vulnerabilidade_nome),
-            None
-        )
+        dados_vuln = detalhes_por_nome.get(vulnerabilidade_nome)
         if dados_vuln:
             categoria_original = dados_vuln.get("Categoria", "Sem Categoria")
             subcategoria_original = dados_vuln.get("Subcategoria", "Outras")
-            descricao = dados_vuln.get("Descrição", "Descrição não disponível.")
-            solucao = dados_vuln.get("Solução", "Solução não disponível.")
-            imagem = dados_vuln.get("Imagem", "")
-            categoria_pad = categoria_original
-            subcategoria_pad = subcategoria_original
-            categorias_formatadas[categoria_pad] = categoria_original
-            categorias_formatadas[subcategoria_pad] = subcategoria_original
-            if categoria_pad not in categorias_agrupadas:
-                categorias_agrupadas[categoria_pad] = {}
-            if subcategoria_pad not in categorias_agrupadas[categoria_pad]:
-                categorias_agrupadas[categoria_pad][subcategoria_pad] = []
             item_para_agrupar = {
                 "Vulnerabilidade": vulnerabilidade_nome,
-                "Descricao": descricao,
-                "Solucao": solucao,
-                "Imagem": imagem,
+                "Descricao": dados_vuln.get("Descrição", "Descrição não disponível."),
+                "Solucao": dados_vuln.get("Solução", "Solução não disponível."),
+                "Imagem": dados_vuln.get("Imagem", ""),
+                "ChaveFragmento": chave_entrada_catalogo(dados_vuln),
             }
             if tipo_vulnerabilidade == "webapp":
                 uri_list = v.get("URI Afetadas", [])
@@ -341,149 +449,155 @@ def gerar_conteudo_latex_para_vulnerabilidades(
             else:
                 item_para_agrupar["Total de Hosts Afetados"] = v.get("Total de Hosts Afetados", 0)
                 item_para_agrupar["Hosts Afetados"] = v.get("Hosts", [])
-            categorias_agrupadas[categoria_pad][subcategoria_pad].append(item_para_agrupar)
+            categorias_agrupadas.setdefault(categoria_original, {}).setdefault(subcategoria_original, []).append(item_para_agrupar)
         else:
             vulnerabilidades_sem_categoria.append(vulnerabilidade_nome)
 
-    categorias_ordenadas = sorted(categorias_agrupadas.keys(), key=lambda x: categorias_formatadas.get(x, x))
+    categorias_ordenadas = sorted(categorias_agrupadas.keys())
     outras_criticas_key = "Outras Vulnerabilidades Críticas e Explorações"
     if outras_criticas_key in categorias_ordenadas:
         categorias_ordenadas.remove(outras_criticas_key)
         categorias_ordenadas.append(outras_criticas_key)
 
-    for categoria_padronizada in categorias_ordenadas:
-        categoria_formatada = categorias_formatadas.get(categoria_padronizada, categoria_padronizada)
-        # Primeiro, encontre a descrição da categoria principal
-        descricao_categoria = next(
-            (item["descricao"] for item in descritivo_list
-             if item.get("categoria") == categoria_padronizada and "subcategoria" not in item),
-            "Descrição não disponível."
-        )
-        conteudo += f"%-------------- INÍCIO DA CATEGORIA {categoria_formatada} --------------\n"
-        conteudo += f"\\subsection{{{categoria_formatada}}}\n{escape_latex(descricao_categoria)}\n\n"
-
-        subcategorias = categorias_agrupadas.get(categoria_padronizada, {})
-        for subcategoria_padronizada in sorted(subcategorias.keys(), key=lambda x: categorias_formatadas.get(x, x)):
-            subcategoria_formatada = categorias_formatadas.get(subcategoria_padronizada, subcategoria_padronizada)
-
-            descricao_subcategoria = "Descrição não disponível."
-            target_categoria_padded = categoria_formatada
-            target_subcategoria_padded = subcategoria_formatada
+    categorias: List[Dict[str, Any]] = []
+    for categoria_nome in categorias_ordenadas:
+        categoria_do_descritivo = descritivo_por_categoria.get(categoria_nome)
+        descricao_categoria = "Descrição não disponível."
+        if categoria_do_descritivo:
+            descricao_categoria = categoria_do_descritivo.get("descricao", descricao_categoria)
+
+        descricoes_subcategorias: Dict[str, str] = {}
+        if categoria_do_descritivo:
+            for item_sub_desc in categoria_do_descritivo.get("subcategorias", []):
+                descricoes_subcategorias.setdefault(item_sub_desc.get("subcategoria"), item_sub_desc.get("descricao"))
+
+        subcategorias = categorias_agrupadas[categoria_nome]
+        lista_subcategorias: List[Dict[str, Any]] = []
+        for subcategoria_nome in sorted(subcategorias.keys()):
+            descricao_subcategoria = descricoes_subcategorias.get(subcategoria_nome)
+            if descricao_subcategoria is None:
+                logger.warning(
+                    "Nenhuma descrição encontrada para a categoria '%s' e subcategoria '%s'",
+                    categoria_nome, subcategoria_nome
+                )
+                descricao_subcategoria = "Descrição não disponível."
+            lista_subcategorias.append({
+                "subcategoria": subcategoria_nome,
+                "descricao": descricao_subcategoria,
+                "vulnerabilidades": sorted(subcategorias[subcategoria_nome], key=lambda x: x['Vulnerabilidade']),
+            })
 
-            found_match_in_descritivo = False
+        categorias.append({
+            "categoria": categoria_nome,
+            "descricao": descricao_categoria,
+            "subcategorias": lista_subcategorias,
+        })
 
-            # Itere através das subcategorias da categoria principal no descritivo original
-            # para encontrar a descrição correta da subcategoria.
-            # Você precisa acessar a lista de subcategorias dentro da categoria correspondente.
-            categoria_do_descritivo = next(
-                (item for item in descritivo_list if item.get("categoria") == categoria_padronizada),
-                None
-            )
+    return categorias, vulnerabilidades_sem_categoria
 
-            if categoria_do_descritivo and "subcategorias" in categoria_do_descritivo:
-                for item_sub_desc in categoria_do_descritivo["subcategorias"]:
-                    item_desc_subcategoria_name = item_sub_desc.get("subcategoria")
 
-                    # ADD THESE PRINT STATEMENTS for debugging
-                    print(f"Comparing SUB: target_cat='{target_categoria_padded}' (found in descritivo_list)")
-                    print(f"Comparing SUB: target_sub='{target_subcategoria_padded}' vs item_desc_sub_name='{item_desc_subcategoria_name}'")
-                    print(f"Types SUB: target_sub={type(target_subcategoria_padded)}, item_desc_sub_name={type(item_desc_subcategoria_name)}")
+def gerar_conteudo_latex_para_vulnerabilidades(
+    vulnerabilidades_do_relatorio_txt: List[Dict[str, Any]],
+    vulnerabilidades_detalhes_json: List[Dict[str, Any]],
+    descritivo_vulnerabilidades_json: Dict[str, Any],
+    tipo_vulnerabilidade: str,
+    saida: Optional[TextIO] = None,
+    diretorio_anexos: Optional[str] = None
+) -> str:
+    """
+    Gera o conteúdo LaTeX das vulnerabilidades agrupadas por categoria e subcategoria.
 
+    Os fragmentos são escritos diretamente em `saida` (arquivo ou buffer), sem concatenação
+    de strings. Se `saida` não for informado, o conteúdo é acumulado em um `io.StringIO`
+    e retornado; caso contrário a função retorna uma string vazia.
 
-                    if item_desc_subcategoria_name == target_subcategoria_padded:
-                        descricao_subcategoria = item_sub_desc["descricao"]
-                        found_match_in_descritivo = True
-                        break
+    Se `diretorio_anexos` for informado, listas de instâncias maiores que o limite configurado
+    são gravadas em CSVs nesse diretório em vez de tipografadas por completo no Anexo A.
+    """
+    buffer = None
+    if saida is None:
+        buffer = io.StringIO()
+        saida = buffer
+    escrever = saida.write
+
+    categorias, vulnerabilidades_sem_categoria = agrupar_vulnerabilidades(
+        vulnerabilidades_do_relatorio_txt,
+        vulnerabilidades_detalhes_json,
+        descritivo_vulnerabilidades_json,
+        tipo_vulnerabilidade
+    )
 
-            if not found_match_in_descritivo:
-                print(f"WARNING: No description found for category '{target_categoria_padded}' and subcategory '{target_subcategoria_padded}'")
+    # Vulnerabilidades com mais de 10 instâncias: a lista completa vai para o Anexo A,
+    # que é emitido depois do corpo sem precisar de um segundo buffer.
+    vulnerabilidades_anexo: List[tuple] = []
 
+    for categoria in categorias:
+        categoria_nome = categoria["categoria"]
+        escrever(f"%-------------- INÍCIO DA CATEGORIA {categoria_nome} --------------\n")
+        escrever(f"\\subsection{{{categoria_nome}}}\n{escape_latex(categoria['descricao'])}\n\n")
 
-            conteudo += f"%-------------- INÍCIO DA SUBCATEGORIA {subcategoria_formatada} --------------\n"
-            conteudo += f"\\subsubsection{{{subcategoria_formatada}}}\n{escape_latex(descricao_subcategoria)}\n\n"
-            conteudo += "\\begin{enumerate}\n"
+        for subcategoria in categoria["subcategorias"]:
+            subcategoria_nome = subcategoria["subcategoria"]
+            escrever(f"%-------------- INÍCIO DA SUBCATEGORIA {subcategoria_nome} --------------\n")
+            escrever(f"\\subsubsection{{{subcategoria_nome}}}\n{escape_latex(subcategoria['descricao'])}\n\n")
+            escrever("\\begin{enumerate}\n")
 
-            vulns_ordenadas = sorted(subcategorias[subcategoria_padronizada], key=lambda x: x['Vulnerabilidade'])
-            for v in vulns_ordenadas:
-                conteudo += f"%-------------- INÍCIO DA VULNERABILIDADE {v['Vulnerabilidade']} --------------\n"
-                conteudo += f"\\item \\textbf{{\\texttt{{{escape_latex(v['Vulnerabilidade'])}}}}}\\\\\n"
-                if v["Imagem"]:
-                    caminho_imagem_latex = escape_path_for_latex(v["Imagem"])
-                    conteudo += (
-                        r"""
-                        \begin{figure}[h!]
-                        \centering
-                        \includegraphics[width=0.8\textwidth]{""" + caminho_imagem_latex + r"""}
-                        \end{figure}
-                        \FloatBarrier
-                        """
-                    )
-                conteudo += f"\\textbf{{Descrição:}} {escape_latex(v['Descricao'])}\n\n"
-                conteudo += f"\\textbf{{Solução:}} {escape_latex(v['Solucao'])}\n\n"
+            for v in subcategoria["vulnerabilidades"]:
+                escrever(f"%-------------- INÍCIO DA VULNERABILIDADE {v['Vulnerabilidade']} --------------\n")
+                # Título, imagem, descrição e solução só dependem da entrada do catálogo: vêm do cache de fragmentos
+                escrever(obter_fragmento(v["ChaveFragmento"], lambda: _renderizar_fragmento_catalogo(v)))
 
                 if tipo_vulnerabilidade == "webapp":
-                    conteudo += f"\\textbf{{Total de URIs Afetadas:}} {v.get('Total de URIs Afetadas', 0)}\n\n"
+                    escrever(f"\\textbf{{Total de URIs Afetadas:}} {v.get('Total de URIs Afetadas', 0)}\n\n")
                     instancias_afetadas = v.get("URIs Afetadas", [])
                     label_instancias = "URIs Afetadas"
                 else:
-                    conteudo += f"\\textbf{{Total de Hosts Afetados:}} {v.get('Total de Hosts Afetados', 0)}\n\n"
+                    escrever(f"\\textbf{{Total de Hosts Afetados:}} {v.get('Total de Hosts Afetados', 0)}\n\n")
                     instancias_afetadas = v.get("Hosts Afetados", [])
                     label_instancias = "Hosts Afetados"
 
                 if len(instancias_afetadas) > 10:
-                    conteudo += f"\\textbf{{{label_instancias} (parcial):}}\n\\begin{{itemize}}\n"
-                    for instancia in instancias_afetadas[:10]:
-                        conteudo += f"    \\item \\url{{{instancia}}}\n"
-                    conteudo += "\\end{itemize}\n"
-                    conteudo += (
+                    escrever(f"\\textbf{{{label_instancias} (parcial):}}\n\\begin{{itemize}}\n")
+                    _escrever_lista_instancias(escrever, instancias_afetadas[:10])
+                    escrever("\\end{itemize}\n")
+                    escrever(
                         "A lista completa das instâncias que possuem esta vulnerabilidade pode ser "
                         f"encontrada no \\hyperref[anexoA]{{Anexo A}}.\\\\[0.5em]\n\n"
                     )
-
-                    conteudo_anexo_vuln_nome = escape_latex(v['Vulnerabilidade'])
-                    anexo_conteudo += f"%-------------- INÍCIO DO ANEXO PARA {conteudo_anexo_vuln_nome} --------------\n"
-                    anexo_conteudo += f"\\subsubsection*{{{conteudo_anexo_vuln_nome} }}\n"
-                    anexo_conteudo += "\\begin{multicols}{3}\n\\small\n\\begin{itemize}\n"
-                    for instancia in instancias_afetadas:
-                        anexo_conteudo += f"    \\item \\url{{{instancia}}}\n"
-                    anexo_conteudo += "\\end{itemize}\n\\end{multicols}\n\n"
+                    vulnerabilidades_anexo.append((v['Vulnerabilidade'], instancias_afetadas, label_instancias))
                 else:
-                    conteudo += f"\\textbf{{{label_instancias}:}}\n\\begin{{itemize}}\n"
-                    for instancia in instancias_afetadas:
-                        conteudo += f"    \\item \\url{{{instancia}}}\n"
-                    conteudo += "\\end{itemize}\n\n"
-                conteudo += f"%-------------- FIM DA VULNERABILIDADE {v['Vulnerabilidade']} --------------\n"
-
-            conteudo += "\\end{enumerate}\n"
-            conteudo += f"%-------------- FIM DA SUBCATEGORIA {subcategoria_formatada} --------------\n"
-
-        conteudo += f"%-------------- FIM DA CATEGORIA {categoria_formatada} --------------\n"
+                    escrever(f"\\textbf{{{label_instancias}:}}\n\\begin{{itemize}}\n")
+                    _escrever_lista_instancias(escrever, instancias_afetadas)
+                    escrever("\\end{itemize}\n\n")
+                escrever(f"%-------------- FIM DA VULNERABILIDADE {v['Vulnerabilidade']} --------------\n")
+
+            escrever("\\end{enumerate}\n")
+            escrever(f"%-------------- FIM DA SUBCATEGORIA {subcategoria_nome} --------------\n")
+
+        escrever(f"%-------------- FIM DA CATEGORIA {categoria_nome} --------------\n")
+
+    if vulnerabilidades_anexo:
+        escrever("%-------------- INÍCIO DO ANEXO A --------------\n")
+        escrever("\\section*{Anexo A}\n\\label{anexoA}\n")
+        nomes_anexos_usados: set = set()
+        for vulnerabilidade_nome, instancias_afetadas, label_instancias in vulnerabilidades_anexo:
+            _escrever_anexo_vulnerabilidade(
+                escrever, vulnerabilidade_nome, instancias_afetadas, label_instancias,
+                tipo_vulnerabilidade, diretorio_anexos, nomes_anexos_usados
+            )
+        escrever("%-------------- FIM DO ANEXO A --------------\n")
 
-    if anexo_conteudo:
-        conteudo += "%-------------- INÍCIO DO ANEXO A --------------\n"
-        conteudo += "\\section*{Anexo A}\n\\label{anexoA}\n"
-        conteudo += anexo_conteudo
-        conteudo += "%-------------- FIM DO ANEXO A --------------\n"
+    if vulnerabilidades_sem_categoria:
+        logger.debug("Vulnerabilidades sem dados no catálogo: %s", vulnerabilidades_sem_categoria)
 
-    return conteudo
+    return buffer.getvalue() if buffer is not None else ""
 
 
 def escape_latex(text: str) -> str:
     """
-    Escapes special LaTeX characters in a string.
+    Escapes special LaTeX characters in a string (single pass via translate table).
     """
-    text = text.replace('&', '\\&')
-    text = text.replace('%', '\\%')
-    text = text.replace('$', '\\$')
-    text = text.replace('#', '\\#')
-    text = text.replace('_', '\\_')
-    text = text.replace('{', '\\{')
-    text = text.replace('}', '\\}')
-    text = text.replace('~', '\\textasciitilde{}')
-    text = text.replace('^', '\\textasciicircum{}')
-    # REMOVA A LINHA ABAIXO:
-    # text = text.replace('\\', '\\textbackslash{}')
-    return text
+    return text.translate(_LATEX_ESCAPE_TABLE)
 
 
 def montar_conteudo_latex(
@@ -498,19 +612,19 @@ def montar_conteudo_latex(
     try:
         vulnerabilidades_do_txt = carregar_vulnerabilidades_do_relatorio(caminho_relatorio_txt_webapp)
         # Carrega o JSON LIMPO (SEM O _cleaned.json, pois o usuário manteve o mesmo nome)
-        vulnerabilidades_dados_json = carregar_json_utf(caminho_dados_vulnerabilidades_webapp_json)
+        vulnerabilidades_dados_json = carregar_json_em_cache(caminho_dados_vulnerabilidades_webapp_json)
         # Carrega o JSON LIMPO (SEM O _cleaned.json, pois o usuário manteve o mesmo nome)
-        descritivo_json = carregar_json_utf(caminho_descritivo_webapp_json)
-
-        conteudo_latex_final = gerar_conteudo_latex_para_vulnerabilidades(
-            vulnerabilidades_do_txt,
-            vulnerabilidades_dados_json,
-            descritivo_json,
-            "webapp"
-        )
+        descritivo_json = carregar_json_em_cache(caminho_descritivo_webapp_json)
 
         with open(caminho_saida_latex_temp, 'w', encoding='utf-8') as file:
-            file.write(conteudo_latex_final)
+            gerar_conteudo_latex_para_vulnerabilidades(
+                vulnerabilidades_do_txt,
+                vulnerabilidades_dados_json,
+                descritivo_json,
+                "webapp",
+                saida=file,
+                diretorio_anexos=os.path.join(os.path.dirname(caminho_saida_latex_temp), "anexos")
+            )
         print(f"Conteúdo LaTeX para Web Apps gerado em: {caminho_saida_latex_temp}")
     except Exception as e:
         print(f"Erro ao montar conteúdo LaTeX para Web Apps: {e}")
@@ -527,55 +641,139 @@ def montar_conteudo_latex_csv(
     try:
         vulnerabilidades_do_txt_csv = carregar_vulnerabilidades_do_relatorio_csv(caminho_relatorio_txt_servers)
         
-        vulnerabilidades_dados_json = carregar_json_utf(caminho_dados_vulnerabilidades_servers_json)
+        vulnerabilidades_dados_json = carregar_json_em_cache(caminho_dados_vulnerabilidades_servers_json)
         
-        descritivo_json = carregar_json_utf(caminho_descritivo_servers_json)
-
-        conteudo_latex_final = gerar_conteudo_latex_para_vulnerabilidades(
-            vulnerabilidades_do_txt_csv,
-            vulnerabilidades_dados_json,
-            descritivo_json,
-            "servers"
-        )
+        descritivo_json = carregar_json_em_cache(caminho_descritivo_servers_json)
 
         with open(caminho_saida_latex_temp, 'w', encoding='utf-8') as file:
-            file.write(conteudo_latex_final)
+            gerar_conteudo_latex_para_vulnerabilidades(
+                vulnerabilidades_do_txt_csv,
+                vulnerabilidades_dados_json,
+                descritivo_json,
+                "servers",
+                saida=file,
+                diretorio_anexos=os.path.join(os.path.dirname(caminho_saida_latex_temp), "anexos")
+            )
         print(f"Conteúdo LaTeX para Servidores gerado em: {caminho_saida_latex_temp}")
     except Exception as e:
         print(f"Erro ao montar conteúdo LaTeX para Servidores: {e}")
 
 
-def copiar_relatorio_exemplo(caminho_relatorio_exemplo: str, caminho_saida: str):
+# Arquivos do template reescritos em cada relatório: sempre copiados, nunca vinculados,
+# para que a escrita não altere o template original através do hardlink.
+ARQUIVOS_TEMPLATE_GERADOS = {"main.tex"}
+
+# Pasta (no relatório preprocessado e no RelatorioPronto) com os gráficos gerados para o relatório;
+# o main.tex do template referencia os gráficos por este caminho relativo.
+DIRETORIO_GRAFICOS = "graficos"
+
+# Imagem do template usada quando um gráfico não foi gerado para o relatório (ex.: lista sem scans de servidores),
+# pelo nome do gráfico sem extensão (o gráfico por site pode ser PNG ou PDF)
+_GRAFICOS_PADRAO_TEMPLATE = {
+    "total-vulnerabilidades-vm-donut": "assets/images-vmscan/total-vulnerabilidades-vm-donut.png",
+    "total-vulnerabilidades-was-donut": "assets/images-was/total-vulnerabilidades-was-donut.png",
+    "vulnerabilidades-x-site": "assets/images-was/vulnerabilidades-x-site.png",
+}
+
+
+def vincular_arquivo(origem: Path, destino: Path, modo: str = "link") -> str:
     """
-    Copia a estrutura base do template LaTeX para a pasta de geração do relatório.
+    Traz um arquivo somente-leitura para a pasta de destino.
+
+    No modo 'link' tenta um hardlink, depois um symlink e, se o sistema de arquivos
+    não suportar nenhum dos dois, recorre à cópia. Retorna o método efetivamente usado.
     """
+    if modo == "link":
+        try:
+            os.link(origem, destino)
+            return "hardlink"
+        except OSError:
+            pass
+        try:
+            os.symlink(Path(origem).resolve(), destino)
+            return "symlink"
+        except OSError:
+            pass
+    shutil.copy2(origem, destino)
+    return "copia"
+
+
+def copiar_relatorio_exemplo(caminho_relatorio_exemplo: str, caminho_saida: str, modo: Optional[str] = None):
+    """
+    Monta a estrutura base do template LaTeX na pasta de geração do relatório.
+
+    No modo 'link' (padrão, ver `modo_assets_template` na configuração) apenas os arquivos
+    gerados por relatório são copiados; os assets somente-leitura (imagens, preâmbulo,
+    bibliografia) são vinculados ao template. No modo 'copia' toda a árvore é copiada.
+    """
+    modo = modo or config.modo_assets_template
     try:
         src = Path(caminho_relatorio_exemplo)
         dst = Path(caminho_saida)
         if dst.exists():
             shutil.rmtree(dst)
-        shutil.copytree(src, dst)
-        print(f"Estrutura base do relatório copiada de '{src}' para '{dst}'")
 
-        # --- NOVO: Verificação explícita do arquivo preambulo.tex após a cópia ---
-        copied_preambulo_path = dst / "preambulo.tex"
-        if copied_preambulo_path.exists():
-            print(f"DEBUG: 'preambulo.tex' foi copiado com sucesso para: {copied_preambulo_path}")
+        if modo == "copia":
+            shutil.copytree(src, dst, ignore=shutil.ignore_patterns(DIRETORIO_CACHE_FORMATO))
+            print(f"Estrutura base do relatório copiada de '{src}' para '{dst}'")
         else:
+            metodos_usados: Dict[str, int] = {}
+            for raiz, pastas, arquivos in os.walk(src):
+                # O cache de formatos do preâmbulo fica ao lado do template, mas não faz parte dele
+                pastas[:] = [pasta for pasta in pastas if pasta != DIRETORIO_CACHE_FORMATO]
+                pasta_destino = dst / Path(raiz).relative_to(src)
+                pasta_destino.mkdir(parents=True, exist_ok=True)
+                for nome_arquivo in arquivos:
+                    origem = Path(raiz) / nome_arquivo
+                    destino = pasta_destino / nome_arquivo
+                    if origem.relative_to(src).as_posix() in ARQUIVOS_TEMPLATE_GERADOS:
+                        shutil.copy2(origem, destino)
+                        metodo = "copia"
+                    else:
+                        metodo = vincular_arquivo(origem, destino, modo)
+                    metodos_usados[metodo] = metodos_usados.get(metodo, 0) + 1
+            print(f"Estrutura base do relatório vinculada de '{src}' para '{dst}': {metodos_usados}")
+
+        copied_preambulo_path = dst / "preambulo.tex"
+        if not copied_preambulo_path.exists():
             print(f"ERRO: 'preambulo.tex' NÃO foi encontrado em: {copied_preambulo_path} APÓS a cópia.")
-        # --- FIM NOVO ---
 
     except Exception as e:
         print(f"Erro ao copiar a estrutura de exemplo do relatório: {e}")
 
 
+def vincular_graficos_relatorio(caminhos_graficos: List[str], caminho_relatorio_pronto: str) -> None:
+    """
+    Vincula os gráficos gerados para o relatório na pasta `graficos` do RelatorioPronto, com o
+    mesmo nome de arquivo. Gráficos que não foram gerados são substituídos pela imagem padrão
+    correspondente do template (com a extensão da imagem padrão), para que o \\includegraphics
+    do main.tex sempre encontre o arquivo.
+    """
+    pasta_graficos = Path(caminho_relatorio_pronto) / DIRETORIO_GRAFICOS
+    pasta_graficos.mkdir(parents=True, exist_ok=True)
+    for caminho_grafico in caminhos_graficos:
+        if not caminho_grafico:
+            continue
+        origem = Path(caminho_grafico)
+        destino = pasta_graficos / origem.name
+        if not origem.is_file():
+            padrao = _GRAFICOS_PADRAO_TEMPLATE.get(origem.stem)
+            origem = Path(config.caminho_report_templates_base) / padrao if padrao else None
+            if origem is None or not origem.is_file():
+                print(f"Aviso: gráfico '{caminho_grafico}' não encontrado e sem imagem padrão no template.")
+                continue
+            print(f"Aviso: gráfico '{caminho_grafico}' não foi gerado; usando a imagem padrão do template.")
+            destino = destino.with_suffix(origem.suffix)
+        vincular_arquivo(origem, destino, config.modo_assets_template)
+
+
 def substituir_placeholders(conteudo: str, substituicoes_globais: Dict[str, str]) -> str:
     """
-    Substitui placeholders [CHAVE] no conteúdo LaTeX por valores fornecidos.
+    Substitui placeholders [CHAVE] no conteúdo LaTeX por valores fornecidos, em uma única passada.
     """
-    for alvo, novo in substituicoes_globais.items():
-        conteudo = conteudo.replace(f'[{alvo}]', novo)
-    return conteudo
+    buffer = io.StringIO()
+    renderizar_template(separar_segmentos(conteudo), substituicoes_globais, buffer)
+    return buffer.getvalue()
 
 def terminar_relatorio_preprocessado(
     nome_secretaria: str,
@@ -613,26 +811,31 @@ def terminar_relatorio_preprocessado(
         caminho_relatorio_pronto
     )
 
-    with open(os.path.join(caminho_relatorio_pronto, 'main.tex'), 'r', encoding='utf-8') as f:
-        latex_code = f.read()
+    # Os gráficos deste relatório entram em RelatorioPronto/graficos; daqui em diante são referenciados pelo
+    # caminho relativo sem extensão, já que o arquivo vinculado pode ser PNG ou PDF (ou a imagem padrão do template)
+    vincular_graficos_relatorio(
+        [graph_output_vm_donut, graph_output_webapp_donut, graph_output_webapp_x_site],
+        caminho_relatorio_pronto
+    )
+    graph_output_vm_donut, graph_output_webapp_donut, graph_output_webapp_x_site = (
+        f"{DIRETORIO_GRAFICOS}/{Path(caminho).stem}" if caminho else caminho
+        for caminho in (graph_output_vm_donut, graph_output_webapp_donut, graph_output_webapp_x_site)
+    )
 
-    relatorio_sites_conteudo = []
-    caminho_sites_vulnerabilidades_latex = os.path.join(caminho_relatorio_preprocessado, "(LATEX)Sites_agrupados_por_vulnerabilidades.txt")
-    if os.path.exists(caminho_sites_vulnerabilidades_latex):
-        with open(caminho_sites_vulnerabilidades_latex, "r", encoding='utf-8') as file:
-            relatorio_sites_conteudo = file.readlines()
+    # Os conteúdos gerados são injetados a partir dos arquivos, sem serem lidos inteiros em memória
+    relatorio_sites_final = ""
+    caminho_sites_vulnerabilidades_latex = Path(caminho_relatorio_preprocessado) / "(LATEX)Sites_agrupados_por_vulnerabilidades.txt"
+    if caminho_sites_vulnerabilidades_latex.exists():
+        relatorio_sites_final = caminho_sites_vulnerabilidades_latex
     else:
         print(f"Aviso: Arquivo '{caminho_sites_vulnerabilidades_latex}' não encontrado.")
-    relatorio_sites_final = ''.join(relatorio_sites_conteudo)
 
-    relatorio_servidores_conteudo = []
-    caminho_servidores_vulnerabilidades_latex = os.path.join(caminho_relatorio_preprocessado, "(LATEX)Servidores_agrupados_por_vulnerabilidades.txt")
-    if os.path.exists(caminho_servidores_vulnerabilidades_latex):
-        with open(caminho_servidores_vulnerabilidades_latex, "r", encoding='utf-8') as file:
-            relatorio_servidores_conteudo = file.readlines()
+    relatorio_servidores_final = ""
+    caminho_servidores_vulnerabilidades_latex = Path(caminho_relatorio_preprocessado) / "(LATEX)Servidores_agrupados_por_vulnerabilidades.txt"
+    if caminho_servidores_vulnerabilidades_latex.exists():
+        relatorio_servidores_final = caminho_servidores_vulnerabilidades_latex
     else:
         print(f"Aviso: Arquivo '{caminho_servidores_vulnerabilidades_latex}' não encontrado.")
-    relatorio_servidores_final = ''.join(relatorio_servidores_conteudo)
 
     total_vulnerabilidades_combinado = int(total_vulnerabilidades_web) + int(total_vulnerabilidade_vm)
 
@@ -708,11 +911,10 @@ def terminar_relatorio_preprocessado(
             """, # NOVO: Adicione este placeholder
     }
 
-    latex_editado = substituir_placeholders(
-        conteudo=latex_code,
-        substituicoes_globais=substituicoes_globais
+    # O template base é compilado uma única vez (cache por mtime/tamanho) e renderizado direto no main.tex final
+    renderizar_template_em_arquivo(
+        os.path.join(config.caminho_report_templates_base, "main.tex"),
+        substituicoes_globais,
+        os.path.join(caminho_relatorio_pronto, "main.tex")
     )
-
-    with open(os.path.join(caminho_relatorio_pronto, "main.tex"), "w", encoding="utf-8") as f:
-        f.write(latex_editado)
     print(f"Relatório LaTeX final (main.tex) salvo em: {os.path.join(caminho_relatorio_pronto, 'main.tex')}")
\ No newline at end of file
@@ -0,0 +1,416 @@
+# backend/src/report_generation/report_jobs.py
+
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+
+from ..core.config import Config
+from ..core.database import Database
+from .cancellation import TarefaCancelada, verificar_cancelamento
+
+config = Config("config.json")
+
+STATUS_NA_FILA = "na_fila"
+STATUS_EM_EXECUCAO = "em_execucao"
+STATUS_CONCLUIDO = "concluido"
+STATUS_FALHOU = "falhou"
+STATUS_CANCELADO = "cancelado"
+
+# Jobs finalizados ficam consultáveis em memória por este intervalo; depois, só pelo documento em `relatorios`
+_RETENCAO_JOBS_SEGUNDOS = 3600
+
+# Eventos de progresso mantidos por job para quem se conectar (ou reconectar) ao stream
+_MAX_EVENTOS_POR_JOB = 200
+
+_executor = ThreadPoolExecutor(max_workers=max(1, config.max_jobs_relatorio), thread_name_prefix="job-relatorio")
+# Jobs das gerações em lote: pool próprio, para que um lote grande não atrase as gerações individuais
+_executor_lote = ThreadPoolExecutor(max_workers=max(1, config.max_relatorios_paralelos_lote), thread_name_prefix="job-lote")
+_jobs_lock = threading.Lock()
+# Notifica quem aguarda eventos de progresso (ver `aguardar_eventos`)
+_novos_eventos = threading.Condition(_jobs_lock)
+_jobs: Dict[str, Dict[str, Any]] = {}
+# Serializa a verificação de duplicatas e a criação do job (ver `submeter_job_unico`)
+_submissao_lock = threading.Lock()
+
+# Erro registrado nos relatórios cujo job se perdeu com a reinicialização do processo
+ERRO_JOB_INTERROMPIDO = "Geração interrompida pela reinicialização do servidor."
+
+
+def _instancia() -> str:
+    """Processo dono dos jobs (host:pid), gravado no relatório para `recuperar_jobs_interrompidos`."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _registrar_no_relatorio(relatorio_id: str, campos: Dict[str, Any]) -> None:
+    """
+    Grava o estado do job no documento do relatório, para que ele possa ser consultado
+    por qualquer processo do servidor e depois que o job sair da memória.
+    """
+    try:
+        db_instance = Database()
+        db_instance.update_one("relatorios", {"_id": ObjectId(relatorio_id)}, campos)
+        db_instance.close()
+    except Exception as e:
+        print(f"Aviso: não foi possível registrar o estado do job no relatório {relatorio_id}: {e}")
+
+
+def _publicar_evento(job: Dict[str, Any], evento: Dict[str, Any]) -> None:
+    """
+    Acrescenta um evento de progresso ao job (com número de sequência, status e tempo decorrido)
+    e acorda quem estiver aguardando. Deve ser chamada com `_jobs_lock` adquirido.
+    """
+    job["_seq"] += 1
+    decorrido = time.monotonic() - job["_inicio"] if job["_inicio"] is not None else 0.0
+    job["progresso"] = {
+        **job["progresso"],
+        **evento,
+        "seq": job["_seq"],
+        "status": job["status"],
+        "decorrido_segundos": round(decorrido, 3),
+    }
+    job["_eventos"].append(dict(job["progresso"]))
+    _novos_eventos.notify_all()
+
+
+def _atualizar(job: Dict[str, Any], **campos: Any) -> None:
+    with _jobs_lock:
+        job.update(campos)
+        _publicar_evento(job, {"erro": job["erro"]})
+        estado = {
+            "status": job["status"],
+            "etapa": job["etapa"],
+            "erro": job["erro"],
+            "tempos_etapas": dict(job["tempos_etapas"]),
+            "prazo": job["prazo"],
+            "iniciado_em": job["iniciado_em"],
+            "finalizado_em": job["finalizado_em"],
+            "percentual": job["progresso"].get("percentual", 0),
+        }
+    _registrar_no_relatorio(job["relatorio_id"], estado)
+
+
+def _descartar_relatorio(relatorio_id: str) -> None:
+    """
+    Remove a pasta (generated_reports/<id>) e o documento de um relatório cuja geração foi
+    cancelada; o estado final do job continua consultável em memória.
+    """
+    shutil.rmtree(Path(config.caminho_shared_relatorios) / relatorio_id, ignore_errors=True)
+    try:
+        db_instance = Database()
+        db_instance.delete_one("relatorios", {"_id": ObjectId(relatorio_id)})
+        db_instance.close()
+    except Exception as e:
+        print(f"Aviso: não foi possível remover o relatório cancelado {relatorio_id}: {e}")
+
+
+def _cancelar(job: Dict[str, Any], motivo: str) -> None:
+    """
+    Sinaliza o cancelamento do job; a geração o percebe no próximo ponto de verificação.
+    """
+    with _jobs_lock:
+        if job["_fim"] is not None or job["_cancelado"].is_set():
+            return
+        job["motivo_cancelamento"] = motivo
+        job["_cancelado"].set()
+        _publicar_evento(job, {"detalhe": motivo})
+    print(f"Job {job['id_job']} do relatório {job['relatorio_id']}: cancelamento solicitado ({motivo})")
+
+
+def _remover_jobs_antigos() -> None:
+    limite = time.monotonic() - _RETENCAO_JOBS_SEGUNDOS
+    with _jobs_lock:
+        for id_job in [i for i, job in _jobs.items() if job["_fim"] is not None and job["_fim"] < limite]:
+            del _jobs[id_job]
+
+
+def _executar(job: Dict[str, Any], tarefa: Callable[[Callable[[Dict[str, Any]], None], threading.Event], Tuple[bool, str]]) -> None:
+    def notificar(evento: Dict[str, Any]) -> None:
+        evento = dict(evento)
+        # A geração mede a duração de cada estágio (eles podem rodar ao mesmo tempo) e envia os
+        # tempos dos já concluídos; "marco" indica o início ou o fim de um estágio
+        tempos = evento.pop("tempos_etapas", None)
+        marco = evento.pop("marco", False)
+        with _jobs_lock:
+            if tempos is not None:
+                job["tempos_etapas"] = {**job["tempos_etapas"], **tempos}
+            if not marco:
+                # Progresso dentro da etapa: só em memória, sem gravar no banco a cada arquivo
+                _publicar_evento(job, evento)
+                return
+            job["progresso"] = {**job["progresso"], **evento}
+        _atualizar(job, etapa=evento.get("etapa"))
+
+    cancelado = job["_cancelado"]
+    vigia_prazo = None
+    with _jobs_lock:
+        job["_inicio"] = time.monotonic()
+        # O prazo conta a partir do início da execução, não do tempo de espera na fila
+        if config.tempo_limite_job_relatorio > 0:
+            job["prazo"] = datetime.utcnow() + timedelta(seconds=config.tempo_limite_job_relatorio)
+            vigia_prazo = threading.Timer(
+                config.tempo_limite_job_relatorio, _cancelar,
+                (job, f"Geração cancelada: prazo de {config.tempo_limite_job_relatorio}s excedido.")
+            )
+            vigia_prazo.daemon = True
+    try:
+        # Cancelado enquanto aguardava na fila: nem chega a executar
+        verificar_cancelamento(cancelado)
+        if vigia_prazo:
+            vigia_prazo.start()
+        _atualizar(job, status=STATUS_EM_EXECUCAO, iniciado_em=datetime.utcnow())
+        sucesso, mensagem = tarefa(notificar, cancelado)
+        erro = None if sucesso else f"Falha na geração do PDF: {mensagem}"
+    except TarefaCancelada:
+        sucesso, erro = False, None
+    except Exception as e:
+        print(f"Erro no job {job['id_job']} do relatório {job['relatorio_id']}: {e}")
+        traceback.print_exc()
+        sucesso, erro = False, f"Erro interno ao gerar relatório: {e}"
+    finally:
+        if vigia_prazo:
+            vigia_prazo.cancel()
+
+    # Uma falha causada pela interrupção (ex.: pdflatex encerrado no meio da passada) também é
+    # cancelamento; um pedido que chega depois de a geração terminar com sucesso é ignorado
+    cancelada = cancelado.is_set() and not sucesso
+    if cancelada:
+        status, erro = STATUS_CANCELADO, job["motivo_cancelamento"]
+        # Antes de publicar o status final, para que quem o receba já não encontre o relatório
+        _descartar_relatorio(job["relatorio_id"])
+    else:
+        status = STATUS_CONCLUIDO if sucesso else STATUS_FALHOU
+    with _jobs_lock:
+        if status == STATUS_CONCLUIDO:
+            job["progresso"] = {**job["progresso"], "percentual": 100.0, "detalhe": None}
+    _atualizar(
+        job,
+        status=status,
+        erro=erro,
+        finalizado_em=datetime.utcnow(),
+        # Marcado junto com o último evento, para que o stream não termine antes de enviá-lo
+        _fim=time.monotonic()
+    )
+    print(f"Job {job['id_job']} do relatório {job['relatorio_id']} finalizado: {job['status']} (tempos: {job['tempos_etapas']})")
+
+
+def submeter_job(
+    relatorio_id: str,
+    tarefa: Callable[[Callable[[Dict[str, Any]], None], threading.Event], Tuple[bool, str]],
+    chave: Optional[str] = None,
+    id_lote: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Enfileira a geração de um relatório no pool de jobs (`max_jobs_relatorio` em paralelo)
+    e retorna o job imediatamente, com status `na_fila`.
+
+    `tarefa` recebe a função que publica os eventos de progresso e o evento de cancelamento do
+    job, e retorna (sucesso, mensagem), como `gerar_relatorio_de_lista`. O estado do job (status, etapa atual, tempo de cada estágio
+    e erro) é mantido em memória e gravado no documento do relatório em `relatorios` no início
+    e no fim de cada estágio; os eventos de progresso ficam em memória (ver `aguardar_eventos`).
+    `chave` identifica gerações equivalentes (ver `submeter_job_unico`). Jobs de um lote (`id_lote`)
+    rodam no pool de lotes (`max_relatorios_paralelos_lote` em paralelo).
+
+    O job pode ser cancelado com `cancelar_job` e é cancelado automaticamente se a execução
+    passar de `tempo_limite_job_relatorio` segundos; um job cancelado termina com status
+    `cancelado` e a pasta e o documento do relatório são removidos.
+    """
+    _remover_jobs_antigos()
+    job = {
+        "id_job": uuid.uuid4().hex,
+        "relatorio_id": str(relatorio_id),
+        "chave": chave,
+        "id_lote": id_lote,
+        "status": STATUS_NA_FILA,
+        "etapa": None,
+        "erro": None,
+        "tempos_etapas": {},
+        "prazo": None,
+        "motivo_cancelamento": None,
+        "criado_em": datetime.utcnow(),
+        "iniciado_em": None,
+        "finalizado_em": None,
+        "progresso": {"percentual": 0.0},
+        "_fim": None,
+        "_inicio": None,
+        "_seq": 0,
+        "_eventos": deque(maxlen=_MAX_EVENTOS_POR_JOB),
+        "_cancelado": threading.Event(),
+    }
+    with _jobs_lock:
+        _jobs[job["id_job"]] = job
+        _publicar_evento(job, {})
+    _registrar_no_relatorio(job["relatorio_id"], {
+        "id_job": job["id_job"],
+        "status": STATUS_NA_FILA,
+        "criado_em": job["criado_em"],
+        "instancia_job": _instancia(),
+    })
+    (_executor_lote if id_lote else _executor).submit(_executar, job, tarefa)
+    return obter_job(job["id_job"])
+
+
+def submeter_job_unico(
+    chave: str,
+    preparar: Callable[[], Tuple[str, Callable[[Callable[[Dict[str, Any]], None], threading.Event], Tuple[bool, str]]]],
+    janela_segundos: float = 0,
+    ainda_disponivel: Optional[Callable[[str], bool]] = None,
+    id_lote: Optional[str] = None
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Submete a geração identificada por `chave` apenas se não houver uma equivalente neste processo.
+
+    Se um job com a mesma chave estiver na fila ou em execução (e não tiver sido cancelado), ou tiver sido concluído com
+    sucesso há menos de `janela_segundos` (e `ainda_disponivel(relatorio_id)` confirmar que o
+    resultado não foi excluído), ele é retornado com False. Caso contrário, `preparar()` cria o
+    relatório e retorna (relatorio_id, tarefa), e o novo job (do lote `id_lote`, se informado) é retornado com True.
+    """
+    with _submissao_lock:
+        limite = time.monotonic() - janela_segundos
+        with _jobs_lock:
+            candidatos = sorted(
+                (
+                    job for job in _jobs.values()
+                    if job["chave"] == chave and job["status"] not in (STATUS_FALHOU, STATUS_CANCELADO) and not job["_cancelado"].is_set()
+                ),
+                key=lambda job: job["criado_em"],
+                reverse=True
+            )
+            existente = None
+            for job in candidatos:
+                if job["_fim"] is None or (job["status"] == STATUS_CONCLUIDO and job["_fim"] >= limite):
+                    existente = _copia_publica(job)
+                    break
+        if existente and (existente["status"] != STATUS_CONCLUIDO or ainda_disponivel is None or ainda_disponivel(existente["relatorio_id"])):
+            return existente, False
+
+        relatorio_id, tarefa = preparar()
+        return submeter_job(relatorio_id, tarefa, chave, id_lote), True
+
+
+def _processo_ativo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _job_interrompido(relatorio: Dict[str, Any]) -> bool:
+    """
+    Se o job gravado no relatório (na fila ou em execução) não existe mais: ele não está em
+    memória neste processo e o processo dono (`instancia_job`) não está mais rodando neste host.
+    Para um dono em outro host (que não dá para verificar), só quando o prazo do job já passou.
+    """
+    with _jobs_lock:
+        if relatorio.get("id_job") in _jobs:
+            return False
+    host, _, pid = str(relatorio.get("instancia_job") or "").rpartition(":")
+    if not host or not pid.isdigit():
+        # Relatórios gravados antes do registro do processo dono
+        return True
+    if host == socket.gethostname():
+        return int(pid) == os.getpid() or not _processo_ativo(int(pid))
+    prazo = relatorio.get("prazo")
+    return isinstance(prazo, datetime) and prazo < datetime.utcnow()
+
+
+def recuperar_jobs_interrompidos() -> int:
+    """
+    Marca como `falhou` os relatórios que ficaram `na_fila` ou `em_execucao` porque o processo
+    que executava o job foi reiniciado: a fila de jobs só existe em memória, então nada mais
+    moveria esses relatórios para um status final. Executada na inicialização da aplicação.
+    Retorna quantos relatórios foram marcados.
+    """
+    db_instance = Database()
+    relatorios = db_instance.find("relatorios", {"status": {"$in": [STATUS_NA_FILA, STATUS_EM_EXECUCAO]}})
+    recuperados = 0
+    for relatorio in relatorios:
+        if not _job_interrompido(relatorio):
+            continue
+        db_instance.update_one("relatorios", {"_id": relatorio["_id"], "status": relatorio["status"]}, {
+            "status": STATUS_FALHOU,
+            "erro": ERRO_JOB_INTERROMPIDO,
+            "finalizado_em": datetime.utcnow(),
+        })
+        recuperados += 1
+    db_instance.close()
+    if recuperados:
+        print(f"{recuperados} relatório(s) com geração interrompida pela reinicialização marcados como '{STATUS_FALHOU}'.")
+    return recuperados
+
+
+def cancelar_job(id_job: str, motivo: str = "Geração cancelada pelo usuário.") -> Optional[Dict[str, Any]]:
+    """
+    Pede o cancelamento de um job na fila ou em execução e retorna uma cópia dele, ou None se
+    ele não existir. A geração é interrompida no próximo ponto de verificação (ver
+    `gerar_relatorio_de_lista`); jobs já finalizados não são alterados.
+    """
+    with _jobs_lock:
+        job = _jobs.get(id_job)
+    if job is None:
+        return None
+    _cancelar(job, motivo)
+    return obter_job(id_job)
+
+
+def _copia_publica(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {chave: (dict(valor) if isinstance(valor, dict) else valor) for chave, valor in job.items() if not chave.startswith("_")}
+
+
+def obter_job(id_job: str) -> Optional[Dict[str, Any]]:
+    """
+    Retorna uma cópia do job, ou None se ele não existir (ou já tiver saído da memória).
+    """
+    with _jobs_lock:
+        job = _jobs.get(id_job)
+        return _copia_publica(job) if job else None
+
+
+def obter_job_do_relatorio(relatorio_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Retorna o job mais recente do relatório, se ainda estiver em memória neste processo.
+    """
+    with _jobs_lock:
+        jobs = [job for job in _jobs.values() if job["relatorio_id"] == str(relatorio_id)]
+        return _copia_publica(max(jobs, key=lambda job: job["criado_em"])) if jobs else None
+
+
+def listar_jobs() -> List[Dict[str, Any]]:
+    """
+    Jobs em memória, do mais recente para o mais antigo.
+    """
+    with _jobs_lock:
+        return [_copia_publica(job) for job in sorted(_jobs.values(), key=lambda job: job["criado_em"], reverse=True)]
+
+
+def aguardar_eventos(id_job: str, apos_seq: int = 0, timeout: float = 15.0) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Retorna os eventos de progresso do job posteriores a `apos_seq`, aguardando até `timeout`
+    segundos se ainda não houver nenhum, e se o job já terminou (nesse caso, não haverá outros
+    eventos). Job inexistente retorna ([], True).
+    """
+    prazo = time.monotonic() + timeout
+    with _novos_eventos:
+        while True:
+            job = _jobs.get(id_job)
+            if job is None:
+                return [], True
+            eventos = [dict(evento) for evento in job["_eventos"] if evento["seq"] > apos_seq]
+            finalizado = job["_fim"] is not None
+            restante = prazo - time.monotonic()
+            if eventos or finalizado or restante <= 0:
+                return eventos, finalizado
+            _novos_eventos.wait(restante)
@@ -0,0 +1,114 @@
+# backend/src/report_generation/report_submission.py
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from ..core.config import Config
+from ..core.database import Database
+from ..core.logger import log_action
+from .pipeline import (
+    gerar_relatorio_de_lista, pasta_relatorio_preprocessado, fingerprint_dados, chave_geracao, preprocessado_reaproveitavel
+)
+from .report_jobs import submeter_job_unico, STATUS_CONCLUIDO
+
+config = Config("config.json")
+
+
+def pdf_disponivel(relatorio_id: str) -> bool:
+    return (pasta_relatorio_preprocessado(relatorio_id) / "RelatorioPronto" / "main.pdf").exists()
+
+
+def relatorio_recente(db_instance: Any, chave: str) -> Optional[Dict[str, Any]]:
+    """
+    Relatório gerado com sucesso com a mesma chave dentro da janela de reaproveitamento
+    (`janela_reaproveitamento_relatorio_segundos`) e cujo PDF ainda existe, ou None.
+    """
+    janela = config.janela_reaproveitamento_relatorio_segundos
+    if janela <= 0:
+        return None
+    limite = datetime.utcnow() - timedelta(seconds=janela)
+    candidatos = db_instance.find("relatorios", {"chave_geracao": chave, "status": STATUS_CONCLUIDO, "finalizado_em": {"$gte": limite}})
+    for relatorio in sorted(candidatos, key=lambda r: r["finalizado_em"], reverse=True):
+        if pdf_disponivel(str(relatorio["_id"])):
+            return relatorio
+    return None
+
+
+def submeter_geracao(
+    lista_doc: Dict[str, Any],
+    formulario: Dict[str, Any],
+    usuario: Optional[Dict[str, Any]] = None,
+    id_lote: Optional[str] = None
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Enfileira a geração do relatório de uma lista no pool de jobs (ver `report_jobs`) e retorna
+    (job, reaproveitado). `formulario` traz os campos da capa, como o corpo de
+    /reports/gerarRelatorioDeLista/, e `usuario` é registrado no log quando o relatório fica pronto.
+
+    Gerações equivalentes (mesma lista, mesmos scans e catálogo, mesmos campos) são coalescidas:
+    se houver uma em andamento neste processo, ou uma concluída dentro da janela de
+    reaproveitamento, ela é retornada com `reaproveitado` verdadeiro em vez de gerar de novo
+    (no segundo caso, o documento do relatório no lugar do job).
+
+    `id_lote` marca o relatório como parte de uma geração em lote (ver `report_batch`); esses
+    jobs rodam num pool próprio, para não atrasar as gerações individuais.
+    """
+    id_lista = str(lista_doc["_id"])
+    nome_secretaria = formulario.get("nomeSecretaria")
+    fingerprint = fingerprint_dados(lista_doc)
+    chave = chave_geracao(id_lista, fingerprint, formulario)
+
+    db_instance = Database()
+    recente = relatorio_recente(db_instance, chave)
+    if recente:
+        db_instance.close()
+        print(f"Geração idêntica concluída há pouco (relatório {recente['_id']}); reaproveitando o resultado.")
+        return recente, True
+
+    def preparar():
+        # Criação do registro e pastas do relatório
+        documento = {
+            "nome": nome_secretaria,
+            "id_lista": id_lista,
+            "destino_relatorio_preprocessado": None,
+            "chave_geracao": chave,
+            "fingerprint_dados": fingerprint
+        }
+        if id_lote:
+            documento["id_lote"] = id_lote
+        novo_relatorio_id = db_instance.insert_one("relatorios", documento).inserted_id
+        pasta_destino_relatorio_temp_base = pasta_relatorio_preprocessado(str(novo_relatorio_id))
+        pasta_destino_relatorio_temp_base.mkdir(parents=True, exist_ok=True)
+        db_instance.update_one("relatorios", {"_id": novo_relatorio_id}, {"destino_relatorio_preprocessado": str(pasta_destino_relatorio_temp_base)})
+
+        # Estágios com as mesmas entradas (mesmos scans, catálogo e parâmetros) são reaproveitados do relatório anterior da lista
+        preprocessado_anterior = preprocessado_reaproveitavel(db_instance, id_lista)
+
+        def tarefa(progresso, cancelado):
+            sucesso, mensagem = gerar_relatorio_de_lista(
+                str(novo_relatorio_id), lista_doc, formulario, progresso, preprocessado_anterior, cancelado
+            )
+            if sucesso:
+                if usuario:
+                    log_details = {
+                        "report_id": str(novo_relatorio_id),
+                        "report_name": nome_secretaria,
+                        "list_id": id_lista
+                    }
+                    if id_lote:
+                        log_details["batch_id"] = id_lote
+                    log_action(usuario, "generate_report", log_details)
+                db_job = Database()
+                db_job.update_one("listas", {"_id": lista_doc["_id"]}, {"relatorioGerado": True})
+                db_job.close()
+            return sucesso, mensagem
+
+        return str(novo_relatorio_id), tarefa
+
+    try:
+        job, novo = submeter_job_unico(chave, preparar, config.janela_reaproveitamento_relatorio_segundos, pdf_disponivel, id_lote)
+    finally:
+        db_instance.close()
+    if not novo:
+        print(f"Geração idêntica já existente (job {job['id_job']}, relatório {job['relatorio_id']}); reaproveitando.")
+    return job, not novo
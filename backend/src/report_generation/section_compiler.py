@@ -0,0 +1,349 @@
+# backend/src/report_generation/section_compiler.py
+
+import hashlib
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .compile_executor import executar_processo
+
+# Marcador do template que inicia uma nova parte compilável de forma independente
+_MARCADOR_PARTE_PATTERN = re.compile(r"^%%AUDITEX-PARTE\s+(?P<nome>[\w-]+)\s*$")
+# O Anexo A gerado por `gerar_conteudo_latex_para_vulnerabilidades` vira uma parte própria
+_INICIO_ANEXO = "%-------------- INÍCIO DO ANEXO A --------------"
+_FIM_ANEXO = "%-------------- FIM DO ANEXO A --------------"
+
+_INICIO_DOCUMENTO = "\\begin{document}"
+_FIM_DOCUMENTO = "\\end{document}"
+
+# Contadores levados de uma parte para a seguinte
+_CONTADORES = ("page", "section", "subsection", "subsubsection", "figure", "table")
+# Contadores reiniciados quando um nível de seção acima deles avança
+_CONTADORES_HIERARQUICOS = ("subsection", "subsubsection")
+_CONTADORES_PATTERN = re.compile(r"AUDITEX-CONTADORES (?P<valores>\S+)")
+
+# Sumário montado com as entradas de todas as partes, lido pelo \tableofcontents
+_SUMARIO_COMBINADO = "sumario_combinado.toc"
+
+# Rótulos (\label) das demais partes, lidos por cada parte para resolver \ref, \pageref e \hyperref
+_SUFIXO_ROTULOS = "-rotulos.aux"
+_REFERENCIA_PATTERN = re.compile(r"\\(?:ref|pageref|autoref|nameref|vref|cref|Cref|eqref|hyperref)\b")
+
+# Rodadas de compilação até números de página, seções e sumário estabilizarem
+_MAX_RODADAS = 4
+
+
+def dividir_em_partes(conteudo: str) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+    """
+    Divide o main.tex renderizado no preâmbulo e nas partes do corpo delimitadas pelos
+    marcadores `%%AUDITEX-PARTE <nome>` do template e pelos limites do Anexo A.
+
+    Retorna None se o documento tiver menos de duas partes com conteúdo.
+    """
+    inicio = conteudo.find(_INICIO_DOCUMENTO)
+    fim = conteudo.rfind(_FIM_DOCUMENTO)
+    if inicio < 0 or fim < inicio:
+        return None
+    preambulo = conteudo[:inicio]
+    corpo = conteudo[inicio + len(_INICIO_DOCUMENTO):fim]
+
+    partes: List[Tuple[str, List[str]]] = [("abertura", [])]
+    for linha in corpo.splitlines(keepends=True):
+        linha_limpa = linha.strip()
+        match = _MARCADOR_PARTE_PATTERN.match(linha_limpa)
+        if match:
+            partes.append((match.group("nome"), []))
+            continue
+        if linha_limpa == _INICIO_ANEXO:
+            partes.append(("anexo", [linha]))
+            continue
+        partes[-1][1].append(linha)
+        if linha_limpa == _FIM_ANEXO:
+            # O que vem depois do anexo continua a parte em que ele foi emitido
+            nome_anterior = partes[-2][0] if len(partes) > 1 else "abertura"
+            partes.append((f"{nome_anterior}-continuacao", []))
+
+    partes_com_conteudo = [(nome, "".join(linhas)) for nome, linhas in partes if "".join(linhas).strip()]
+    if len(partes_com_conteudo) < 2:
+        return None
+    return preambulo, partes_com_conteudo
+
+
+def _grupos_chaves(texto: str) -> Optional[List[str]]:
+    """Conteúdo dos grupos `{...}` de primeiro nível de `texto`, ou None se as chaves não fecharem."""
+    grupos, profundidade, inicio = [], 0, 0
+    for posicao, caractere in enumerate(texto):
+        if caractere == "{":
+            if profundidade == 0:
+                inicio = posicao + 1
+            profundidade += 1
+        elif caractere == "}":
+            profundidade -= 1
+            if profundidade < 0:
+                return None
+            if profundidade == 0:
+                grupos.append(texto[inicio:posicao])
+    return grupos if profundidade == 0 else None
+
+
+def _sem_ancora(linha: str, comando: str, argumentos_antes: int) -> str:
+    """
+    Remove a âncora do hyperref de uma linha `\newlabel`/`\contentsline` vinda de outra parte.
+
+    A âncora aponta para um destino nomeado do PDF de outra parte, que não sobrevive à união dos
+    PDFs; sem ela o hyperref escreve o texto (número, página, título) sem link, em vez de um link
+    quebrado. `argumentos_antes` é a posição da âncora entre os argumentos do comando.
+    """
+    if not linha.startswith(comando):
+        return linha
+    conteudo = linha[len(comando):].rstrip("\n")
+    grupos = _grupos_chaves(conteudo)
+    if grupos is None or len(grupos) <= argumentos_antes:
+        return linha
+    grupos[argumentos_antes] = ""
+    return comando + "".join(f"{{{grupo}}}" for grupo in grupos) + ("%" if conteudo.endswith("%") else "") + "\n"
+
+
+def _rotulos_da_parte(caminho_aux: Path) -> List[str]:
+    """Linhas `\newlabel` do .aux de uma parte, com as âncoras removidas (ver `_sem_ancora`)."""
+    if not caminho_aux.exists():
+        return []
+    rotulos = []
+    for linha in caminho_aux.read_text(encoding='utf-8', errors='replace').splitlines(keepends=True):
+        if not linha.startswith("\\newlabel{"):
+            continue
+        grupos = _grupos_chaves(linha[len("\\newlabel"):].rstrip("\n"))
+        if grupos is None or len(grupos) != 2:
+            continue
+        valores = _grupos_chaves(grupos[1])
+        if valores is not None and len(valores) >= 4:
+            # {número}{página}{título}{âncora}{extra}
+            valores[3] = ""
+            grupos[1] = "".join(f"{{{valor}}}" for valor in valores)
+        rotulos.append(f"\\newlabel{{{grupos[0]}}}{{{grupos[1]}}}\n")
+    return rotulos
+
+
+def _montar_documento_parte(
+    preambulo: str,
+    corpo: str,
+    contadores: Dict[str, int],
+    assinatura_sumario: str,
+    arquivo_rotulos: str,
+    assinatura_rotulos: str
+) -> str:
+    """
+    Monta o documento de uma parte: mesmo preâmbulo do main.tex (e, portanto, o mesmo formato
+    pré-compilado), contadores iniciais herdados da parte anterior, sumário combinado, rótulos
+    das demais partes e o registro dos contadores finais no log.
+    """
+    ajustes_contadores = "".join(f"\\setcounter{{{nome}}}{{{contadores.get(nome, 0)}}}" for nome in _CONTADORES if nome != "page")
+    registro_final = ";".join(f"{nome}=\\the\\value{{{nome}}}" for nome in _CONTADORES)
+    return (
+        preambulo
+        + _INICIO_DOCUMENTO + "\n"
+        + f"% sumario: {assinatura_sumario}\n"
+        + f"% rotulos: {assinatura_rotulos}\n"
+        + "\\makeatletter\n"
+        # Rótulos definidos nas demais partes (os da própria parte vêm do seu .aux)
+        + f"\\IfFileExists{{{arquivo_rotulos}}}{{\\@input{{{arquivo_rotulos}}}}}{{}}\n"
+        # Toda parte grava as próprias entradas de sumário, mesmo sem \tableofcontents...
+        + "\\if@filesw\\newwrite\\tf@toc\\immediate\\openout\\tf@toc\\jobname.toc\\relax\\fi\n"
+        # ...e o \tableofcontents passa a ler o sumário combinado de todas as partes
+        + "\\def\\@starttoc#1{\\begingroup\\makeatletter"
+        + f"\\IfFileExists{{{_SUMARIO_COMBINADO}}}{{\\@input{{{_SUMARIO_COMBINADO}}}}}{{}}"
+        + "\\@nobreakfalse\\endgroup}\n"
+        + "\\makeatother\n"
+        + f"\\setcounter{{page}}{{{contadores.get('page', 1)}}}{ajustes_contadores}\n"
+        + f"\\AtEndDocument{{\\clearpage\\typeout{{AUDITEX-CONTADORES {registro_final}}}}}\n"
+        + corpo
+        + "\n" + _FIM_DOCUMENTO + "\n"
+    )
+
+
+def _ler_contadores_finais(caminho_log: Path) -> Optional[Dict[str, int]]:
+    if not caminho_log.exists():
+        return None
+    conteudo = caminho_log.read_text(encoding='latin-1', errors='replace')
+    matches = list(_CONTADORES_PATTERN.finditer(conteudo))
+    if not matches:
+        return None
+    valores = {}
+    for par in matches[-1].group("valores").split(";"):
+        nome, _, valor = par.partition("=")
+        valores[nome] = int(valor)
+    return valores
+
+
+def _projetar_contadores(
+    novo_inicio: Dict[str, int],
+    inicio_compilado: Dict[str, int],
+    fim_compilado: Dict[str, int]
+) -> Dict[str, int]:
+    """
+    Projeta os contadores finais de uma parte para um novo ponto de partida, sem recompilá-la.
+
+    O número de páginas, seções, figuras e tabelas de uma parte não depende de onde ela começa,
+    então esses contadores avançam pelo mesmo delta. Subseções e subsubseções só avançam pelo
+    delta se a parte não abriu um nível superior (que as reinicia); caso contrário, o valor
+    final compilado já é o correto. Assim as numerações convergem em poucas rodadas, em vez de
+    se propagarem uma parte por rodada.
+    """
+    projetado: Dict[str, int] = {}
+    nivel_superior_mudou = False
+    for nome in _CONTADORES:
+        valor_inicio = inicio_compilado.get(nome, 1 if nome == "page" else 0)
+        valor_fim = fim_compilado.get(nome, valor_inicio)
+        base = novo_inicio.get(nome, 1 if nome == "page" else 0)
+        if nome in _CONTADORES_HIERARQUICOS and nivel_superior_mudou:
+            projetado[nome] = valor_fim
+        else:
+            projetado[nome] = base + (valor_fim - valor_inicio)
+        if nome in ("section", "subsection") and valor_fim != valor_inicio:
+            nivel_superior_mudou = True
+    return projetado
+
+
+def _unir_pdfs(diretorio_build: str, entradas: List[str], saida: str, prazo: Optional[float]) -> bool:
+    """
+    Junta os PDFs das partes com a primeira ferramenta disponível: qpdf, pdfunite ou ghostscript.
+    """
+    if shutil.which("qpdf"):
+        command = ["qpdf", "--empty", "--pages", *entradas, "--", saida]
+    elif shutil.which("pdfunite"):
+        command = ["pdfunite", *entradas, saida]
+    elif shutil.which("gs"):
+        command = ["gs", "-dBATCH", "-dNOPAUSE", "-q", "-sDEVICE=pdfwrite", f"-sOutputFile={saida}", *entradas]
+    else:
+        print("Erro: nenhuma ferramenta para unir PDFs encontrada (qpdf, pdfunite ou gs).")
+        return False
+    resultado = executar_processo(command, cwd=diretorio_build, prazo=prazo)
+    if resultado.returncode != 0:
+        print(f"Erro ao unir os PDFs das partes ({command[0]}): {resultado.stdout[-2000:]}")
+        return False
+    return (Path(diretorio_build) / saida).exists()
+
+
+def compilar_em_partes(
+    diretorio_build: str,
+    main_tex_filename: str,
+    compilar_parte: Callable[[str], bool],
+    prazo: Optional[float] = None
+) -> Optional[Tuple[bool, str]]:
+    """
+    Compila o documento dividido em partes independentes, em paralelo, e junta os PDFs.
+
+    Cada rodada compila (via `compilar_parte`, que recebe o nome do .tex da parte e retorna
+    se a compilação deu certo) apenas as partes cujo documento mudou: na primeira rodada
+    todas; nas seguintes, as que receberam novos contadores iniciais (página, seção, figura...)
+    da parte anterior, um novo sumário combinado ou novos rótulos referenciados de outras
+    partes. Quando nada muda, os PDFs são unidos em `main.pdf` e os logs das partes em `main.log`.
+
+    Números, páginas e títulos do sumário e das referências entre partes são resolvidos, mas os
+    destinos nomeados de um PDF não sobrevivem à união: entradas de sumário e referências
+    (\ref, \hyperref...) que apontam para outra parte saem como texto, sem link. Os links
+    dentro de uma mesma parte continuam funcionando; a compilação normal mantém todos.
+
+    Retorna None se o documento não tiver partes (a compilação normal deve ser usada).
+    """
+    caminho_main = Path(diretorio_build) / main_tex_filename
+    divisao = dividir_em_partes(caminho_main.read_text(encoding='utf-8'))
+    if divisao is None:
+        return None
+    preambulo, partes = divisao
+    nomes_arquivos = [f"parte-{indice:02d}-{nome}.tex" for indice, (nome, _) in enumerate(partes, start=1)]
+    print(f"Compilação paralela em {len(partes)} partes: {', '.join(nomes_arquivos)}")
+
+    caminho_sumario = Path(diretorio_build) / _SUMARIO_COMBINADO
+    caminho_sumario.write_text("", encoding='utf-8')
+    arquivos_rotulos = [nome_arquivo.replace('.tex', _SUFIXO_ROTULOS) for nome_arquivo in nomes_arquivos]
+    for arquivo_rotulos in arquivos_rotulos:
+        (Path(diretorio_build) / arquivo_rotulos).write_text("", encoding='utf-8')
+    contadores_iniciais: List[Dict[str, int]] = [{"page": 1} for _ in partes]
+    documentos_compilados: Dict[str, str] = {}
+    # Por parte: (contadores iniciais usados na última compilação, contadores finais obtidos)
+    contadores_compilados: List[Tuple[Dict[str, int], Dict[str, int]]] = [({}, {}) for _ in partes]
+
+    for rodada in range(1, _MAX_RODADAS + 1):
+        sumario = caminho_sumario.read_text(encoding='utf-8', errors='replace')
+        assinatura_sumario = hashlib.sha256(sumario.encode('utf-8')).hexdigest()[:16]
+        pendentes = []
+        for indice, (nome_arquivo, (_, corpo)) in enumerate(zip(nomes_arquivos, partes)):
+            # Só a parte com o \tableofcontents depende do sumário combinado
+            assinatura = assinatura_sumario if "\\tableofcontents" in corpo else ""
+            # ...e só as partes com referências dependem dos rótulos das demais
+            assinatura_rotulos = ""
+            if _REFERENCIA_PATTERN.search(corpo):
+                rotulos = (Path(diretorio_build) / arquivos_rotulos[indice]).read_text(encoding='utf-8', errors='replace')
+                assinatura_rotulos = hashlib.sha256(rotulos.encode('utf-8')).hexdigest()[:16]
+            documento = _montar_documento_parte(
+                preambulo, corpo, contadores_iniciais[indice], assinatura, arquivos_rotulos[indice], assinatura_rotulos
+            )
+            if documentos_compilados.get(nome_arquivo) != documento:
+                (Path(diretorio_build) / nome_arquivo).write_text(documento, encoding='utf-8')
+                documentos_compilados[nome_arquivo] = documento
+                pendentes.append(nome_arquivo)
+
+        if not pendentes:
+            break
+        print(f"Rodada {rodada} da compilação paralela: {len(pendentes)} parte(s).")
+        with ThreadPoolExecutor(max_workers=len(pendentes)) as executor:
+            resultados = list(executor.map(compilar_parte, pendentes))
+        if not all(resultados):
+            falhas = [nome for nome, ok in zip(pendentes, resultados) if not ok]
+            return False, f"Erro na compilação das partes: {', '.join(falhas)}."
+
+        for indice, nome_arquivo in enumerate(nomes_arquivos):
+            if nome_arquivo not in pendentes:
+                continue
+            valores = _ler_contadores_finais(Path(diretorio_build) / nome_arquivo.replace('.tex', '.log'))
+            if valores is None:
+                return False, f"Não foi possível ler os contadores finais da parte '{nome_arquivo}'."
+            contadores_compilados[indice] = (contadores_iniciais[indice], valores)
+
+        # Contadores iniciais de cada parte = contadores finais projetados da parte anterior
+        novos_iniciais = [{"page": 1}]
+        for indice in range(len(partes) - 1):
+            inicio_compilado, fim_compilado = contadores_compilados[indice]
+            novos_iniciais.append(_projetar_contadores(novos_iniciais[indice], inicio_compilado, fim_compilado))
+        contadores_iniciais = novos_iniciais
+
+        indices_com_sumario = {indice for indice, (_, corpo) in enumerate(partes) if "\\tableofcontents" in corpo}
+        with open(caminho_sumario, 'w', encoding='utf-8') as sumario_combinado:
+            for indice, nome_arquivo in enumerate(nomes_arquivos):
+                caminho_toc = Path(diretorio_build) / nome_arquivo.replace('.tex', '.toc')
+                if not caminho_toc.exists():
+                    continue
+                for linha in caminho_toc.read_text(encoding='utf-8', errors='replace').splitlines(keepends=True):
+                    # Entradas de outra parte: \contentsline{tipo}{título}{página}{âncora}
+                    if indice not in indices_com_sumario:
+                        linha = _sem_ancora(linha, "\\contentsline", 3)
+                    sumario_combinado.write(linha)
+
+        rotulos_por_parte = [
+            _rotulos_da_parte(Path(diretorio_build) / nome_arquivo.replace('.tex', '.aux'))
+            for nome_arquivo in nomes_arquivos
+        ]
+        for indice, arquivo_rotulos in enumerate(arquivos_rotulos):
+            with open(Path(diretorio_build) / arquivo_rotulos, 'w', encoding='utf-8') as rotulos_outras_partes:
+                for outro, rotulos in enumerate(rotulos_por_parte):
+                    if outro != indice:
+                        rotulos_outras_partes.writelines(rotulos)
+    else:
+        print(f"Aviso: numeração das partes não estabilizou após {_MAX_RODADAS} rodadas.")
+
+    nome_base = Path(main_tex_filename).stem
+    pdfs = [nome_arquivo.replace('.tex', '.pdf') for nome_arquivo in nomes_arquivos]
+    if not _unir_pdfs(diretorio_build, pdfs, f"{nome_base}.pdf", prazo):
+        return False, "Erro ao unir os PDFs das partes do relatório."
+
+    with open(Path(diretorio_build) / f"{nome_base}.log", 'w', encoding='latin-1', errors='replace') as log_combinado:
+        for nome_arquivo in nomes_arquivos:
+            caminho_log = Path(diretorio_build) / nome_arquivo.replace('.tex', '.log')
+            log_combinado.write(f"===== {nome_arquivo} =====\n")
+            if caminho_log.exists():
+                log_combinado.write(caminho_log.read_text(encoding='latin-1', errors='replace'))
+
+    return True, f"{len(partes)} partes compiladas em paralelo e unidas."
@@ -0,0 +1,196 @@
+# backend/src/report_generation/stage_graph.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .cancellation import TarefaCancelada, verificar_cancelamento
+
+# Registro, na pasta de trabalho, das entradas e dos resultados de cada estágio já executado
+ARQUIVO_ESTAGIOS = "estagios.json"
+
+# Incrementar sempre que o conteúdo gerado por algum estágio mudar, para invalidar os registros existentes
+_VERSAO_ESTAGIOS = 2
+
+
+def estagio(
+    nome: str,
+    executar: Callable[[Dict[str, Any]], Any],
+    depende_de: Iterable[str] = (),
+    entradas: Optional[Callable[[], Any]] = None,
+    saidas: Iterable[str] = (),
+    saidas_opcionais: Iterable[str] = (),
+    reaproveitavel: bool = True
+) -> Dict[str, Any]:
+    """
+    Declara um estágio do grafo.
+
+    `executar` recebe os resultados dos estágios de `depende_de` (por nome) e retorna o resultado
+    do estágio, que precisa ser serializável em JSON para ser reaproveitado. `entradas` retorna o
+    que o estágio lê além das dependências (assinaturas de arquivos, parâmetros, campos), e
+    `saidas` são os caminhos (relativos à pasta de trabalho, aceitando glob) que ele grava;
+    os de `saidas_opcionais` nem sempre são gerados e não são exigidos para reaproveitar o estágio.
+    """
+    return {
+        "nome": nome,
+        "executar": executar,
+        "depende_de": tuple(depende_de),
+        "entradas": entradas,
+        "saidas": tuple(saidas),
+        "saidas_opcionais": tuple(saidas_opcionais),
+        "reaproveitavel": reaproveitavel,
+    }
+
+
+def _carregar_registro(pasta: Path) -> Dict[str, Any]:
+    try:
+        with open(pasta / ARQUIVO_ESTAGIOS, 'r', encoding='utf-8') as f:
+            registro = json.load(f)
+        if registro.get("versao") == _VERSAO_ESTAGIOS:
+            return registro.get("estagios", {})
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Aviso: registro de estágios inválido em '{pasta}': {e}")
+    return {}
+
+
+def _gravar_registro(pasta: Path, estagios: Dict[str, Any]) -> None:
+    destino = pasta / ARQUIVO_ESTAGIOS
+    caminho_temporario = destino.with_name(f".{destino.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(caminho_temporario, 'w', encoding='utf-8') as f:
+            json.dump({"versao": _VERSAO_ESTAGIOS, "estagios": estagios}, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(caminho_temporario, destino)
+    except OSError as e:
+        print(f"Aviso: não foi possível gravar o registro de estágios em '{destino}': {e}")
+
+
+def _arquivos_saida(pasta: Path, padrao: str) -> List[Path]:
+    if any(caractere in padrao for caractere in "*?["):
+        return [caminho for caminho in pasta.glob(padrao) if caminho.is_file() or caminho.is_symlink()]
+    caminho = pasta / padrao
+    return [caminho] if caminho.is_file() or caminho.is_symlink() else []
+
+
+def _saidas_presentes(pasta: Path, saidas: Iterable[str]) -> bool:
+    # Padrões com glob podem legitimamente não casar com nenhum arquivo (ex.: nenhum anexo);
+    # nesse caso a cópia do relatório anterior é tudo ou nada (ver `_semear_de_relatorio_anterior`)
+    return all(
+        (pasta / padrao).is_file()
+        for padrao in saidas
+        if not any(caractere in padrao for caractere in "*?[")
+    )
+
+
+def _remover_saidas(pasta: Path, saidas: Iterable[str]) -> None:
+    """
+    Remove as saídas antigas antes de executar o estágio. Como os arquivos podem ser hardlinks
+    de outro relatório, eles são desvinculados em vez de sobrescritos no lugar.
+    """
+    for padrao in saidas:
+        for caminho in _arquivos_saida(pasta, padrao):
+            caminho.unlink()
+
+
+def executar_estagios(
+    estagios: List[Dict[str, Any]],
+    pasta: Path,
+    ao_iniciar: Optional[Callable[[str, bool], None]] = None,
+    ao_concluir: Optional[Callable[[str, float, bool], None]] = None,
+    max_paralelo: Optional[int] = None,
+    cancelado: Optional[threading.Event] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Executa um grafo de estágios (ver `estagio`), com os estágios independentes em paralelo.
+
+    Cada estágio é identificado pelo hash das suas entradas e das entradas e resultados das suas
+    dependências. Se o registro da pasta (`ARQUIVO_ESTAGIOS`) tiver o mesmo hash para o estágio e
+    as saídas ainda existirem, ele não é executado e o resultado registrado é reaproveitado.
+
+    `ao_iniciar(nome, reaproveitado)` e `ao_concluir(nome, duracao, reaproveitado)` são chamadas
+    de qualquer thread. Retorna, por estágio, o resultado, a duração em segundos, se foi
+    reaproveitado e o hash. A primeira exceção de um estágio interrompe o grafo e é propagada
+    depois que os estágios em andamento terminam. Se `cancelado` for sinalizado, nenhum outro
+    estágio é iniciado e `TarefaCancelada` é propagada da mesma forma.
+    """
+    pasta.mkdir(parents=True, exist_ok=True)
+    por_nome = {definicao["nome"]: definicao for definicao in estagios}
+    for definicao in estagios:
+        desconhecidas = [dependencia for dependencia in definicao["depende_de"] if dependencia not in por_nome]
+        if desconhecidas:
+            raise ValueError(f"Estágio '{definicao['nome']}' depende de estágios inexistentes: {desconhecidas}")
+
+    registro = _carregar_registro(pasta)
+    registro_lock = threading.Lock()
+    concluidos: Dict[str, Dict[str, Any]] = {}
+
+    def rodar(definicao: Dict[str, Any]) -> Dict[str, Any]:
+        verificar_cancelamento(cancelado)
+        nome = definicao["nome"]
+        dependencias = {dependencia: concluidos[dependencia] for dependencia in definicao["depende_de"]}
+        conteudo = {
+            "entradas": definicao["entradas"]() if definicao["entradas"] else None,
+            "dependencias": {dependencia: [estado["hash"], estado["resultado"]] for dependencia, estado in dependencias.items()},
+        }
+        hash_estagio = hashlib.sha256(json.dumps(conteudo, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+        with registro_lock:
+            anterior = registro.get(nome)
+        reaproveitado = (
+            definicao["reaproveitavel"]
+            and anterior is not None
+            and anterior.get("hash") == hash_estagio
+            and _saidas_presentes(pasta, definicao["saidas"])
+        )
+        if ao_iniciar:
+            ao_iniciar(nome, reaproveitado)
+
+        inicio = time.monotonic()
+        if reaproveitado:
+            resultado = anterior.get("resultado")
+        else:
+            with registro_lock:
+                registro.pop(nome, None)
+            _remover_saidas(pasta, definicao["saidas"] + definicao["saidas_opcionais"])
+            resultado = definicao["executar"]({dependencia: estado["resultado"] for dependencia, estado in dependencias.items()})
+        duracao = round(time.monotonic() - inicio, 3)
+
+        if definicao["reaproveitavel"] and not reaproveitado:
+            with registro_lock:
+                registro[nome] = {"hash": hash_estagio, "resultado": resultado, "duracao": duracao}
+                _gravar_registro(pasta, dict(registro))
+        if ao_concluir:
+            ao_concluir(nome, duracao, reaproveitado)
+        return {"resultado": resultado, "duracao": duracao, "reaproveitado": reaproveitado, "hash": hash_estagio}
+
+    pendentes = dict(por_nome)
+    em_execucao: Dict[Future, str] = {}
+    erro: Optional[BaseException] = None
+    with ThreadPoolExecutor(max_workers=max_paralelo or max(1, len(estagios)), thread_name_prefix="estagio") as executor:
+        while pendentes or em_execucao:
+            if erro is None and cancelado is not None and cancelado.is_set():
+                erro = TarefaCancelada("Geração do relatório cancelada.")
+            if erro is None:
+                prontos = [nome for nome, definicao in pendentes.items() if all(dependencia in concluidos for dependencia in definicao["depende_de"])]
+                for nome in prontos:
+                    em_execucao[executor.submit(rodar, pendentes.pop(nome))] = nome
+            if not em_execucao:
+                if pendentes and erro is None:
+                    raise ValueError(f"Dependências circulares entre os estágios: {sorted(pendentes)}")
+                break
+            finalizados, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in finalizados:
+                nome = em_execucao.pop(futuro)
+                try:
+                    concluidos[nome] = futuro.result()
+                except BaseException as e:
+                    erro = erro or e
+    if erro is not None:
+        raise erro
+    return concluidos
@@ -1,12 +1,14 @@
+import io
+import json
 import logging
-import re
-from flask import Blueprint, request, jsonify, send_file
+import time
+import zipfile
+from flask import Blueprint, Response, request, jsonify, send_file
 from flask_cors import CORS, cross_origin
 import os
 from pathlib import Path
 import shutil
 from bson.objectid import ObjectId
-import pandas as pd
 import traceback 
 
 # Importa a classe Config
@@ -14,12 +16,20 @@ from ..core.config import Config
 # Importa o Database
 from ..core.database import Database
 # Importa as funções de processamento de dados
-from ..data_processing.vulnerability_analyzer import processar_relatorio_csv, processar_relatorio_json, extrair_quantidades_vulnerabilidades_por_site
-# Importa as funções de construção de relatório e compilação
-from ..report_generation.report_builder import terminar_relatorio_preprocessado
-from ..report_generation.latex_compiler import compilar_latex
-from ..report_generation.plot_generator import gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site, gerar_grafico_donut, gerar_grafico_donut_webapp 
-from ..auth.decorators import token_required 
+from ..data_processing.vulnerability_analyzer import extrair_modelo_webapp, extrair_modelo_servidores
+# Importa a geração do relatório (executada em segundo plano pela fila de jobs) e a compilação
+from ..report_generation.pipeline import (
+    fingerprint_dados, ETAPAS
+)
+from ..report_generation.report_jobs import (
+    obter_job, obter_job_do_relatorio, listar_jobs, aguardar_eventos, cancelar_job,
+    STATUS_NA_FILA, STATUS_EM_EXECUCAO, STATUS_CONCLUIDO
+)
+from ..report_generation.report_submission import submeter_geracao
+from ..report_generation.report_batch import submeter_lote, resumo_lote
+from ..report_generation.compile_executor import status_executor
+from ..report_generation.html_preview import montar_secao_preview, gerar_preview_html, obter_secoes_preview
+from ..auth.decorators import token_required, admin_required
 from ..core.logger import log_action 
 # Inicializa a configuração e o banco de dados
 config = Config("config.json") 
@@ -37,7 +47,8 @@ def getRelatoriosGerados():
         for relatorio in relatorios:
             relatorios_list.append({
                 "nome": relatorio["nome"],
-                "id": str(relatorio["_id"])
+                "id": str(relatorio["_id"]),
+                "status": relatorio.get("status", STATUS_CONCLUIDO)
             })
         db_instance.close()
         return jsonify(relatorios_list), 200
@@ -112,21 +123,22 @@ def deleteAllRelatorios():
 @reports_bp.route('/gerarRelatorioDeLista/', methods=['POST'])
 @token_required
 def gerarRelatorioDeLista(current_user):
+    """
+    Valida a lista, cria o registro do relatório e enfileira a geração em segundo plano.
+    Retorna 202 com os ids do job e do relatório; o andamento é consultado em
+    /reports/statusJob/<idJob> ou /reports/statusRelatorio/<idRelatorio>.
+
+    Uma requisição idêntica a uma geração em andamento, ou concluída há pouco, não gera outro
+    relatório: a resposta traz o job/relatório existente com `reaproveitado` verdadeiro
+    (200 se ele já estiver concluído).
+    """
     try:
         data = request.get_json()
 
         if not data:
             return jsonify({"error": "Dados não fornecidos"}), 400
 
-        # Coleta de dados do request
         id_lista = data.get("idLista")
-        nome_secretaria = data.get("nomeSecretaria")
-        sigla_secretaria = data.get("siglaSecretaria")
-        data_inicio = data.get("dataInicio")
-        data_fim = data.get("dataFim")
-        ano = data.get("ano")
-        mes = data.get("mes")
-        google_drive_link = data.get("linkGoogleDrive")
 
         db_instance = Database()
 
@@ -143,132 +155,324 @@ def gerarRelatorioDeLista(current_user):
             db_instance.close()
             return jsonify({"error": "Lista não encontrada."}), 404
 
-        criado_por_vm_scan = lista_doc.get("criado_por_scanservidor", "Não informado")
-
-        # Configuração de caminhos
-        base_report_template_path = Path(config.caminho_report_templates_base)
-        static_vm_donut_output_path = str(base_report_template_path / "assets" / "images-vmscan" / "total-vulnerabilidades-vm-donut.png")
-        static_webapp_donut_output_path = str(base_report_template_path / "assets" / "images-was" / "total-vulnerabilidades-was-donut.png")
-        static_webapp_x_site_output_path = str(base_report_template_path / "assets" / "images-was" / "vulnerabilidades-x-site.png")
-        
-        # Criação do registro e pastas do relatório
-        novo_relatorio_id = db_instance.insert_one("relatorios", {"nome": nome_secretaria, "id_lista": id_lista, "destino_relatorio_preprocessado" : None}).inserted_id
-        pasta_destino_relatorio_temp_base = Path(config.caminho_shared_relatorios) / str(novo_relatorio_id) / "relatorio_preprocessado"
-        pasta_destino_relatorio_temp_base.mkdir(parents=True, exist_ok=True)
-        db_instance.update_one("relatorios", {"_id": novo_relatorio_id}, {"destino_relatorio_preprocessado": str(pasta_destino_relatorio_temp_base)})
-
-        # ==============================================================================
-        # BLOCO 1: PROCESSAMENTO DE WEBAPP SCANS (JSON)
-        # ==============================================================================
-        webapp_report_txt_path = pasta_destino_relatorio_temp_base / "Sites_agrupados_por_vulnerabilidades.txt"
-        webapp_risk_counts = {'Critical': '0', 'High': '0', 'Medium': '0', 'Low': '0'}
-        total_sites = '0'
-        total_vulnerabilidades_web = '0'
-        pasta_scans_webapp = lista_doc.get("pastas_scans_webapp")
-
-        if pasta_scans_webapp and os.path.exists(pasta_scans_webapp) and any(f.endswith('.json') for f in os.listdir(pasta_scans_webapp)):
-            print(f"Processando scans de WebApp da pasta: {pasta_scans_webapp}")
-            processar_relatorio_json(pasta_scans_webapp, str(pasta_destino_relatorio_temp_base))
-            output_csv_path = str(pasta_destino_relatorio_temp_base / "vulnerabilidades_agrupadas_por_site.csv")
-            extrair_quantidades_vulnerabilidades_por_site(output_csv_path, pasta_scans_webapp)
-
-            with open(webapp_report_txt_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                total_sites_match = re.search(r'Total de sites:\s*(\d+)', content)
-                total_vulnerabilidades_web_match = re.search(r'Total de Vulnerabilidades:\s*(\d+)', content)
-                critical_match = re.search(r'Critical:\s*(\d+)', content)
-                high_match = re.search(r'High:\s*(\d+)', content)
-                medium_match = re.search(r'Medium:\s*(\d+)', content)
-                low_match = re.search(r'Low:\s*(\d+)', content)
-                if total_sites_match: total_sites = total_sites_match.group(1)
-                if total_vulnerabilidades_web_match: total_vulnerabilidades_web = total_vulnerabilidades_web_match.group(1)
-                if critical_match: webapp_risk_counts['Critical'] = critical_match.group(1)
-                if high_match: webapp_risk_counts['High'] = high_match.group(1)
-                if medium_match: webapp_risk_counts['Medium'] = medium_match.group(1)
-                if low_match: webapp_risk_counts['Low'] = low_match.group(1)
-            webapp_risk_counts_int = {k: int(v) for k, v in webapp_risk_counts.items()}
-            gerar_grafico_donut_webapp(webapp_risk_counts_int, static_webapp_donut_output_path)
-            gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(output_csv_path, static_webapp_x_site_output_path, "descendente")
-        else:
-            print(f"Aviso: Não há scans WebApp na pasta {pasta_scans_webapp} ou a pasta está vazia.")
-            pd.DataFrame(columns=['Site', 'Critical', 'High', 'Medium', 'Low', 'Total']).to_csv(str(pasta_destino_relatorio_temp_base / "vulnerabilidades_agrupadas_por_site.csv"), index=False)
-            webapp_report_txt_path.touch()
-            (pasta_destino_relatorio_temp_base / "(LATEX)Sites_agrupados_por_vulnerabilidades.txt").touch()
-
-        # ==============================================================================
-        # BLOCO 2: PROCESSAMENTO DE SERVER SCANS (VM) - COM CAMINHO CORRIGIDO
-        # ==============================================================================
-        servers_report_txt_path = pasta_destino_relatorio_temp_base / "Servidores_agrupados_por_vulnerabilidades.txt"
-        servers_risk_counts = {'critical': '0', 'high': '0', 'medium': '0', 'low': '0'}
-        total_vulnerabilidade_vm = '0'
-        pasta_scans_vm = lista_doc.get("pastas_scans_vm") 
-        csv_servidor_path = None
-
-        if pasta_scans_vm:
-            csv_servidor_path = Path(pasta_scans_vm) / "servidores_scan.csv"
-
-        if lista_doc.get("historyid_scanservidor") and csv_servidor_path and csv_servidor_path.exists():
-            print(f"Arquivo CSV de servidores encontrado em {csv_servidor_path}. Processando...")
-            processar_relatorio_csv(pasta_scans_vm, str(pasta_destino_relatorio_temp_base))
-            with open(servers_report_txt_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                total_vulnerabilidade_vm_match = re.search(r'Total de Vulnerabilidades:\s*(\d+)', content)
-                critical_match = re.search(r'Critical:\s*(\d+)', content)
-                high_match = re.search(r'High:\s*(\d+)', content)
-                medium_match = re.search(r'Medium:\s*(\d+)', content)
-                low_match = re.search(r'Low:\s*(\d+)', content)
-                if total_vulnerabilidade_vm_match: total_vulnerabilidade_vm = total_vulnerabilidade_vm_match.group(1)
-                if critical_match: servers_risk_counts['critical'] = critical_match.group(1)
-                if high_match: servers_risk_counts['high'] = high_match.group(1)
-                if medium_match: servers_risk_counts['medium'] = medium_match.group(1)
-                if low_match: servers_risk_counts['low'] = low_match.group(1)
-            vm_risk_counts_int = {k: int(v) for k, v in servers_risk_counts.items()}
-            gerar_grafico_donut(vm_risk_counts_int, static_vm_donut_output_path)
-        else:
-            print(f"Aviso: Não há scans de Servidores associados ou o arquivo CSV não foi encontrado. Caminho verificado: {csv_servidor_path}")
-            servers_report_txt_path.touch()
-            (pasta_destino_relatorio_temp_base / "(LATEX)Servidores_agrupados_por_vulnerabilidades.txt").touch()
-
-        # ==============================================================================
-        # FINALIZAÇÃO E COMPILAÇÃO DO RELATÓRIO
-        # ==============================================================================
-        pasta_final_latex = pasta_destino_relatorio_temp_base / "RelatorioPronto"
-        terminar_relatorio_preprocessado(
-            nome_secretaria, sigla_secretaria, data_inicio, data_fim, ano, mes,
-            str(pasta_destino_relatorio_temp_base), str(pasta_final_latex / "main.tex"),
-            google_drive_link, total_vulnerabilidades_web, total_vulnerabilidade_vm,
-            webapp_risk_counts['Critical'], webapp_risk_counts['High'], webapp_risk_counts['Medium'], webapp_risk_counts['Low'],
-            servers_risk_counts['critical'], servers_risk_counts['high'], servers_risk_counts['medium'], servers_risk_counts['low'],
-            total_sites, criado_por_vm_scan,
-            static_vm_donut_output_path, static_webapp_donut_output_path, static_webapp_x_site_output_path
-        )
+        db_instance.close()
 
-        success, message = compilar_latex(os.path.join(str(pasta_final_latex), "main.tex"), str(pasta_final_latex))
+        # Requisições equivalentes (mesma lista, mesmos scans e catálogo, mesmos campos) são coalescidas:
+        # juntam-se à geração em andamento ou reaproveitam uma concluída há pouco, em vez de gerar de novo
+        job, reaproveitado = submeter_geracao(lista_doc, data, current_user)
+        em_andamento = job.get("status") in (STATUS_NA_FILA, STATUS_EM_EXECUCAO)
+        return jsonify({**_job_para_json(job), "reaproveitado": reaproveitado}), 202 if em_andamento else 200
 
-        if not success:
+    except Exception as e:
+        logging.error(f"Erro ao gerar relatório de lista: {str(e)}")
+        traceback.print_exc()
+        if 'db_instance' in locals() and db_instance.client:
             db_instance.close()
-            return jsonify({"error": f"Falha na geração do PDF: {message}"}), 500
+        return jsonify({"error": f"Erro interno ao gerar relatório: {str(e)}"}), 500
+
+
+def _job_para_json(job):
+    """
+    Converte um job (ou o estado gravado no documento do relatório) para a resposta da API.
+    """
+    def data_iso(valor):
+        return valor.isoformat() + "Z" if valor else None
+
+    etapa = job.get("etapa")
+    return {
+        "idJob": job.get("id_job"),
+        "idRelatorio": str(job.get("relatorio_id") or job.get("_id")),
+        "status": job.get("status"),
+        "etapa": etapa,
+        "descricaoEtapa": ETAPAS.get(etapa) if etapa else None,
+        "erro": job.get("erro"),
+        "percentual": (job.get("progresso") or {}).get("percentual", job.get("percentual")),
+        "temposEtapas": job.get("tempos_etapas") or {},
+        "cancelamentoSolicitado": bool(job.get("motivo_cancelamento")),
+        "prazo": data_iso(job.get("prazo")),
+        "criadoEm": data_iso(job.get("criado_em")),
+        "iniciadoEm": data_iso(job.get("iniciado_em")),
+        "finalizadoEm": data_iso(job.get("finalizado_em")),
+    }
+
+
+@reports_bp.route('/statusJob/<string:id_job>', methods=['GET'])
+@token_required
+def statusJob(current_user, id_job):
+    """
+    Estado de um job de geração: status (na_fila, em_execucao, concluido, falhou, cancelado), etapa atual e tempo de cada etapa.
+    """
+    job = obter_job(id_job)
+    if not job:
+        return jsonify({"error": "Job não encontrado."}), 404
+    return jsonify(_job_para_json(job)), 200
+
 
-        if success:
-            log_details = {
-                "report_id": str(novo_relatorio_id),
-                "report_name": nome_secretaria,
-                "list_id": id_lista
+@reports_bp.route('/statusRelatorio/<string:relatorio_id>', methods=['GET'])
+@token_required
+def statusRelatorio(current_user, relatorio_id):
+    """
+    Estado da geração de um relatório. Usa o job em memória, se houver, ou o estado gravado no
+    documento do relatório (relatórios gerados antes da fila de jobs aparecem como concluídos).
+    """
+    job = obter_job_do_relatorio(relatorio_id)
+    if job:
+        return jsonify(_job_para_json(job)), 200
+    try:
+        relatorio = _estado_gravado_relatorio(relatorio_id)
+    except Exception:
+        return jsonify({"error": "ID de relatório inválido."}), 400
+    if not relatorio:
+        return jsonify({"error": "Relatório não encontrado."}), 404
+    return jsonify(_job_para_json(relatorio)), 200
+
+
+def _estado_gravado_relatorio(relatorio_id):
+    """
+    Estado da geração gravado no documento do relatório, ou None se ele não existir.
+    """
+    db_instance = Database()
+    relatorio = db_instance.find_one("relatorios", {"_id": ObjectId(relatorio_id)})
+    db_instance.close()
+    if relatorio:
+        relatorio.setdefault("status", STATUS_CONCLUIDO)
+    return relatorio
+
+
+@reports_bp.route('/cancelarGeracao/<string:relatorio_id>', methods=['POST'])
+@token_required
+def cancelarGeracao(current_user, relatorio_id):
+    """
+    Cancela a geração de um relatório na fila ou em execução. A geração é interrompida no
+    próximo ponto de verificação (arquivo de scan, estágio ou gráfico; um pdflatex em execução
+    é encerrado na hora) e a pasta e o documento do relatório são removidos. Responde 202 com o
+    estado do job; o status final (cancelado) chega pelo stream de progresso ou por statusRelatorio.
+    """
+    job = obter_job_do_relatorio(relatorio_id)
+    if not job:
+        return jsonify({"error": "Nenhuma geração deste relatório em andamento neste servidor."}), 404
+    if job["status"] not in (STATUS_NA_FILA, STATUS_EM_EXECUCAO):
+        return jsonify({**_job_para_json(job), "error": "A geração deste relatório já terminou."}), 409
+
+    job = cancelar_job(job["id_job"])
+    log_action(current_user, "cancel_report", {"report_id": relatorio_id, "job_id": job["id_job"]})
+    return jsonify(_job_para_json(job)), 202
+
+
+# Intervalo máximo sem eventos no stream de progresso; um comentário é enviado para manter a conexão aberta
+_INTERVALO_KEEPALIVE_SEGUNDOS = 15
+
+
+def _evento_sse(seq, dados):
+    return f"id: {seq}\nevent: progresso\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+def _evento_para_json(relatorio_id, evento):
+    etapa = evento.get("etapa")
+    return {
+        "seq": evento.get("seq"),
+        "idRelatorio": relatorio_id,
+        "status": evento.get("status"),
+        "etapa": etapa,
+        "descricaoEtapa": ETAPAS.get(etapa) if etapa else None,
+        "percentual": evento.get("percentual"),
+        "processados": evento.get("processados"),
+        "total": evento.get("total"),
+        "detalhe": evento.get("detalhe"),
+        "decorridoSegundos": evento.get("decorrido_segundos"),
+        "erro": evento.get("erro"),
+    }
+
+
+@reports_bp.route('/progressoRelatorio/<string:relatorio_id>', methods=['GET'])
+@token_required
+def progressoRelatorio(current_user, relatorio_id):
+    """
+    Stream (server-sent events) do progresso da geração de um relatório: um evento `progresso`
+    por etapa iniciada e durante as etapas longas (arquivos de scan lidos, gráficos concluídos,
+    passadas do pdflatex), com status, etapa, percentual, itens processados e tempo decorrido.
+    O stream termina depois do evento com o status final. O cabeçalho Last-Event-ID retoma a
+    partir do último evento recebido.
+    """
+    job = obter_job_do_relatorio(relatorio_id)
+    if not job:
+        # Sem job neste processo: um único evento com o estado gravado no relatório
+        try:
+            relatorio = _estado_gravado_relatorio(relatorio_id)
+        except Exception:
+            return jsonify({"error": "ID de relatório inválido."}), 400
+        if not relatorio:
+            return jsonify({"error": "Relatório não encontrado."}), 404
+        estado = _job_para_json(relatorio)
+        evento = {chave: estado.get(chave) for chave in ("idRelatorio", "status", "etapa", "descricaoEtapa", "percentual", "erro")}
+        return Response(_evento_sse(0, evento), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+    try:
+        ultimo_seq = int(request.headers.get("Last-Event-ID") or 0)
+    except ValueError:
+        ultimo_seq = 0
+
+    def gerar():
+        seq = ultimo_seq
+        while True:
+            eventos, finalizado = aguardar_eventos(job["id_job"], seq, _INTERVALO_KEEPALIVE_SEGUNDOS)
+            for evento in eventos:
+                seq = evento["seq"]
+                yield _evento_sse(seq, _evento_para_json(relatorio_id, evento))
+            if finalizado:
+                return
+            if not eventos:
+                yield ": keepalive\n\n"
+
+    return Response(gerar(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@reports_bp.route('/jobsRelatorio/', methods=['GET'])
+@admin_required
+def jobsRelatorio(current_user):
+    """
+    Jobs de geração conhecidos por este processo, do mais recente para o mais antigo.
+    """
+    return jsonify([_job_para_json(job) for job in listar_jobs()]), 200
+
+
+@reports_bp.route('/gerarRelatoriosEmLote/', methods=['POST'])
+@admin_required
+def gerarRelatoriosEmLote(current_user):
+    """
+    Enfileira os relatórios de várias listas numa única chamada. O corpo tem "relatorios": uma
+    lista de entradas como o corpo de gerarRelatorioDeLista (idLista e campos da capa).
+    Retorna 202 com o id do lote e, na ordem enviada, o relatório e o job de cada entrada (ou o
+    erro que impediu a submissão); o andamento é consultado em /reports/statusLote/<idLote>.
+    """
+    try:
+        data = request.get_json()
+        entradas = data.get("relatorios") if isinstance(data, dict) else None
+        if not isinstance(entradas, list) or not entradas:
+            return jsonify({"error": "Informe em 'relatorios' a lista de relatórios a gerar."}), 400
+
+        resumo = submeter_lote(entradas, current_user)
+        return jsonify(_lote_para_json(resumo)), 202
+    except Exception as e:
+        logging.error(f"Erro ao gerar relatórios em lote: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"error": f"Erro interno ao gerar relatórios em lote: {str(e)}"}), 500
+
+
+@reports_bp.route('/statusLote/<string:id_lote>', methods=['GET'])
+@admin_required
+def statusLote(current_user, id_lote):
+    """
+    Resumo de um lote submetido em /reports/gerarRelatoriosEmLote/: o estado de cada relatório e
+    quantos foram concluídos, falharam, foram cancelados ou ainda estão em andamento.
+    """
+    resumo = resumo_lote(id_lote)
+    if resumo is None:
+        return jsonify({"error": "Lote não encontrado."}), 404
+    return jsonify(_lote_para_json(resumo)), 200
+
+
+def _lote_para_json(resumo):
+    def data_iso(valor):
+        return valor.isoformat() + "Z" if valor else None
+
+    return {
+        "idLote": resumo["id_lote"],
+        "total": resumo["total"],
+        "concluidos": resumo["concluidos"],
+        "falhas": resumo["falhas"],
+        "cancelados": resumo["cancelados"],
+        "emAndamento": resumo["em_andamento"],
+        "finalizado": resumo["finalizado"],
+        "criadoEm": data_iso(resumo["criado_em"]),
+        "duracaoSegundos": resumo["duracao_segundos"],
+        "relatorios": [
+            {
+                "idLista": item["id_lista"],
+                "nomeSecretaria": item["nome"],
+                "idRelatorio": item["relatorio_id"],
+                "idJob": item["id_job"],
+                "status": item["status"],
+                "erro": item["erro"],
+                "reaproveitado": item["reaproveitado"],
+                "temposEtapas": item["tempos_etapas"],
+                "finalizadoEm": data_iso(item["finalizado_em"]),
             }
-            log_action(current_user, "generate_report", log_details)
-            
-        db_instance.update_one("listas", {"_id": objeto_id}, {"relatorioGerado": True})
+            for item in resumo["relatorios"]
+        ],
+    }
+
+
+@reports_bp.route('/previewRelatorio/', methods=['POST'])
+@token_required
+def previewRelatorio(current_user):
+    """
+    Pré-visualização HTML paginada do relatório de uma lista, montada direto dos scans e do
+    catálogo atual, sem gerar arquivos nem compilar o LaTeX.
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Dados não fornecidos"}), 400
+
+        try:
+            objeto_id = ObjectId(data.get("idLista"))
+            pagina = int(data.get("pagina", 1))
+            por_pagina = int(data.get("itensPorPagina") or 0) or None
+        except Exception:
+            return jsonify({"error": "Parâmetros inválidos."}), 400
+
+        db_instance = Database()
+        lista_doc = db_instance.find_one("listas", {"_id": objeto_id})
         db_instance.close()
-        return jsonify(str(novo_relatorio_id)), 200
+        if not lista_doc:
+            return jsonify({"error": "Lista não encontrada."}), 404
 
+        inicio = time.perf_counter()
+        caminho_descricoes = Path(config.caminho_report_templates_descriptions)
+
+        def montar_secoes():
+            secoes = []
+            pasta_scans_webapp = lista_doc.get("pastas_scans_webapp")
+            if pasta_scans_webapp and os.path.exists(pasta_scans_webapp):
+                modelo_webapp = extrair_modelo_webapp(pasta_scans_webapp)
+                if modelo_webapp:
+                    secoes.append(montar_secao_preview(
+                        "Aplicações Web", "webapp", modelo_webapp,
+                        str(caminho_descricoes / "vulnerabilities_webapp.json"),
+                        str(caminho_descricoes / "descritivo_webapp.json")
+                    ))
+
+            pasta_scans_vm = lista_doc.get("pastas_scans_vm")
+            if lista_doc.get("historyid_scanservidor") and pasta_scans_vm and os.path.exists(pasta_scans_vm):
+                modelo_servidores = extrair_modelo_servidores(pasta_scans_vm)
+                if modelo_servidores:
+                    secoes.append(montar_secao_preview(
+                        "Servidores", "servers", modelo_servidores,
+                        str(caminho_descricoes / "vulnerabilities_servers.json"),
+                        str(caminho_descricoes / "descritivo_servers.json")
+                    ))
+            return secoes
+
+        # Um novo scan ou uma edição do catálogo muda a impressão digital e, com ela, a chave do cache
+        secoes = obter_secoes_preview(f"{objeto_id}:{fingerprint_dados(lista_doc)}", montar_secoes)
+
+        titulo = f"Pré-visualização: {lista_doc.get('nomeLista', str(objeto_id))}"
+        html, pagina, total_paginas = gerar_preview_html(secoes, pagina, por_pagina, titulo=titulo)
+        tempo_ms = round((time.perf_counter() - inicio) * 1000)
+        print(f"Pré-visualização da lista {objeto_id} (página {pagina}/{total_paginas}) gerada em {tempo_ms} ms.")
+
+        return jsonify({
+            "html": html,
+            "pagina": pagina,
+            "totalPaginas": total_paginas,
+            "tempoMs": tempo_ms
+        }), 200
     except Exception as e:
-        logging.error(f"Erro ao gerar relatório de lista: {str(e)}")
+        print(f"Erro ao gerar pré-visualização do relatório: {str(e)}")
         traceback.print_exc()
-        if 'db_instance' in locals() and db_instance.client:
-            db_instance.close()
-        return jsonify({"error": f"Erro interno ao gerar relatório: {str(e)}"}), 500
-    
-    
+        return jsonify({"error": f"Erro interno ao gerar a pré-visualização: {str(e)}"}), 500
+
 @reports_bp.route('/baixarRelatorioPdf/', methods=['POST'])
 @token_required
 def baixarRelatorioPdf(current_user):
@@ -306,6 +510,63 @@ def baixarRelatorioPdf(current_user):
         traceback.print_exc() # Imprime o traceback completo para depuração
         return jsonify({"error": f"Erro interno ao baixar o PDF: {str(e)}"}), 500
     
+@reports_bp.route('/baixarAnexosRelatorio/', methods=['POST'])
+@token_required
+def baixarAnexosRelatorio(current_user):
+    """
+    Envia, em um arquivo ZIP, os CSVs com as listas completas de instâncias
+    que ultrapassaram o limite do Anexo A no PDF.
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Dados não fornecidos"}), 400
+
+        relatorio_id = data.get("idRelatorio")
+        if not relatorio_id:
+            return jsonify({"error": "ID do relatório não fornecido."}), 400
+
+        # O ID compõe o caminho da pasta: só IDs de relatórios existentes são aceitos
+        try:
+            relatorio = _estado_gravado_relatorio(str(relatorio_id))
+        except Exception:
+            return jsonify({"error": "ID de relatório inválido."}), 400
+        if not relatorio:
+            return jsonify({"error": "Relatório não encontrado."}), 404
+        relatorio_id = str(relatorio["_id"])
+
+        pasta_anexos = Path(config.caminho_shared_relatorios) / relatorio_id / "relatorio_preprocessado" / "anexos"
+        arquivos_csv = sorted(pasta_anexos.glob("*.csv")) if pasta_anexos.is_dir() else []
+        if not arquivos_csv:
+            return jsonify({"error": "Este relatório não possui anexos em CSV."}), 404
+
+        buffer_zip = io.BytesIO()
+        with zipfile.ZipFile(buffer_zip, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+            for arquivo_csv in arquivos_csv:
+                arquivo_zip.write(arquivo_csv, arcname=arquivo_csv.name)
+        buffer_zip.seek(0)
+
+        log_action(current_user, "download_report_annex", {"report_id": relatorio_id})
+
+        return send_file(
+            buffer_zip,
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=f"Anexos_Relatorio_{relatorio_id}.zip"
+        )
+    except Exception as e:
+        print(f"Erro ao baixar anexos do relatório: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"error": f"Erro interno ao baixar os anexos: {str(e)}"}), 500
+
+@reports_bp.route('/statusCompilacao/', methods=['GET'])
+@admin_required
+def statusCompilacao(current_user):
+    """
+    Retorna as métricas do executor de compilação LaTeX: jobs na fila, vagas em uso e tempos de espera.
+    """
+    return jsonify(status_executor()), 200
+
 @reports_bp.route('/getRelatorioMissingVulnerabilities', methods=['GET'])
 def getRelatorioMissingVulnerabilities():
     try:
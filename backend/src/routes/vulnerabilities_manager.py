@@ -10,7 +10,10 @@ from ..core.config import Config
 # Importa as funções de manipulação de JSON do novo módulo core
 from ..core.json_utils import _load_data, _save_data, add_vulnerability, \
                              get_all_vulnerabilities, update_vulnerability, \
-                             delete_vulnerability, _load_data_ # Corrigido: delete_vulnerabilidade
+                             delete_vulnerability, _load_data_, \
+                             find_vulnerability_by_name # Corrigido: delete_vulnerabilidade
+# Cache de fragmentos LaTeX por entrada do catálogo
+from ..report_generation.fragment_cache import invalidar_fragmento
 # Adicionado: Importa a nova função de sanitização
 from ..core.utils import sanitize_string
 
@@ -90,7 +93,11 @@ def upload_image_api():
             final_filename = f"{sanitized_vulnerability_name_for_filename}{file_extension}"
             file_path = os.path.join(image_full_folder, final_filename)
 
-            file.save(file_path)
+            # Salva em um arquivo temporário e substitui o destino, para não alterar
+            # através de hardlinks as imagens vinculadas em relatórios já gerados.
+            temp_file_path = f"{file_path}.upload"
+            file.save(temp_file_path)
+            os.replace(temp_file_path, file_path)
 
             relative_image_path = os.path.join(image_sub_path, final_filename).replace(os.sep, '/')
             return jsonify({"message": "Imagem enviada com sucesso!", "imagePath": relative_image_path}), 200
@@ -228,9 +235,11 @@ def update_vulnerability_api():
                 return jsonify({"error": f"Campo '{field}' resultou vazio após sanitização. Verifique o conteúdo."}), 400
 
         file_path = _get_vuln_file_path(vuln_type)
+        entrada_anterior = find_vulnerability_by_name(file_path, sanitized_old_name)
         success, message = update_vulnerability(file_path, sanitized_old_name, updated_data_sanitized)
 
         if success:
+            invalidar_fragmento(entrada_anterior)
             return jsonify({"message": message}), 200
         else:
             return jsonify({"error": message}), 404
@@ -258,6 +267,7 @@ def delete_vulnerability_api():
 
         file_path = _get_vuln_file_path(vuln_type)
 
+        vuln_to_delete = None
         try:
             all_vulnerabilities = _load_data(file_path)
             vuln_to_delete = next((v for v in all_vulnerabilities if v.get("Vulnerabilidade") == sanitized_vuln_name), None)
@@ -279,6 +289,7 @@ def delete_vulnerability_api():
         success, message = delete_vulnerability(file_path, sanitized_vuln_name)
 
         if success:
+            invalidar_fragmento(vuln_to_delete)
             return jsonify({"message": message}), 200
         else:
             return jsonify({"error": message}), 404
@@ -84,6 +84,39 @@ export interface Folder {
 export interface ReportGenerated {
     id: string;
     nome: string;
+    status?: ReportJobStatus;
+}
+
+export type ReportJobStatus = 'na_fila' | 'em_execucao' | 'concluido' | 'falhou' | 'cancelado';
+
+export interface ReportProgressEvent {
+    seq: number;
+    idRelatorio: string;
+    status: ReportJobStatus;
+    etapa: string | null;
+    descricaoEtapa: string | null;
+    percentual: number | null;
+    processados?: number | null;
+    total?: number | null;
+    detalhe?: string | null;
+    decorridoSegundos?: number | null;
+    erro: string | null;
+}
+
+export interface ReportJob {
+    idJob: string | null;
+    idRelatorio: string;
+    status: ReportJobStatus;
+    etapa: string | null;
+    descricaoEtapa: string | null;
+    erro: string | null;
+    temposEtapas: Record<string, number>;
+    cancelamentoSolicitado?: boolean;
+    prazo?: string | null;
+    criadoEm: string | null;
+    iniciadoEm: string | null;
+    finalizadoEm: string | null;
+    reaproveitado?: boolean;
 }
 
 export const listsApi = {
@@ -191,11 +224,60 @@ export const reportsApi = {
         return response.data;
     },
 
-    generateReportForList: async (reportData: any): Promise<string> => {
+    generateReportForList: async (reportData: any): Promise<ReportJob> => {
         const response = await api.post('/reports/gerarRelatorioDeLista/', reportData);
         return response.data;
     },
 
+    // Pede o cancelamento da geração; o status final (cancelado) chega pelo stream de progresso ou pelo status
+    cancelReportGeneration: async (idRelatorio: string): Promise<ReportJob> => {
+        const response = await api.post(`/reports/cancelarGeracao/${idRelatorio}`);
+        return response.data;
+    },
+
+    getReportStatus: async (idRelatorio: string): Promise<ReportJob> => {
+        const response = await api.get(`/reports/statusRelatorio/${idRelatorio}`);
+        return response.data;
+    },
+
+    // Acompanha o stream (server-sent events) de progresso da geração até o evento final, que é retornado.
+    // Usa fetch em vez de EventSource para poder enviar o token no cabeçalho Authorization.
+    streamReportProgress: async (idRelatorio: string, onEvento: (evento: ReportProgressEvent) => void): Promise<ReportProgressEvent | null> => {
+        const token = localStorage.getItem('token');
+        const response = await fetch(`${API_URL}/reports/progressoRelatorio/${idRelatorio}`, {
+            headers: token ? { Authorization: `Bearer ${token}` } : {},
+        });
+        if (!response.ok || !response.body) {
+            throw new Error(`Erro ${response.status} ao acompanhar o progresso do relatório.`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let ultimoEvento: ReportProgressEvent | null = null;
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let fimEvento;
+            while ((fimEvento = buffer.indexOf('\n\n')) >= 0) {
+                const bloco = buffer.slice(0, fimEvento);
+                buffer = buffer.slice(fimEvento + 2);
+                const dados = bloco.split('\n').filter(linha => linha.startsWith('data: ')).map(linha => linha.slice(6)).join('\n');
+                if (dados) {
+                    ultimoEvento = JSON.parse(dados);
+                    onEvento(ultimoEvento!);
+                }
+            }
+        }
+        return ultimoEvento;
+    },
+
+    previewReportForList: async (idLista: string, pagina: number = 1): Promise<{ html: string; pagina: number; totalPaginas: number; tempoMs: number }> => {
+        const response = await api.post('/reports/previewRelatorio/', { idLista, pagina });
+        return response.data;
+    },
+
     getMissingVulnerabilities: async (relatorioId: string, type: 'sites' | 'servers'): Promise<string[]> => {
         const response = await api.get(`/reports/getRelatorioMissingVulnerabilities?relatorioId=${relatorioId}&type=${type}`);
         return response.data.content;
@@ -205,6 +287,11 @@ export const reportsApi = {
         const response = await api.post('/reports/baixarRelatorioPdf/', { idRelatorio }, { responseType: 'blob' });
         return response.data;
     },
+
+    downloadReportAnnexes: async (idRelatorio: string): Promise<Blob> => {
+        const response = await api.post('/reports/baixarAnexosRelatorio/', { idRelatorio }, { responseType: 'blob' });
+        return response.data;
+    },
 };
 
 export const vulnerabilitiesApi = {
@@ -5,7 +5,24 @@ import { toast, ToastContainer } from 'react-toastify';
 import 'react-toastify/dist/ReactToastify.css';
 
 // Importa as funções de API e interfaces do novo módulo
-import { listsApi, reportsApi } from '../api/backendApi';
+import { listsApi, reportsApi, ReportProgressEvent } from '../api/backendApi';
+
+// Intervalo entre as consultas ao status da geração do relatório (quando o stream de progresso não está disponível)
+const INTERVALO_STATUS_MS = 2000;
+// Tempo máximo acompanhando uma geração (fila + execução); depois disso a página deixa de consultar o status
+const TEMPO_MAXIMO_ACOMPANHAMENTO_MS = 60 * 60 * 1000;
+
+const formatarProgresso = (evento: ReportProgressEvent): string => {
+    if (evento.status === 'na_fila') return 'Na fila';
+    let texto = evento.descricaoEtapa || 'Gerando relatório';
+    if (evento.processados != null && evento.total) {
+        texto += ` (${evento.processados}/${evento.total}${evento.detalhe ? ` ${evento.detalhe}` : ''})`;
+    } else if (evento.detalhe) {
+        texto += ` (${evento.detalhe})`;
+    }
+    if (evento.percentual != null) texto += ` — ${Math.round(evento.percentual)}%`;
+    return texto;
+};
 
 function GerarRelatorio() {
     const { idLista } = useParams<{ idLista: string }>();
@@ -20,6 +37,11 @@ function GerarRelatorio() {
     const [linkGoogleDrive, setLinkGoogleDrive] = useState('');
     const [loading, setLoading] = useState(false);
     const [nomeListaAssociada, setNomeListaAssociada] = useState('');
+    const [preview, setPreview] = useState<{ html: string; pagina: number; totalPaginas: number } | null>(null);
+    const [loadingPreview, setLoadingPreview] = useState(false);
+    const [etapaGeracao, setEtapaGeracao] = useState<string | null>(null);
+    const [idRelatorioEmGeracao, setIdRelatorioEmGeracao] = useState<string | null>(null);
+    const [cancelando, setCancelando] = useState(false);
 
     useEffect(() => {
         if (idLista) {
@@ -43,6 +65,33 @@ function GerarRelatorio() {
         }
     };
 
+    const handlePreview = async (pagina: number = 1) => {
+        if (!idLista) return;
+        setLoadingPreview(true);
+        try {
+            const resultado = await reportsApi.previewReportForList(idLista, pagina);
+            setPreview(resultado);
+        } catch (error: any) {
+            console.error('Erro ao gerar pré-visualização:', error);
+            toast.error(error.response?.data?.error || 'Erro ao gerar a pré-visualização.');
+        } finally {
+            setLoadingPreview(false);
+        }
+    };
+
+    const handleCancelar = async () => {
+        if (!idRelatorioEmGeracao) return;
+        setCancelando(true);
+        try {
+            await reportsApi.cancelReportGeneration(idRelatorioEmGeracao);
+            setEtapaGeracao('Cancelando');
+        } catch (error: any) {
+            console.error('Erro ao cancelar a geração:', error);
+            toast.error(error.response?.data?.error || 'Erro ao cancelar a geração do relatório.');
+            setCancelando(false);
+        }
+    };
+
     const handleSubmit = async (e: React.FormEvent) => {
         e.preventDefault();
         setLoading(true);
@@ -66,14 +115,50 @@ function GerarRelatorio() {
                 linkGoogleDrive: linkGoogleDrive,
             };
 
-            const relatorioId = await reportsApi.generateReportForList(reportData); // Usa reportsApi
+            // A geração roda em segundo plano: acompanha o job até ele terminar
+            let job = await reportsApi.generateReportForList(reportData);
+            const limiteAcompanhamento = Date.now() + TEMPO_MAXIMO_ACOMPANHAMENTO_MS;
+            if (job.reaproveitado) {
+                toast.info('Um relatório idêntico já estava sendo gerado ou foi gerado há pouco; ele será aproveitado.');
+            }
+            setEtapaGeracao('Na fila');
+            setIdRelatorioEmGeracao(job.idRelatorio);
+            try {
+                const eventoFinal = await reportsApi.streamReportProgress(job.idRelatorio, evento => setEtapaGeracao(formatarProgresso(evento)));
+                if (eventoFinal) {
+                    job = { ...job, status: eventoFinal.status, erro: eventoFinal.erro };
+                }
+            } catch (error) {
+                console.warn('Stream de progresso indisponível; consultando o status periodicamente.', error);
+            }
+            while (job.status === 'na_fila' || job.status === 'em_execucao') {
+                if (Date.now() > limiteAcompanhamento) {
+                    toast.warn('A geração está demorando mais que o esperado. Acompanhe o status do relatório na lista de relatórios gerados.');
+                    return;
+                }
+                await new Promise(resolve => setTimeout(resolve, INTERVALO_STATUS_MS));
+                job = await reportsApi.getReportStatus(job.idRelatorio);
+                setEtapaGeracao(job.descricaoEtapa || (job.status === 'na_fila' ? 'Na fila' : null));
+            }
+
+            if (job.status === 'cancelado') {
+                toast.info(job.erro || 'Geração do relatório cancelada.');
+                return;
+            }
+            if (job.status === 'falhou') {
+                toast.error(job.erro || 'Erro ao gerar relatório. Verifique os logs.');
+                return;
+            }
             toast.success('Relatório gerado com sucesso!');
-            navigate(`/gerar-relatorio-final/${relatorioId}`); // Redireciona para a página final do relatório
+            navigate(`/gerar-relatorio-final/${job.idRelatorio}`); // Redireciona para a página final do relatório
         } catch (error: any) {
             console.error('Erro ao gerar relatório:', error);
             toast.error(error.response?.data?.error || 'Erro ao gerar relatório. Verifique os logs.');
         } finally {
             setLoading(false);
+            setEtapaGeracao(null);
+            setIdRelatorioEmGeracao(null);
+            setCancelando(false);
         }
     };
 
@@ -189,7 +274,28 @@ function GerarRelatorio() {
                         />
                     </div>
 
-                    <div className="col-span-2 flex justify-end mt-4">
+                    <div className="col-span-2 flex justify-end items-center mt-4">
+                        {etapaGeracao && (
+                            <span className="mr-4 text-gray-600">{etapaGeracao}...</span>
+                        )}
+                        {idRelatorioEmGeracao && (
+                            <button
+                                type="button"
+                                onClick={handleCancelar}
+                                className="mr-4 border border-red-600 text-red-600 hover:bg-gray-100 px-6 py-2 rounded cursor-pointer"
+                                disabled={cancelando}
+                            >
+                                {cancelando ? 'Cancelando...' : 'Cancelar geração'}
+                            </button>
+                        )}
+                        <button
+                            type="button"
+                            onClick={() => handlePreview(1)}
+                            className="mr-4 border border-[#007BB4] text-[#007BB4] hover:bg-gray-100 px-6 py-2 rounded cursor-pointer"
+                            disabled={loading || loadingPreview}
+                        >
+                            {loadingPreview ? <ClipLoader size={20} color={"#007BB4"} /> : 'Pré-visualizar'}
+                        </button>
                         <button
                             type="submit"
                             className="bg-[#007BB4] hover:bg-[#005f87] text-white px-6 py-2 rounded cursor-pointer"
@@ -199,6 +305,37 @@ function GerarRelatorio() {
                         </button>
                     </div>
                 </form>
+
+                {preview && (
+                    <div className="mt-8">
+                        <div className="flex justify-between items-center mb-2 text-black">
+                            <button
+                                type="button"
+                                onClick={() => handlePreview(preview.pagina - 1)}
+                                className="px-3 py-1 border rounded disabled:opacity-50"
+                                disabled={loadingPreview || preview.pagina <= 1}
+                            >
+                                Anterior
+                            </button>
+                            <span>Página {preview.pagina} de {preview.totalPaginas}</span>
+                            <button
+                                type="button"
+                                onClick={() => handlePreview(preview.pagina + 1)}
+                                className="px-3 py-1 border rounded disabled:opacity-50"
+                                disabled={loadingPreview || preview.pagina >= preview.totalPaginas}
+                            >
+                                Próxima
+                            </button>
+                        </div>
+                        <iframe
+                            title="Pré-visualização do relatório"
+                            srcDoc={preview.html}
+                            sandbox=""
+                            className="w-full border rounded"
+                            style={{ height: '70vh' }}
+                        />
+                    </div>
+                )}
             </div>
             <ToastContainer /> {/* Mantido para exibir toasts */}
         </div>
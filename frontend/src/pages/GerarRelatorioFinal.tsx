@@ -68,6 +68,35 @@ function GerarRelatorioFinal() {
         }
     };
 
+    const handleDownloadAnnexes = async () => {
+        if (!relatorioId) {
+            toast.error('ID do relatório não disponível para download.');
+            return;
+        }
+        setLoading(true);
+        try {
+            const zipBlob = await reportsApi.downloadReportAnnexes(relatorioId);
+            const url = window.URL.createObjectURL(zipBlob);
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = `Anexos_Relatorio_${relatorioId}.zip`;
+            document.body.appendChild(a);
+            a.click();
+            a.remove();
+            window.URL.revokeObjectURL(url);
+            toast.success('Download dos anexos iniciado!');
+        } catch (error: any) {
+            if (error?.response?.status === 404) {
+                toast.info('Este relatório não possui anexos em CSV.');
+            } else {
+                console.error('Erro ao baixar anexos:', error);
+                toast.error('Erro ao baixar os anexos do relatório.');
+            }
+        } finally {
+            setLoading(false);
+        }
+    };
+
     const handleBackToHome = () => {
       navigate('/'); // Navega para a página inicial
     };
@@ -95,6 +124,13 @@ function GerarRelatorioFinal() {
                         >
                             Baixar Relatório PDF
                         </button>
+                        <button
+                            onClick={handleDownloadAnnexes}
+                            className="ml-4 bg-[#007BB4] hover:bg-[#005f87] text-white font-bold py-2 px-4 rounded transition"
+                            disabled={loading}
+                        >
+                            Baixar Anexos (CSV)
+                        </button>
                     </div>
 
                     {missingVulnerabilities && (
@@ -116,7 +116,7 @@ const LogsPage: React.FC = () => {
     setPagination(prev => ({ ...prev, currentPage: newPage }));
   };
 
-  const logActions = ['generate_report', 'download_report', 'create_user'];
+  const logActions = ['generate_report', 'cancel_report', 'download_report', 'create_user'];
 
   return (
       <div className="container mx-auto p-4">
@@ -194,6 +194,8 @@ function RelatoriosGerados() {
                                         className="text-blue-600 hover:underline cursor-pointer text-lg font-semibold bg-transparent border-none p-0 m-0"
                                     >
                                         {relatorio.nome}
+                                        {relatorio.status === 'na_fila' || relatorio.status === 'em_execucao' ? ' (em geração)' : ''}
+                                        {relatorio.status === 'falhou' ? ' (falhou)' : ''}
                                     </button>
                                     <button
                                         onClick={() => handleDeleteClick(relatorio.id, relatorio.nome)}